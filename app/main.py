@@ -4,16 +4,22 @@ Main module and entrypoint of the API.
 
 This module initializes the FastAPI application, sets up the application
 lifespan, loads initial user data via UserService, and includes all routers
-for users, stats, and health endpoints.
+for users, stats, health and admin endpoints.
 
-It also provides a simple root endpoint for basic connectivity checks.
+It also provides a simple root endpoint for basic connectivity checks,
+and the /metrics endpoint exposing the metrics of the process to Prometheus.
 """
 
+import asyncio
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, APIRouter
-from app.routers import users, stats, health
+from fastapi import FastAPI, APIRouter, Response
+from app.routers import users, stats, health, admin
 from app.services.user_service import user_service
+from app.services.user_file_watcher import user_file_watcher, USERS_WATCH_ENABLED
 from app.services.json_service import JSONService
+from app.services.logger_service import LoggerService
+from app.services.metrics_service import MetricsMiddleware, metrics_service
+from app.services.profiling_service import ProfilingMiddleware
 
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
@@ -22,6 +28,10 @@ async def lifespan(_app: FastAPI):
     This function is executed on application startup and shutdown.
     During startup, it refreshes user data from the CSV using the
     singleton UserService, ensuring in-memory data is ready for requests.
+    If `USERS_WATCH_ENABLED`, the CSV file is then watched for changes
+    until shutdown. The changes to the users, by the write endpoints or the
+    watcher, are applied on the event loop of the application, like the reads.
+    On shutdown, the pending log records are flushed.
 
     Args:
         app (FastAPI): The FastAPI application instance.
@@ -29,14 +39,26 @@ async def lifespan(_app: FastAPI):
     Yields:
         None
     """
-    user_service.refresh_users_data()
+    if USERS_WATCH_ENABLED:
+        user_file_watcher.start()
+    else:
+        user_service.refresh_users_data()
+    user_service.set_event_loop(asyncio.get_running_loop())
     yield
+    user_service.set_event_loop(None)
+    if USERS_WATCH_ENABLED:
+        # Joined off the loop, which may still have to apply the last change of the watcher
+        await asyncio.to_thread(user_file_watcher.stop)
+    LoggerService.shutdown()
 
 app = FastAPI(lifespan=lifespan)
+app.add_middleware(ProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(users.router)
 app.include_router(stats.router)
 app.include_router(health.router)
+app.include_router(admin.router)
 
 router = APIRouter()
 
@@ -55,4 +77,23 @@ def hello_world():
     """
     return JSONService.format(message="Hello World, you're using API Collaborators")
 
+@router.get("/metrics")
+def get_metrics():
+    """_Metrics endpoint, in the Prometheus text exposition format._
+
+    The metrics are those of the worker process serving the request: requests
+    by route and status (count, latency and response size histograms), loads
+    of the users, response cache, sampled logs, and resident memory.
+
+    Returns:
+        Response: The metrics, as plain text.
+
+    Example Response:
+        # TYPE http_requests_total counter
+        http_requests_total{method="GET",route="/users/",status="200"} 42
+    """
+    return Response(
+        content=metrics_service.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8")
+
 app.include_router(router)
@@ -0,0 +1,22 @@
+"""
+stats_batch.py
+
+This module defines the StatsBatchRequest Pydantic model, the body of the
+batch query of the stats of many teams.
+"""
+
+from pydantic import BaseModel, Field
+
+STATS_MAX_BATCH_TEAMS = 1000
+
+class StatsBatchRequest(BaseModel):
+    """_Represents a batch query of the stats of teams._
+
+    Attributes:
+        teams (list[str]): Names of the teams, 1 to `STATS_MAX_BATCH_TEAMS`.
+            A team given several times is returned once.
+
+    Example:
+        >>> StatsBatchRequest(teams=["Backend", "Ops"])
+    """
+    teams: list[str] = Field(min_length=1, max_length=STATS_MAX_BATCH_TEAMS)
@@ -7,6 +7,8 @@ The model enforces type validation and constraints on the user attributes.
 
 from pydantic import BaseModel, EmailStr, Field
 
+ADULT_AGE = 18
+
 class User(BaseModel):
     """_Represents a user in the system._
 
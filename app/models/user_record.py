@@ -0,0 +1,91 @@
+"""
+user_record.py
+
+This module defines the UserRecord class, the compact in-memory representation
+of a validated user stored by UserService.
+
+A record has no per-instance dictionary nor validation machinery, the team
+names are interned (one string shared by all the users of a team). The start
+date is kept as given: YYYY-MM-DD strings compare in date order, so the sorts
+and filters use it directly. Records are converted to the `User` model only at
+the API boundary.
+"""
+
+import sys
+from dataclasses import dataclass
+from pydantic_core import to_json
+from app.models.user import User
+
+@dataclass(slots=True, eq=False)
+class UserRecord:
+    """_Compact, already validated user._
+
+    Records are compared by identity, like the users held by the indexes.
+
+    Attributes:
+        name (str): Full name of the user.
+        email (str): User's email address, already validated.
+        age (int): User's age.
+        team (str): Interned name of the team the user belongs to.
+        start_date (str): User's start date, as given in the data source.
+        seq (int): Sequence of the record in its dataset, increasing in the order
+            of the data source, which orders the users of every index.
+
+    Example:
+        >>> record = UserRecord.from_user(user)
+        >>> record.team is UserRecord.from_user(other_user_of_the_team).team
+        True
+        >>> record.to_user() == user
+        True
+    """
+    name: str
+    email: str
+    age: int
+    team: str
+    start_date: str
+    seq: int = 0
+
+    @staticmethod
+    def from_user(user : User) -> "UserRecord":
+        """_Builds the record of a validated user._
+
+        Args:
+            user (User): The validated user.
+
+        Returns:
+            UserRecord: The compact record of the user.
+        """
+        return UserRecord.from_values(user.name, user.email, user.age, user.team, user.start_date)
+    @staticmethod
+    def from_values(
+        name : str, email : str, age : int, team : str, start_date : str) -> "UserRecord":
+        """_Builds the record of the already validated values of a user._
+
+        Args:
+            name (str): Full name of the user.
+            email (str): User's email address.
+            age (int): User's age.
+            team (str): Name of the team, interned by the record.
+            start_date (str): User's start date.
+
+        Returns:
+            UserRecord: The compact record of the user.
+        """
+        return UserRecord(name, email, age, sys.intern(team), start_date)
+    def to_user(self) -> User:
+        """_Returns the `User` model of the record, without validating it again._"""
+        return User.model_construct(
+            name=self.name,
+            email=self.email,
+            age=self.age,
+            team=self.team,
+            start_date=self.start_date)
+    def to_json(self) -> bytes:
+        """_Returns the JSON encoding of the record, the same as the one of its `User` model._"""
+        return to_json({
+            "name": self.name,
+            "email": self.email,
+            "age": self.age,
+            "team": self.team,
+            "start_date": self.start_date,
+        })
@@ -0,0 +1,22 @@
+"""
+users_lookup.py
+
+This module defines the UsersLookupRequest Pydantic model, the body of the
+bulk lookup of users by email.
+"""
+
+from pydantic import BaseModel, Field
+
+USERS_MAX_LOOKUP_EMAILS = 1000
+
+class UsersLookupRequest(BaseModel):
+    """_Represents a bulk lookup of users by email._
+
+    Attributes:
+        emails (list[str]): Emails of the users, 1 to `USERS_MAX_LOOKUP_EMAILS`,
+            case-insensitive.
+
+    Example:
+        >>> UsersLookupRequest(emails=["alice@example.com", "bob@example.com"])
+    """
+    emails: list[str] = Field(min_length=1, max_length=USERS_MAX_LOOKUP_EMAILS)
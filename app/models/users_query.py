@@ -0,0 +1,45 @@
+"""
+users_query.py
+
+This module defines the UsersQuery Pydantic model, the query parameters
+of the retrieval of the users: their filter, sort order and pagination.
+"""
+
+from datetime import date
+from pydantic import BaseModel, Field
+
+class UsersQuery(BaseModel):
+    """_Represents the query parameters of a retrieval of the users._
+
+    Attributes:
+        team (str | None): Team of the users.
+        teams (list[str] | None): Teams of the users, repeated
+            (`?teams=Backend&teams=Ops`): users of any of them, or of `team`.
+        min_age (int | None): Minimum age, inclusive.
+        max_age (int | None): Maximum age, inclusive.
+        start_date_from (date | None): Minimum start date, inclusive.
+        start_date_to (date | None): Maximum start date, inclusive.
+        name_prefix (str | None): Prefix of the names (case-sensitive).
+        email_prefix (str | None): Prefix of the emails (case-sensitive).
+        limit (int | None): Maximum number of users per page.
+        cursor (str | None): Cursor of the page, returned as `nextCursor`
+            with the previous page.
+        sort (str | None): Sort order: `age`, `start_date` or `name`, prefixed
+            by `-` for the descending order (e.g. `-age`).
+        stream (bool): Whether the users are streamed as NDJSON.
+
+    Example:
+        >>> UsersQuery(teams=["Backend", "Ops"], min_age=30, sort="-age", limit=50)
+    """
+    team: str | None = None
+    teams: list[str] | None = None
+    min_age: int | None = Field(None, ge=0)
+    max_age: int | None = Field(None, ge=0)
+    start_date_from: date | None = None
+    start_date_to: date | None = None
+    name_prefix: str | None = None
+    email_prefix: str | None = None
+    limit: int | None = Field(None, ge=1)
+    cursor: str | None = None
+    sort: str | None = None
+    stream: bool = False
@@ -0,0 +1,123 @@
+"""
+admin.py
+
+This module defines the administration endpoints of the application.
+
+It provides access to the profiles of requests captured by the
+ProfilingService (see the ProfilingMiddleware), when profiling is enabled.
+
+The endpoints are disabled unless the `ADMIN_TOKEN` environment variable is
+set, and each request must send it in the `X-Admin-Token` header.
+
+Endpoints:
+    /admin/profiles        - List the captured profiles, newest first.
+    /admin/profiles/{name} - Download a profile, in the pstats format.
+"""
+
+import os
+import secrets
+from fastapi import APIRouter, Header
+from fastapi.responses import FileResponse
+from app.services.json_service import JSONService
+from app.services.profiling_service import profiling_service
+from app.services.logger_service import logger_service
+
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN") or None
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"]
+)
+
+def _check_admin_token(x_admin_token : str | None, route : str) -> dict | None:
+    """_Checks the admin token of a request._
+
+    Args:
+        x_admin_token (str | None): Value of the `X-Admin-Token` header, if any.
+        route (str): Name of the route, for the logs.
+
+    Returns:
+        dict | None: The error response, or None if the request is authorized.
+    """
+    if ADMIN_TOKEN is None:
+        return JSONService.format(status=403, message="Admin Disabled")
+    if x_admin_token is None or not secrets.compare_digest(
+            x_admin_token.encode("utf-8"), ADMIN_TOKEN.encode("utf-8")):
+        logger_service.warning("HTTP Request - %s: Invalid admin token", route)
+        return JSONService.format(status=401, message="Unauthorized")
+    return None
+
+@router.get("/profiles")
+async def list_profiles(x_admin_token : str | None = Header(default=None)):
+    """
+    List the captured profiles of requests, newest first.
+
+    Args:
+        x_admin_token (str | None): The admin token, from the `X-Admin-Token` header.
+
+    Returns:
+        dict: JSON response containing:
+            - data (List[dict]): The summary of each profile: name, method, path,
+              duration, and time spent in UserService, JSONService and serialization
+            - status (int): HTTP-like status code
+            - message (str): Status message
+
+    Behavior:
+        - If `ADMIN_TOKEN` is not set, returns status 403.
+        - If the admin token is missing or wrong, returns status 401.
+        - If profiling is disabled, returns status 404.
+
+    Example Response:
+        {
+            "status": 200,
+            "message": "success",
+            "data": [
+                {
+                    "name": "1718000000000000000-1234",
+                    "method": "GET",
+                    "path": "/stats/",
+                    "duration": 0.0123,
+                    "time_by_group": {"UserService": 0.004, "JSONService": 0.001,
+                                      "serialization": 0.003, "total": 0.011}
+                }
+            ]
+        }
+    """
+    error_response = _check_admin_token(x_admin_token, "list_profiles")
+    if error_response is not None:
+        return error_response
+    if not profiling_service.enabled:
+        return JSONService.format(status=404, message="Profiling Disabled")
+    return JSONService.format(data=profiling_service.list_profiles())
+
+@router.get("/profiles/{name}")
+async def download_profile(name : str, x_admin_token : str | None = Header(default=None)):
+    """
+    Download a captured profile, in the pstats format.
+
+    The file can be read with `python -m pstats <file>`, or with
+    a viewer such as snakeviz.
+
+    Args:
+        name (str): Name of the profile, as listed by /admin/profiles.
+        x_admin_token (str | None): The admin token, from the `X-Admin-Token` header.
+
+    Returns:
+        FileResponse: The pstats file.
+
+    Behavior:
+        - If `ADMIN_TOKEN` is not set, returns status 403.
+        - If the admin token is missing or wrong, returns status 401.
+        - If profiling is disabled, or the profile is unknown, returns status 404.
+    """
+    error_response = _check_admin_token(x_admin_token, "download_profile")
+    if error_response is not None:
+        return error_response
+    if not profiling_service.enabled:
+        return JSONService.format(status=404, message="Profiling Disabled")
+    profile_path = profiling_service.get_profile_path(name)
+    if profile_path is None:
+        logger_service.warning("HTTP Request - download_profile: Unknown profile %s", name)
+        return JSONService.format(status=404, message="Unknown Profile")
+    return FileResponse(
+        profile_path, media_type="application/octet-stream", filename=f"{name}.prof")
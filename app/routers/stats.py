@@ -8,42 +8,71 @@ It provides aggregated statistics on users, including:
     - Average age of users
     - Top N oldest users
 
-The endpoint leverages the UserService singleton for in-memory
-user data and JSONService for consistent response formatting.
+The stats of many teams are returned in a single response, either for all
+the teams (`GET /stats/?group_by=team`) or for a list of teams
+(`POST /stats/batch`).
+
+The endpoints leverage the UserService singleton for the precomputed
+user statistics and JSONService for consistent response formatting.
 """
 
-from fastapi import APIRouter
-from app.services.user_service import user_service
-from app.models.user import User
+from fastapi import APIRouter, Query, Request, Response
+from app.models.stats_batch import StatsBatchRequest
+from app.services.user_service import UserService, user_service
+from app.services.user_stats import UserStats, STATS_TOP_N
 from app.services.json_service import JSONService
-from app.services.logger_service import logger_service
+from app.services.response_cache import response_cache
+from app.services.logger_service import LoggerService, logger_service, LOG_RATE_LIMIT
 
 router = APIRouter(
     prefix="/stats",
     tags=["stats"]
 )
 
+# Maximum number of oldest users of a response
+STATS_MAX_TOP_N = 1000
+STATS_GROUP_BY = ("team",)
+
+# The successful requests are counted, and logged within the rate limit
+get_stats_log = LoggerService.get_sampled_logger(
+    "http.get_stats", first_n=0, sample_every=1, max_per_second=LOG_RATE_LIMIT)
+get_stats_batch_log = LoggerService.get_sampled_logger(
+    "http.get_stats_batch", first_n=0, sample_every=1, max_per_second=LOG_RATE_LIMIT)
+
 @router.get("/")
-async def get_stats(team: str = None):
+async def get_stats(
+    request: Request,
+    team: str = None,
+    top_n: int = Query(STATS_TOP_N, ge=1, le=STATS_MAX_TOP_N),
+    group_by: str | None = None):
     """
     Retrieve aggregated user statistics, optionally filtered by team.
 
     Args:
         team (str | None): Optional team name to filter users. If None,
                            statistics are computed across all users.
+        top_n (int): Number of oldest users returned, 3 by default, at most 1000.
+                     They are read from the precomputed stats, or beyond them
+                     from the descending age order built with the users.
+        group_by (str | None): If `team`, the statistics of every team are
+                               returned in `teams`, keyed by team name,
+                               instead of the statistics of the users.
 
     Returns:
-        dict: JSON response containing the following keys:
+        Response: JSON response, encoded without the generic encoder of FastAPI
+        and cached until the users change, containing the following keys:
             - totalUsers (int): Total number of users in memory.
             - countedUsers (int): Number of users considered for statistics.
             - averageAgeOfUsers (float): Average age of considered users.
-            - oldestUsers (List[User]): Top 3 oldest users.
+            - oldestUsers (List[User]): Top `top_n` oldest users.
             - status (int): HTTP-like status code.
             - message (str): Optional status message.
 
     Behavior:
         - If no users are loaded, returns a 422 status with a warning.
+        - If `group_by` is not `team`, returns a 400 status.
         - Otherwise, returns statistics for all users or filtered by team.
+        - Returns a 304 Not Modified if the `If-None-Match` header matches the ETag.
         - Logs requests and results using LoggerService.
 
     Example Response:
@@ -61,26 +90,153 @@ async def get_stats(team: str = None):
                 ]
             }
         }
+
+    Example Grouped Response:
+        {
+            "status": 200,
+            "message": "success",
+            "data": {
+                "totalUsers": 10,
+                "teams": {
+                    "Backend": {"countedUsers": 5, "averageAgeOfUsers": 29.4, "oldestUsers": [...]},
+                    "Ops": {"countedUsers": 2, "averageAgeOfUsers": 41.0, "oldestUsers": [...]}
+                }
+            }
+        }
+    """
+    if group_by is not None and group_by not in STATS_GROUP_BY:
+        logger_service.warning("HTTP Request - get_stats: Invalid group_by %s", group_by)
+        return JSONService.response(status=400, message="Invalid Group By")
+    if group_by is not None:
+        return response_cache.get_response(
+            request, ("/stats/", "group_by", group_by, top_n), user_service.get_generation(),
+            lambda: _get_stats_by_team(None, top_n).body)
+    return response_cache.get_response(
+        request, ("/stats/", team, top_n), user_service.get_generation(),
+        lambda: _get_stats(team, top_n).body)
+
+@router.post("/batch")
+async def get_stats_batch(
+    batch: StatsBatchRequest,
+    top_n: int = Query(STATS_TOP_N, ge=1, le=STATS_MAX_TOP_N)):
+    """
+    Retrieve the statistics of many teams in one round trip.
+
+    The statistics of each team are maintained when the users are loaded,
+    so a batch reads them from the team index without scanning the users.
+
+    Args:
+        batch (StatsBatchRequest): Body with the list of `teams`, 1 to 1000.
+        top_n (int): Number of oldest users returned for each team, 3 by default.
+
+    Returns:
+        Response: JSON response containing:
+            - data.totalUsers (int): Total number of users in memory.
+            - data.teams (dict): Statistics of each team, keyed by team name, in the
+              order of the request: countedUsers, averageAgeOfUsers and oldestUsers.
+              An unknown team has no counted users.
+            - status (int): HTTP-like status code.
+            - message (str): Optional status message.
+
+    Behavior:
+        - If no users are loaded, returns a 422 status with a warning.
+        - If the body is invalid, FastAPI returns a 422 validation error.
+
+    Example Request:
+        POST /stats/batch?top_n=1
+        {"teams": ["Backend", "Ops"]}
+
+    Example Response:
+        {
+            "status": 200,
+            "message": "success",
+            "data": {
+                "totalUsers": 10,
+                "teams": {
+                    "Backend": {"countedUsers": 5, "averageAgeOfUsers": 29.4,
+                                "oldestUsers": [{"name": "Alice", "age": 45, ...}]},
+                    "Ops": {"countedUsers": 2, "averageAgeOfUsers": 41.0,
+                            "oldestUsers": [{"name": "Bob", "age": 50, ...}]}
+                }
+            }
+        }
+    """
+    return _get_stats_by_team(batch.teams, top_n)
+
+def _get_stats(team: str | None, top_n: int = STATS_TOP_N) -> Response:
+    """
+    Build the response of /stats/, without the response cache.
+
+    Args:
+        team (str | None): Optional team name to filter users.
+        top_n (int): Number of oldest users returned.
+
+    Returns:
+        Response: The JSON response.
     """
-    users : list[User] = user_service.get_adult_users()
-    total_users = len(users)
-    if len(users) == 0:
+    adult_stats : UserStats = user_service.get_adult_stats()
+    total_users = adult_stats.count
+    if total_users == 0:
         logger_service.warning("HTTP Request - get_stats: No Users Data Available")
-        return JSONService.format(
+        return JSONService.response(
             status = 422,
             data={"totalUsers": total_users},
             message="No Users Data Available"
         )
-    if team is not None :
-        users_result : list[User] = user_service.get_users_of_team_of(users, team)
-    else:
-        users_result = users
-    average_age : float = user_service.get_average_age_of(users_result)
-    oldest_users : list[User] = user_service.get_n_oldest_users(users_result, 3)
-    logger_service.info("HTTP Request - get_stats: success")
-    return JSONService.format(data={
+    users_stats : UserStats = user_service.get_adult_stats(team)
+    get_stats_log.info("HTTP Request - get_stats: success")
+    return JSONService.response(data={
+        "totalUsers": total_users,
+        **_get_stats_data(team, users_stats, top_n)
+    })
+
+def _get_stats_by_team(teams: list[str] | None, top_n: int = STATS_TOP_N) -> Response:
+    """
+    Build the response of the statistics of many teams, without the response cache.
+
+    Args:
+        teams (list[str] | None): The team names, or None for all the teams.
+        top_n (int): Number of oldest users returned for each team.
+
+    Returns:
+        Response: The JSON response.
+    """
+    total_users = user_service.get_adult_stats().count
+    if total_users == 0:
+        logger_service.warning("HTTP Request - get_stats_batch: No Users Data Available")
+        return JSONService.response(
+            status = 422,
+            data={"totalUsers": total_users},
+            message="No Users Data Available"
+        )
+    stats_by_team = user_service.get_adult_stats_by_team(teams)
+    get_stats_batch_log.info("HTTP Request - get_stats_batch: %s teams", len(stats_by_team))
+    return JSONService.response(data={
         "totalUsers": total_users,
-        "countedUsers": len(users_result),
-        "averageAgeOfUsers": average_age,
-        "oldestUsers": oldest_users
+        "teams": {
+            team: _get_stats_data(team, users_stats, top_n)
+            for team, users_stats in stats_by_team.items()
+        }
     })
+
+def _get_stats_data(team: str | None, users_stats: UserStats, top_n: int) -> dict:
+    """
+    Build the statistics of the users, or of the users of a team.
+
+    Args:
+        team (str | None): Optional team name.
+        users_stats (UserStats): The stats of the users of the team.
+        top_n (int): Number of oldest users returned.
+
+    Returns:
+        dict: The countedUsers, averageAgeOfUsers and oldestUsers.
+    """
+    if top_n <= users_stats.top_n:
+        oldest_users = users_stats.get_oldest_users(top_n)
+    else:
+        oldest_users = user_service.get_oldest_adult_users(top_n, team)
+    return {
+        "countedUsers": users_stats.count,
+        "averageAgeOfUsers": users_stats.average_age,
+        "oldestUsers": UserService.to_users(oldest_users)
+    }
@@ -4,42 +4,118 @@ users_router.py
 This module defines the /users endpoints for the application.
 
 It provides access to the list of users, optionally filtered by team,
-and supports refreshing the in-memory user data from the data source
-(UserLoader via UserService).
+supports refreshing the in-memory user data from the data source
+(UserLoader via UserService), and writing users one at a time.
 
 Endpoints:
-    /users/        - Retrieve users, optionally filtered by team.
-    /users/refresh - Reloads user data from the data source.
+    /users/        - Retrieve users, optionally filtered, sorted, paginated or streamed.
+    /users/search  - Search users by name or email, for type-ahead.
+    /users/refresh - Reloads user data from the data source, in the background.
+    /users/refresh/{refresh_id} - Retrieves the state of a reload.
+    /users/lookup  - Retrieve many users by email, in one round trip.
+    /users/{email} - Retrieve a user by email.
+    POST /users/          - Create a user.
+    PUT /users/{email}    - Create or replace the user of an email.
+    DELETE /users/{email} - Delete the user of an email.
+
+The write endpoints are plain functions, run by FastAPI in its thread pool:
+they append to the change log of the users, possibly with an fsync, and
+wait for the write lock, which would otherwise block the event loop. Their
+changes to the users are then applied on the event loop, like the reads, so
+the read endpoints never see the users being modified (see UserService).
+The streams are sent from the event loop too, one batch at a time.
 """
 
-from fastapi import APIRouter
-from app.models.user import User
-from app.services.json_service import JSONService
+from collections.abc import AsyncIterator, Callable, Sequence
+from typing import Annotated
+from fastapi import APIRouter, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic_core import to_json
+from app.models.user import User, ADULT_AGE
+from app.models.user_record import UserRecord
+from app.models.users_lookup import UsersLookupRequest
+from app.models.users_query import UsersQuery
+from app.services.json_service import JSONService, NDJSON_BATCH_SIZE
+from app.services.pagination_service import PaginationService
+from app.services.response_cache import response_cache
+from app.services.user_dataset import UserDataset, SORT_KEYS
+from app.services.user_filter import UserFilter
 from app.services.user_service import user_service
-from app.services.logger_service import logger_service
+from app.services.logger_service import LoggerService, logger_service, LOG_RATE_LIMIT
 
 router = APIRouter(
     prefix="/users",
     tags=["users"]
 )
 
+# Maximum number of ranked results of a search, over all its pages
+SEARCH_MAX_RESULTS = 1000
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+# The successful requests are counted, and logged within the rate limit
+get_users_log = LoggerService.get_sampled_logger(
+    "http.get_users", first_n=0, sample_every=1, max_per_second=LOG_RATE_LIMIT)
+search_users_log = LoggerService.get_sampled_logger(
+    "http.search_users", first_n=0, sample_every=1, max_per_second=LOG_RATE_LIMIT)
+get_user_log = LoggerService.get_sampled_logger(
+    "http.get_user", first_n=0, sample_every=1, max_per_second=LOG_RATE_LIMIT)
+lookup_users_log = LoggerService.get_sampled_logger(
+    "http.lookup_users", first_n=0, sample_every=1, max_per_second=LOG_RATE_LIMIT)
+write_user_log = LoggerService.get_sampled_logger(
+    "http.write_user", first_n=0, sample_every=1, max_per_second=LOG_RATE_LIMIT)
+refresh_users_log = LoggerService.get_sampled_logger(
+    "http.refresh_users", first_n=0, sample_every=1, max_per_second=LOG_RATE_LIMIT)
+
 @router.get("/")
-async def read_users(team : str = None):
+async def read_users(request : Request, query : Annotated[UsersQuery, Query()]):
     """
-    Retrieve a list of users, optionally filtered by team.
+    Retrieve a list of users, optionally filtered and sorted.
 
     Args:
-        team (str | None): Optional team name to filter users. If None,
-                           all users are returned.
+        query (UsersQuery): The query parameters, all optional:
+            - team (str): Team name to filter users. If no filter is
+              given, all users are returned.
+            - teams (list[str]): Team names, repeated
+              (`?teams=Backend&teams=Ops`): users of any of them,
+              or of `team`, are returned.
+            - min_age, max_age (int): Age range, inclusive.
+            - start_date_from, start_date_to (date): Start date range, inclusive.
+            - name_prefix (str): Prefix of the names (case-sensitive).
+            - email_prefix (str): Prefix of the emails (case-sensitive).
+            - limit (int): Maximum number of users per page.
+            - cursor (str): Cursor of the page, returned as
+              `nextCursor` with the previous page. The page starts after
+              the last user of the previous one, so the users written
+              in the meantime do not shift the pages. The cursors are
+              invalid once the users are reloaded.
+            - sort (str): Sort order: `age`, `start_date` or `name`,
+              prefixed by `-` for the descending order (e.g. `-age`).
+              Users with equal keys keep their original order.
+            - stream (bool): If True, the users are streamed as NDJSON
+              (one user per line), without the response envelope.
+
+    The users are served from their JSON encoding, pre-encoded when
+    they were loaded. The sort orders are built once per reload of the
+    users, so a sorted page is a slice instead of a sort per request.
+    The filters are answered from the most selective index first (the team
+    index, or a range of the age, start date or name sort orders), and the
+    other criteria are checked on its candidates only. The responses are
+    cached until the users change, with an ETag: a request with a matching
+    `If-None-Match` header gets a 304 Not Modified.
 
     Returns:
-        dict: JSON response containing:
+        Response: JSON response (or 304 Not Modified) containing:
             - data (List[User]): List of users (optionally filtered by team)
+              or, if `limit` or `cursor` is given, an object with the page
+              of `users` and the `nextCursor` (null on the last page)
             - status (int): HTTP-like status code
             - message (str): Status message
 
     Behavior:
         - If no users are loaded, returns status 422 with a warning.
+        - If the cursor is invalid, or the users were reloaded since, returns status 400.
+        - If the sort order is invalid, returns status 400.
         - Logs request and success using LoggerService.
 
     Example Response:
@@ -51,36 +127,474 @@ async def read_users(team : str = None):
                 {"name": "Bob", "age": 25, "team": "Frontend", ...}
             ]
         }
+
+    Example Paginated Response:
+        {
+            "status": 200,
+            "message": "Getting Users Data",
+            "data": {
+                "users": [{"name": "Alice", "age": 30, "team": "Backend", ...}],
+                "nextCursor": "eyJnIjoiMSIsImsiOjMwLCJzIjowfQ=="
+            }
+        }
     """
-    users : list[User] = user_service.get_adult_users()
-    if len(users) == 0:
-        logger_service.warning("HTTP Request - get_stats: No Users Data Available")
-        return JSONService.format(status=422, message="No Users Data Available")
-    if team is not None :
-        users_result : list[User] = user_service.get_users_of_team_of(users, team)
-    else:
-        users_result = users
-    logger_service.info("HTTP Request - get_users : success")
-    return JSONService.format(data=users_result, message="Getting Users Data")
+    user_filter = UserFilter.from_query(query)
+    if query.stream:
+        return _read_users(user_filter, query.limit, query.cursor, query.sort, stream=True)
+    return response_cache.get_response(
+        request, ("/users/", user_filter.get_key(), query.limit, query.cursor, query.sort),
+        user_service.get_generation(),
+        lambda: _read_users(user_filter, query.limit, query.cursor, query.sort).body)
+
+def _read_users(
+    user_filter : UserFilter,
+    limit : int | None,
+    cursor : str | None,
+    sort : str | None = None,
+    stream : bool = False) -> Response:
+    """
+    Build the response of /users/, without the response cache.
+
+    Args:
+        user_filter (UserFilter): The filter of the users, possibly empty.
+        limit (int | None): Optional maximum number of users per page.
+        cursor (str | None): Optional cursor of the page.
+        sort (str | None): Optional sort order.
+        stream (bool): If True, the users are streamed as NDJSON.
+
+    Returns:
+        Response: The JSON response, or the NDJSON streaming response.
+    """
+    if user_service.get_adult_stats().count == 0:
+        logger_service.warning("HTTP Request - get_users: No Users Data Available")
+        return JSONService.response(status=422, message="No Users Data Available")
+    team = user_filter.get_single_team()
+    # Read before the users: a cursor of a dataset replaced meanwhile is rejected
+    dataset_generation = user_service.get_dataset_generation()
+    try:
+        if not user_filter.is_empty() and team is None:
+            users_result = user_service.filter_adult_users(user_filter, sort)
+        elif sort is not None:
+            users_result = user_service.get_sorted_adult_users(sort, team)
+        elif team is not None:
+            users_result = user_service.get_adult_users_of_team(team)
+        else:
+            users_result = user_service.get_adult_users()
+    except ValueError as e:
+        logger_service.warning("HTTP Request - get_users: %s", e)
+        return JSONService.response(status=400, message="Invalid Sort")
+    field, descending = UserDataset.parse_sort(sort) if sort is not None else (None, False)
+    get_key = SORT_KEYS[field] if field is not None else None
+    paginated = limit is not None or cursor is not None
+    if paginated:
+        try:
+            users_result, next_cursor = PaginationService.paginate_by_key(
+                users_result, dataset_generation, limit, cursor, get_key, descending)
+        except ValueError as e:
+            logger_service.warning("HTTP Request - get_users: %s", e)
+            return JSONService.response(status=400, message="Invalid Cursor")
+    get_users_log.info("HTTP Request - get_users : success")
+    if stream:
+        return StreamingResponse(
+            _stream_users(users_result, get_key, descending), media_type="application/x-ndjson")
+    encoded_data = JSONService.encode_array(user_service.get_encoded_users(users_result))
+    if paginated:
+        encoded_data = JSONService.encode_object(
+            {"users": encoded_data, "nextCursor": to_json(next_cursor)})
+    return JSONService.response(encoded_data=encoded_data, message="Getting Users Data")
+
+async def _stream_users(
+    users_result : Sequence[UserRecord],
+    get_key : Callable[[UserRecord], object] | None,
+    descending : bool) -> AsyncIterator[bytes]:
+    """
+    Stream users as NDJSON from the event loop, encoding one batch at a time.
+
+    The users can be a view of the dataset, changed by the writes between two
+    batches: like a key cursor, each batch starts after the sort key and the
+    sequence of the last user sent, so the writes do not make the stream skip
+    or repeat users.
+
+    Args:
+        users_result (Sequence[UserRecord]): The users, in the order of the sort.
+        get_key (Callable[[UserRecord], object] | None): Sort key of the users,
+            or None if they are in their original order.
+        descending (bool): Whether the users are sorted by decreasing key.
+
+    Yields:
+        bytes: The NDJSON lines of the next batch of users.
+    """
+    start = 0
+    while start < len(users_result):
+        batch = users_result[start:start + NDJSON_BATCH_SIZE]
+        for chunk in JSONService.stream_ndjson(user_service.iter_encoded_users(batch)):
+            yield chunk
+        last_user = batch[-1]
+        start = PaginationService.bisect_after(
+            users_result, get_key(last_user) if get_key is not None else None, last_user.seq,
+            get_key, descending)
+
+@router.get("/search")
+async def search_users(
+    request : Request,
+    q : str = Query(min_length=1, max_length=100),
+    limit : int = Query(SEARCH_DEFAULT_LIMIT, ge=1, le=SEARCH_MAX_LIMIT),
+    cursor : str | None = None):
+    """
+    Search users by name or email, for type-ahead.
+
+    Args:
+        q (str): The query, matched case-insensitively against the start of
+                 each word of the names, the start of the emails, and from
+                 3 characters, any substring of the names and emails.
+        limit (int): Maximum number of users of the page, 20 by default, at most 100.
+        cursor (str | None): Optional cursor of the page, returned as
+                             `nextCursor` with the previous page.
+
+    The search uses the index built when the users are loaded: a sorted
+    index of the words and emails for the prefixes, and a trigram index
+    for the substrings. It stops once the users of the page are found,
+    so its cost does not depend on the number of users.
+
+    Returns:
+        Response: JSON response (or 304 Not Modified) containing:
+            - data.users (List[User]): The page of matching users, ranked: exact
+              matches, then prefix matches, then substring matches
+            - data.nextCursor (str | None): Cursor of the next page, null on the
+              last page. At most 1000 results are paginated.
+            - status (int): HTTP-like status code
+            - message (str): Status message
+
+    Behavior:
+        - If no users are loaded, returns status 422 with a warning.
+        - If the cursor is invalid, returns status 400.
+
+    Example Response:
+        {
+            "status": 200,
+            "message": "Searching Users Data",
+            "data": {
+                "users": [{"name": "Alice", "email": "alice@example.com", ...}],
+                "nextCursor": null
+            }
+        }
+    """
+    return response_cache.get_response(
+        request, ("/users/search", q, limit, cursor), user_service.get_generation(),
+        lambda: _search_users(q, limit, cursor).body)
+
+def _search_users(q : str, limit : int, cursor : str | None) -> Response:
+    """
+    Build the response of /users/search, without the response cache.
+
+    Args:
+        q (str): The query.
+        limit (int): Maximum number of users of the page.
+        cursor (str | None): Optional cursor of the page.
+
+    Returns:
+        Response: The JSON response.
+    """
+    if user_service.get_adult_stats().count == 0:
+        logger_service.warning("HTTP Request - search_users: No Users Data Available")
+        return JSONService.response(status=422, message="No Users Data Available")
+    try:
+        start = PaginationService.decode_cursor(cursor) if cursor is not None else 0
+    except ValueError as e:
+        logger_service.warning("HTTP Request - search_users: %s", e)
+        return JSONService.response(status=400, message="Invalid Cursor")
+    # One more result than the page tells whether there is a next page
+    max_results = min(start + limit + 1, SEARCH_MAX_RESULTS)
+    users_result = user_service.search_adult_users(q, max_results)
+    page, next_cursor = PaginationService.paginate(users_result, limit, cursor)
+    search_users_log.info("HTTP Request - search_users : success")
+    encoded_data = JSONService.encode_object({
+        "users": user_service.encode_users(page),
+        "nextCursor": to_json(next_cursor)})
+    return JSONService.response(encoded_data=encoded_data, message="Searching Users Data")
 
 @router.get("/refresh")
 async def refresh_users():
     """
-    Refresh the in-memory user data by reloading from the data source.
+    Request a reload of the in-memory user data from the data source.
+
+    The reload runs in a background thread, so the event loop is not blocked.
+    Concurrent requests are coalesced into a single pending reload.
 
     Returns:
-        dict: JSON response indicating that user data has been refreshed.
+        dict: JSON response containing:
+            - data.refreshId (int): Id of the reload, to poll with /users/refresh/{refreshId}
+            - data.state (str): "pending", "running" or "done"
 
     Behavior:
-        - Calls UserService.refresh_users_data to reload users from the CSV.
+        - Calls UserService.request_refresh to reload users from the CSV.
         - Logs the refresh action using LoggerService.
 
     Example Response:
         {
             "status": 200,
-            "message": "Refreshing Users Data"
+            "message": "Refreshing Users Data",
+            "data": {"refreshId": 3, "state": "running"}
+        }
+    """
+    refresh_id = user_service.request_refresh()
+    refresh_users_log.info("HTTP Request - Refreshing Users Data : success")
+    return JSONService.format(
+        data={"refreshId": refresh_id, "state": user_service.get_refresh_status(refresh_id)},
+        message="Refreshing Users Data")
+
+@router.get("/refresh/{refresh_id}")
+async def get_refresh_status(refresh_id : int):
+    """
+    Retrieve the state of a reload requested with /users/refresh.
+
+    Args:
+        refresh_id (int): Id of the reload.
+
+    Returns:
+        dict: JSON response containing:
+            - data.refreshId (int): Id of the reload
+            - data.state (str): "pending", "running", "done" or "failed"
+            - data.generation (int): Generation of the dataset currently served
+            - data.error (str): Error of the reload, if it failed
+
+    Behavior:
+        - If the id is unknown, returns status 404.
+
+    Example Response:
+        {
+            "status": 200,
+            "message": "success",
+            "data": {"refreshId": 3, "state": "done", "generation": 4}
+        }
+    """
+    state = user_service.get_refresh_status(refresh_id)
+    if state is None:
+        logger_service.warning("HTTP Request - get_refresh_status: Unknown refresh %s", refresh_id)
+        return JSONService.format(status=404, message="Unknown Refresh")
+    data = {"refreshId": refresh_id, "state": state, "generation": user_service.generation}
+    if state == "failed":
+        data["error"] = user_service.get_refresh_error(refresh_id)
+    return JSONService.format(data=data)
+
+@router.post("/lookup")
+async def lookup_users(lookup : UsersLookupRequest):
+    """
+    Retrieve many users by email, in one round trip.
+
+    Each email is a lookup in the email index built when the users are loaded.
+
+    Args:
+        lookup (UsersLookupRequest): Body with the list of `emails`, 1 to 1000,
+                                     case-insensitive.
+
+    Returns:
+        Response: JSON response containing:
+            - data.users (List[User]): The adult users found, in the order of the emails
+            - data.notFound (List[str]): The emails without an adult user
+            - status (int): HTTP-like status code
+            - message (str): Status message
+
+    Behavior:
+        - If no users are loaded, returns status 422 with a warning.
+        - If the body is invalid, FastAPI returns a 422 validation error.
+
+    Example Request:
+        POST /users/lookup
+        {"emails": ["alice@example.com", "nobody@example.com"]}
+
+    Example Response:
+        {
+            "status": 200,
+            "message": "Getting Users Data",
+            "data": {
+                "users": [{"name": "Alice", "email": "alice@example.com", ...}],
+                "notFound": ["nobody@example.com"]
+            }
+        }
+    """
+    if user_service.get_adult_stats().count == 0:
+        logger_service.warning("HTTP Request - lookup_users: No Users Data Available")
+        return JSONService.response(status=422, message="No Users Data Available")
+    users_result = []
+    not_found = []
+    for email in dict.fromkeys(lookup.emails):
+        user = user_service.get_user_by_email(email)
+        if user is None or user.age < ADULT_AGE:
+            not_found.append(email)
+        else:
+            users_result.append(user)
+    lookup_users_log.info("HTTP Request - lookup_users : success")
+    encoded_data = JSONService.encode_object({
+        "users": user_service.encode_users(users_result),
+        "notFound": to_json(not_found)})
+    return JSONService.response(encoded_data=encoded_data, message="Getting Users Data")
+
+@router.get("/{email}")
+async def read_user(email : str):
+    """
+    Retrieve a user by email.
+
+    The user is read from the email index built when the users are loaded,
+    instead of transferring the list of users.
+
+    Args:
+        email (str): The email of the user, case-insensitive.
+
+    Returns:
+        Response: JSON response containing:
+            - data (User): The user
+            - status (int): HTTP-like status code
+            - message (str): Status message
+
+    Behavior:
+        - If no users are loaded, returns status 422 with a warning.
+        - If no adult user has this email, returns status 404.
+
+    Example Response:
+        {
+            "status": 200,
+            "message": "Getting User Data",
+            "data": {"name": "Alice", "email": "alice@example.com", "age": 30, ...}
+        }
+    """
+    if user_service.get_adult_stats().count == 0:
+        logger_service.warning("HTTP Request - get_user: No Users Data Available")
+        return JSONService.response(status=422, message="No Users Data Available")
+    user = user_service.get_user_by_email(email)
+    if user is None or user.age < ADULT_AGE:
+        logger_service.warning("HTTP Request - get_user: Unknown user %s", email)
+        return JSONService.response(status=404, message="Unknown User")
+    get_user_log.info("HTTP Request - get_user : success")
+    return JSONService.response(
+        encoded_data=user_service.get_encoded_users([user])[0], message="Getting User Data")
+
+@router.post("/")
+def create_user(user : User):
+    """
+    Create a user.
+
+    The user is validated by the `User` model, logged in the change log of
+    the users, and added to the in-memory indexes and stats incrementally,
+    without reloading the users.
+
+    Args:
+        user (User): The user, in the request body.
+
+    Returns:
+        Response: JSON response containing:
+            - data (User): The created user
+            - status (int): HTTP-like status code
+            - message (str): Status message
+
+    Behavior:
+        - If a user already has this email (case-insensitive), returns status 409.
+        - If the users are read-only (shared dataset), returns status 409.
+        - If the change cannot be persisted, returns status 503 and nothing changes.
+
+    Example Response:
+        {
+            "status": 201,
+            "message": "User Created",
+            "data": {"name": "Alice", "email": "alice@example.com", "age": 30, ...}
+        }
+    """
+    try:
+        created = user_service.create_user(user)
+    except RuntimeError as e:
+        logger_service.warning("HTTP Request - create_user: %s", e)
+        return JSONService.response(status=409, message="Users Data Is Read-Only")
+    except OSError as e:
+        logger_service.error("HTTP Request - create_user: Change not persisted: %s", e)
+        return JSONService.response(status=503, message="User Change Not Persisted")
+    if not created:
+        logger_service.warning("HTTP Request - create_user: User already exists %s", user.email)
+        return JSONService.response(status=409, message="User Already Exists")
+    write_user_log.info("HTTP Request - create_user : success")
+    return JSONService.response(encoded_data=to_json(user), status=201, message="User Created")
+
+@router.put("/{email}")
+def upsert_user(email : str, user : User):
+    """
+    Create or replace the user of an email.
+
+    A replaced user keeps its place in the original order of the users.
+    The indexes, sort orders and stats are updated incrementally, without
+    reloading the users.
+
+    Args:
+        email (str): The email of the user, case-insensitive.
+        user (User): The user, in the request body, with the same email.
+
+    Returns:
+        Response: JSON response containing:
+            - data (User): The created or replaced user
+            - status (int): HTTP-like status code
+            - message (str): Status message
+
+    Behavior:
+        - If the email of the body is not the email of the path, returns status 400.
+        - If the users are read-only (shared dataset), returns status 409.
+        - If the change cannot be persisted, returns status 503 and nothing changes.
+        - Returns status 201 if the user was created, 200 if it was replaced.
+
+    Example Response:
+        {
+            "status": 200,
+            "message": "User Updated",
+            "data": {"name": "Alice", "email": "alice@example.com", "age": 31, ...}
+        }
+    """
+    if user.email.lower() != email.lower():
+        logger_service.warning("HTTP Request - upsert_user: Email mismatch %s", email)
+        return JSONService.response(status=400, message="Email Mismatch")
+    try:
+        created = user_service.upsert_user(user)
+    except RuntimeError as e:
+        logger_service.warning("HTTP Request - upsert_user: %s", e)
+        return JSONService.response(status=409, message="Users Data Is Read-Only")
+    except OSError as e:
+        logger_service.error("HTTP Request - upsert_user: Change not persisted: %s", e)
+        return JSONService.response(status=503, message="User Change Not Persisted")
+    write_user_log.info("HTTP Request - upsert_user : success")
+    if created:
+        return JSONService.response(encoded_data=to_json(user), status=201, message="User Created")
+    return JSONService.response(encoded_data=to_json(user), message="User Updated")
+
+@router.delete("/{email}")
+def delete_user(email : str):
+    """
+    Delete the user of an email.
+
+    Args:
+        email (str): The email of the user, case-insensitive.
+
+    Returns:
+        dict: JSON response containing:
+            - status (int): HTTP-like status code
+            - message (str): Status message
+
+    Behavior:
+        - If no user has this email, returns status 404.
+        - If the users are read-only (shared dataset), returns status 409.
+        - If the change cannot be persisted, returns status 503 and nothing changes.
+
+    Example Response:
+        {
+            "status": 200,
+            "message": "User Deleted"
         }
     """
-    logger_service.info("HTTP Request - Refreshing Users Data : success")
-    user_service.refresh_users_data()
-    return JSONService.format(message="Refreshing Users Data")
+    try:
+        deleted = user_service.delete_user(email)
+    except RuntimeError as e:
+        logger_service.warning("HTTP Request - delete_user: %s", e)
+        return JSONService.response(status=409, message="Users Data Is Read-Only")
+    except OSError as e:
+        logger_service.error("HTTP Request - delete_user: Change not persisted: %s", e)
+        return JSONService.response(status=503, message="User Change Not Persisted")
+    if not deleted:
+        logger_service.warning("HTTP Request - delete_user: Unknown user %s", email)
+        return JSONService.response(status=404, message="Unknown User")
+    write_user_log.info("HTTP Request - delete_user : success")
+    return JSONService.response(message="User Deleted")
@@ -0,0 +1,256 @@
+"""_block_list.py_
+
+This module provides the BlockList class, an ordered list of values stored
+as a list of bounded blocks, like the `SortedList` of sortedcontainers.
+
+Inserting or deleting a value in a Python list shifts all the values after
+it. In a BlockList, it only shifts the values of one block, at most
+`2 * BLOCK_SIZE` of them, after the block was found by bisection over the
+last value of each block. The start position of each block, needed by the
+positional reads only, is recomputed on the first positional read after an
+insert or a delete, in a single C-level pass over the block lengths. An
+append does not move any block, so it keeps the start positions.
+
+The blocks are lists by default, or any mutable sequence type given as
+`block_type`, such as `array`, to store integers compactly.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections.abc import Callable, Iterable, Iterator, MutableSequence, Sequence
+from itertools import accumulate, chain, islice
+
+BLOCK_SIZE = 1000
+
+class BlockList(Sequence):
+    """_Ordered list of values, stored as bounded blocks._
+
+    The values are inserted and removed at the place given by a predicate
+    `is_before(other)`, True for the values before the place: it must be
+    True for a prefix of the list, then False.
+
+    Attributes:
+        block_size (int): Number of values of the blocks filled by appends.
+            A block is split once it holds twice as many values.
+        block_type (Callable[[Iterable], MutableSequence]): Builds a block from its values.
+
+    Example:
+        >>> users = BlockList(users_data)
+        >>> users.insert_sorted(user, lambda other: other.seq < user.seq)
+        >>> users[10:20]
+    """
+    __slots__ = ("block_size", "block_type", "_blocks", "_len", "_starts")
+    def __init__(
+        self,
+        values : Iterable = (),
+        block_size : int = BLOCK_SIZE,
+        block_type : Callable[[Iterable], MutableSequence] = list):
+        """_Initializes the list with values, in their order._
+
+        Args:
+            values (Iterable): Optional initial values.
+            block_size (int): Number of values per block. Defaults to `BLOCK_SIZE`.
+            block_type (Callable[[Iterable], MutableSequence]): Builds a block from
+                its values. Defaults to `list`.
+
+        Example:
+            >>> positions = BlockList(positions_data, block_type=partial(array, "I"))
+        """
+        self.block_size = block_size
+        self.block_type = block_type
+        self._blocks : list[MutableSequence] = []
+        self._len = 0
+        self._starts : list[int] | None = None
+        self.extend(values)
+    def __len__(self) -> int:
+        """_Returns the number of values._"""
+        return self._len
+    def __iter__(self) -> Iterator:
+        """_Iterates over the values, in order._"""
+        return chain.from_iterable(self._blocks)
+    def __reversed__(self) -> Iterator:
+        """_Iterates over the values, in reverse order._"""
+        return chain.from_iterable(map(reversed, reversed(self._blocks)))
+    def __eq__(self, other) -> bool:
+        """_Compares the values with those of a list or of another BlockList, in order._"""
+        if not isinstance(other, (list, BlockList)):
+            return NotImplemented
+        return len(self) == len(other) and all(
+            value == other_value for value, other_value in zip(self, other))
+    __hash__ = None
+    def __getitem__(self, index):
+        """_Returns the value at a position, or the list of the values of a slice._"""
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._len)
+            if step != 1:
+                return list(self)[index]
+            return self._get_range(start, stop)
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("BlockList index out of range")
+        last_block = self._blocks[-1]
+        last_start = self._len - len(last_block)
+        if index >= last_start:
+            return last_block[index - last_start]
+        i_block, offset = self._locate(index)
+        return self._blocks[i_block][offset]
+    def __delitem__(self, index : int) -> None:
+        """_Removes the value at a position._"""
+        self.pop(index)
+    def pop(self, index : int = -1):
+        """_Removes the value at a position, and returns it._
+
+        Raises:
+            IndexError: If the position is out of range.
+        """
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError("BlockList index out of range")
+        i_block, offset = self._locate(index)
+        value = self._blocks[i_block][offset]
+        self._delete(i_block, offset)
+        return value
+    def _get_starts(self) -> list[int]:
+        """_Returns the position of the first value of each block, recomputed if needed._"""
+        if self._starts is None:
+            blocks = self._blocks
+            self._starts = list(accumulate(map(len, islice(blocks, len(blocks) - 1)), initial=0))
+        return self._starts
+    def _locate(self, index : int) -> tuple[int, int]:
+        """_Returns the block of a position, and the offset of the position in the block._"""
+        starts = self._get_starts()
+        i_block = bisect_right(starts, index) - 1
+        return i_block, index - starts[i_block]
+    def _get_range(self, start : int, stop : int) -> list:
+        """_Returns the list of the values from a position to another one, excluded._"""
+        values : list = []
+        if start >= stop:
+            return values
+        i_block, offset = self._locate(start)
+        nb_values = stop - start
+        for block in islice(self._blocks, i_block, None):
+            values.extend(block[offset:offset + nb_values - len(values)])
+            if len(values) == nb_values:
+                break
+            offset = 0
+        return values
+    def iter_range(self, start : int, stop : int) -> Iterator:
+        """_Iterates over the values from a position to another one, excluded._
+
+        Args:
+            start (int): The first position.
+            stop (int): The position after the last one.
+        """
+        if start >= stop:
+            return iter(())
+        i_block, offset = self._locate(start)
+        values = chain(
+            islice(self._blocks[i_block], offset, None),
+            chain.from_iterable(islice(self._blocks, i_block + 1, None)))
+        return islice(values, stop - start)
+    def append(self, value) -> None:
+        """_Appends a value at the end of the list._"""
+        blocks = self._blocks
+        if blocks and len(blocks[-1]) < self.block_size:
+            blocks[-1].append(value)
+        else:
+            if blocks and self._starts is not None:
+                self._starts.append(self._len)
+            blocks.append(self.block_type((value,)))
+        self._len += 1
+    def extend(self, values : Iterable) -> None:
+        """_Appends values at the end of the list, in order._"""
+        values = list(values)
+        if not values:
+            return
+        blocks = self._blocks
+        block_size = self.block_size
+        block_type = self.block_type
+        start = 0
+        if blocks and len(blocks[-1]) < block_size:
+            start = block_size - len(blocks[-1])
+            blocks[-1].extend(values[:start])
+        new_blocks = (values[i:i + block_size] for i in range(start, len(values), block_size))
+        # The slices of the values are already lists
+        blocks.extend(new_blocks if block_type is list else map(block_type, new_blocks))
+        self._len += len(values)
+        self._starts = None
+    def _bisect_blocks(self, is_before : Callable[[object], bool]) -> tuple[int, int]:
+        """_Returns the block and the offset of the first value not before a place._
+
+        Returns:
+            tuple[int, int]: The block, and the offset in the block, or
+            (number of blocks, 0) if all the values are before the place.
+        """
+        blocks = self._blocks
+        i_block = bisect_left(blocks, True, key=lambda block: not is_before(block[-1]))
+        if i_block == len(blocks):
+            return i_block, 0
+        offset = bisect_left(blocks[i_block], True, key=lambda value: not is_before(value))
+        return i_block, offset
+    def bisect(self, is_before : Callable[[object], bool]) -> int:
+        """_Returns the position of the first value not before a place._
+
+        Args:
+            is_before (Callable[[object], bool]): Returns True for the values before the place.
+
+        Returns:
+            int: The position, the length of the list if all the values are before the place.
+        """
+        i_block, offset = self._bisect_blocks(is_before)
+        if i_block == len(self._blocks):
+            return self._len
+        return self._get_starts()[i_block] + offset
+    def insert_sorted(self, value, is_before : Callable[[object], bool]) -> None:
+        """_Inserts a value before the first value not before it._
+
+        Args:
+            value (object): The value to insert.
+            is_before (Callable[[object], bool]): Returns True for the values before it.
+        """
+        blocks = self._blocks
+        if not blocks or is_before(blocks[-1][-1]):
+            self.append(value)
+            return
+        i_block, offset = self._bisect_blocks(is_before)
+        block = blocks[i_block]
+        block.insert(offset, value)
+        self._len += 1
+        if len(block) > 2 * self.block_size:
+            blocks[i_block:i_block + 1] = [block[:self.block_size], block[self.block_size:]]
+        self._starts = None
+    def remove_sorted(self, value, is_before : Callable[[object], bool]) -> bool:
+        """_Removes a value, found by bisection, and compared by equality._
+
+        The records of the users compare by identity, so only the given record
+        is removed, not an equal one.
+
+        Args:
+            value (object): The value to remove.
+            is_before (Callable[[object], bool]): Returns True for the values before it.
+
+        Returns:
+            bool: True if the value was removed, False if it is not in the list.
+        """
+        i_block, offset = self._bisect_blocks(is_before)
+        blocks = self._blocks
+        if (i_block == len(blocks) or offset == len(blocks[i_block])
+                or blocks[i_block][offset] != value):
+            return False
+        self._delete(i_block, offset)
+        return True
+    def _delete(self, i_block : int, offset : int) -> None:
+        """_Removes the value at an offset of a block, merging the block if it gets small._"""
+        blocks = self._blocks
+        block = blocks[i_block]
+        del block[offset]
+        self._len -= 1
+        self._starts = None
+        if not block:
+            del blocks[i_block]
+        elif len(block) < self.block_size // 2 and i_block + 1 < len(blocks):
+            # A small block is merged into the next one, split back if too large
+            block.extend(blocks.pop(i_block + 1))
+            if len(block) > 2 * self.block_size:
+                blocks[i_block:i_block + 1] = [block[:self.block_size], block[self.block_size:]]
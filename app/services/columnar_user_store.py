@@ -0,0 +1,409 @@
+"""_columnar_user_store.py_
+
+This module provides the ColumnarUserStore class, an optional NumPy-backed
+columnar representation of the users. Each attribute of the users is stored
+in its own array, so filters and aggregates are vectorized operations over
+contiguous memory instead of per-object Python loops.
+
+The string columns are stored as codes into a sorted dictionary of their
+distinct values (see `StringColumn`), so they can be compared, sorted and
+filtered as integers, and saved and memory-mapped as plain NumPy arrays.
+
+NumPy is an optional dependency: the store can only be built if it is installed.
+"""
+# pylint: disable=too-many-arguments,too-many-positional-arguments
+
+from bisect import bisect_left, bisect_right
+from app.models.user import User, ADULT_AGE
+from app.models.user_record import UserRecord
+from app.services.user_filter import UserFilter, PREFIX_UPPER_BOUND
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+class StringColumn:
+    """_Column of strings, stored as codes into a sorted dictionary of its distinct values._
+
+    The dictionary is a single buffer of UTF-8 bytes and the offsets of each
+    value in it, so a column takes 4 bytes per row plus the size of its distinct
+    values, instead of 4 bytes per character of its longest value for each row.
+    The dictionary is sorted, and UTF-8 bytes sort like the code points of the
+    strings, so the codes compare like the values: sorts and range filters
+    work on the codes.
+
+    Attributes:
+        codes (np.ndarray): Index of the value of each row in the dictionary (int32).
+        offsets (np.ndarray): Offset of each value of the dictionary in `buffer`,
+            followed by the size of `buffer` (int64).
+        buffer (np.ndarray): UTF-8 bytes of the values of the dictionary, in order (uint8).
+
+    Example:
+        >>> names = StringColumn.from_strings(["Bob", "Alice", "Bob"])
+        >>> names.codes
+        array([1, 0, 1], dtype=int32)
+        >>> names.get_values(np.array([2, 1]))
+        ['Bob', 'Alice']
+    """
+    def __init__(self, codes, offsets, buffer):
+        """_Initializes the column from its arrays._
+
+        Args:
+            codes (np.ndarray): Index of the value of each row in the dictionary.
+            offsets (np.ndarray): Offsets of the values in `buffer`, followed by its size.
+            buffer (np.ndarray): UTF-8 bytes of the values of the dictionary.
+        """
+        self.codes = codes
+        self.offsets = offsets
+        self.buffer = buffer
+    @staticmethod
+    def from_strings(values : list[str]) -> "StringColumn":
+        """_Builds a column from its values._
+
+        Args:
+            values (list[str]): The value of each row.
+
+        Returns:
+            StringColumn: The column.
+        """
+        dictionary = sorted(set(values))
+        codes_by_value = {value: code for code, value in enumerate(dictionary)}
+        encoded_values = [value.encode("utf-8") for value in dictionary]
+        offsets = np.zeros(len(encoded_values) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded_values], out=offsets[1:])
+        return StringColumn(
+            codes=np.fromiter((codes_by_value[value] for value in values),
+                              dtype=np.int32, count=len(values)),
+            offsets=offsets,
+            buffer=np.frombuffer(b"".join(encoded_values), dtype=np.uint8))
+    def __len__(self) -> int:
+        """_Number of rows of the column._"""
+        return len(self.codes)
+    def __getitem__(self, row : int) -> str:
+        """_Returns the value of a row._"""
+        return self.get_value(int(self.codes[row]))
+    def get_value(self, code : int) -> str:
+        """_Returns the value of a code of the dictionary._"""
+        start, end = self.offsets[code], self.offsets[code + 1]
+        return self.buffer[start:end].tobytes().decode("utf-8")
+    def get_values(self, rows) -> list[str]:
+        """_Returns the values of rows._
+
+        Args:
+            rows (np.ndarray): The rows.
+
+        Returns:
+            list[str]: The value of each row, in the order of the rows.
+        """
+        return [self.get_value(code) for code in self.codes[rows].tolist()]
+    def get_lower_code(self, value : str) -> int:
+        """_Returns the first code of the dictionary whose value is >= value._"""
+        return bisect_left(range(len(self.offsets) - 1), value, key=self.get_value)
+    def get_upper_code(self, value : str) -> int:
+        """_Returns the first code of the dictionary whose value is > value._"""
+        return bisect_right(range(len(self.offsets) - 1), value, key=self.get_value)
+    def get_prefix_mask(self, rows, prefix : str):
+        """_Returns the mask of the rows whose value starts with a prefix._
+
+        The values starting with the prefix are a range of the sorted dictionary.
+
+        Args:
+            rows (np.ndarray): The rows to check.
+            prefix (str): The prefix, case-sensitive.
+
+        Returns:
+            np.ndarray: True for each row whose value starts with the prefix.
+        """
+        codes = self.codes[rows]
+        return ((codes >= self.get_lower_code(prefix))
+                & (codes < self.get_lower_code(prefix + PREFIX_UPPER_BOUND)))
+
+class ColumnarUserStore:
+    """_Columnar, NumPy-backed store of users._
+
+    Ages are stored as an integer array, teams as categorical codes pointing to
+    the list of team names, and names, emails and start dates as string
+    columns. Every operation works on arrays of row numbers, so that
+    filters can be chained without building intermediate lists of users.
+    Rows are only converted back to `User` objects by `to_users`, or to
+    `UserRecord` objects by `to_records`.
+
+    Attributes:
+        ages (np.ndarray): Ages of the users (int32).
+        team_codes (np.ndarray): Index of the team of each user in `teams` (int32).
+        teams (list[str]): Team names, indexed by team code.
+        names (StringColumn): Names of the users.
+        emails (StringColumn): Emails of the users.
+        start_dates (StringColumn): Start dates of the users, in YYYY-MM-DD format.
+
+    Example:
+        >>> store = ColumnarUserStore.from_users(user_service.get_users())
+        >>> rows = store.get_users_of_team_of(store.get_adult_users_of(), "Backend")
+        >>> store.get_average_age_of(rows)
+        >>> store.to_users(store.get_n_oldest_users(rows, 3))
+    """
+    def __init__(
+        self,
+        ages,
+        team_codes,
+        teams : list[str],
+        names : StringColumn,
+        emails : StringColumn,
+        start_dates : StringColumn):
+        """_Initializes the store from its columns._
+
+        Args:
+            ages (np.ndarray): Ages of the users.
+            team_codes (np.ndarray): Team code of each user.
+            teams (list[str]): Team names, indexed by team code.
+            names (StringColumn): Names of the users.
+            emails (StringColumn): Emails of the users.
+            start_dates (StringColumn): Start dates of the users.
+
+        Raises:
+            RuntimeError: If NumPy is not installed.
+        """
+        if np is None:
+            raise RuntimeError("The columnar user store requires NumPy to be installed")
+        self.ages = ages
+        self.team_codes = team_codes
+        self.teams = teams
+        self._team_codes_by_name = {team: code for code, team in enumerate(teams)}
+        self.names = names
+        self.emails = emails
+        self.start_dates = start_dates
+    @staticmethod
+    def from_users(users_data : list[User]) -> "ColumnarUserStore":
+        """_Builds a columnar store from a list of users._
+
+        Args:
+            users_data (list[User]): The users to store, in their original order.
+
+        Returns:
+            ColumnarUserStore: The columnar store of the users.
+
+        Raises:
+            RuntimeError: If NumPy is not installed.
+        """
+        if np is None:
+            raise RuntimeError("The columnar user store requires NumPy to be installed")
+        team_codes_by_name : dict[str, int] = {}
+        team_codes = np.fromiter(
+            (team_codes_by_name.setdefault(user.team, len(team_codes_by_name))
+             for user in users_data),
+            dtype=np.int32, count=len(users_data))
+        return ColumnarUserStore(
+            ages=np.fromiter((user.age for user in users_data),
+                             dtype=np.int32, count=len(users_data)),
+            team_codes=team_codes,
+            teams=list(team_codes_by_name),
+            names=StringColumn.from_strings([user.name for user in users_data]),
+            emails=StringColumn.from_strings([user.email for user in users_data]),
+            start_dates=StringColumn.from_strings([user.start_date for user in users_data]))
+    def __len__(self) -> int:
+        """_Number of users in the store._"""
+        return len(self.ages)
+    def get_team_code(self, team : str) -> int | None:
+        """_Returns the categorical code of a team._
+
+        Args:
+            team (str): The team name.
+
+        Returns:
+            int | None: The code of the team, or None if the team is unknown.
+        """
+        return self._team_codes_by_name.get(team)
+    def get_rows(self):
+        """_Returns the row numbers of all the users of the store._
+
+        Returns:
+            np.ndarray: The row numbers, in the original order.
+        """
+        return np.arange(len(self.ages))
+    def get_adult_users_of(self, rows = None):
+        """_Returns the rows of the users who are adults (age >= 18)._
+
+        Args:
+            rows (np.ndarray | None): Optional rows to filter. If None, all rows are filtered.
+
+        Returns:
+            np.ndarray: The rows of the adult users, in the original order.
+        """
+        if rows is None:
+            return np.flatnonzero(self.ages >= ADULT_AGE)
+        return rows[self.ages[rows] >= ADULT_AGE]
+    def get_users_of_team_of(self, rows, team : str | None):
+        """_Filters rows by team._
+
+        Args:
+            rows (np.ndarray): The rows to filter.
+            team (str | None): The team name to filter by. If None, returns all rows.
+
+        Returns:
+            np.ndarray: The rows of the users belonging to the team.
+        """
+        if team is None:
+            return rows
+        team_code = self.get_team_code(team)
+        if team_code is None:
+            return rows[:0]
+        return rows[self.team_codes[rows] == team_code]
+    def get_average_age_of(self, rows) -> float:
+        """_Calculates the average age of the users of the rows._
+
+        Args:
+            rows (np.ndarray): The rows to calculate the average age for.
+
+        Returns:
+            float: The average age, rounded to 1 decimal. Returns 0.0 if there are no rows.
+        """
+        if len(rows) == 0:
+            return 0.0
+        return round(float(self.ages[rows].mean()), 1)
+    def get_n_oldest_users(self, rows, n : int):
+        """_Returns the rows of the N oldest users._
+
+        Users of the same age are ordered by row, like `heapq.nlargest`
+        over the users in their original order.
+
+        Args:
+            rows (np.ndarray): The rows to select from.
+            n (int): The number of oldest users to return.
+
+        Returns:
+            np.ndarray: The rows of the N oldest users, sorted by descending age.
+        """
+        if n <= 0 or len(rows) == 0:
+            return rows[:0]
+        ages = self.ages[rows]
+        if n < len(rows):
+            candidates = np.argpartition(-ages, n - 1)[:n]
+            min_age = ages[candidates].min()
+            older = np.flatnonzero(ages > min_age)
+            same_age = np.flatnonzero(ages == min_age)[:n - len(older)]
+            candidates = np.concatenate((older, same_age))
+        else:
+            candidates = np.arange(len(rows))
+        candidates = candidates[np.lexsort((candidates, -ages[candidates]))]
+        return rows[candidates]
+    def get_sorted_rows(self, rows, field : str, descending : bool = False):
+        """_Returns rows sorted by a field, with a stable sort._
+
+        Users with equal values keep the order of the rows, in both directions.
+        The names and start dates are sorted by their codes.
+
+        Args:
+            rows (np.ndarray): The rows to sort.
+            field (str): The field to sort by: "age", "start_date" or "name".
+            descending (bool): Whether to sort in descending order.
+
+        Returns:
+            np.ndarray: The rows, in the sort order.
+        """
+        values = {
+            "age": self.ages, "start_date": self.start_dates.codes, "name": self.names.codes,
+        }[field][rows]
+        if descending:
+            values = -values
+        return rows[np.argsort(values, kind="stable")]
+    def get_filtered_rows(self, rows, user_filter : UserFilter):
+        """_Returns the rows matching a filter, with one vectorized mask per criterion._
+
+        Args:
+            rows (np.ndarray): The rows to filter.
+            user_filter (UserFilter): The filter.
+
+        Returns:
+            np.ndarray: The matching rows, in the order of the rows.
+        """
+        mask = np.ones(len(rows), dtype=bool)
+        if user_filter.teams is not None:
+            team_codes = [self.get_team_code(team) for team in user_filter.teams]
+            mask &= np.isin(
+                self.team_codes[rows], [code for code in team_codes if code is not None])
+        if user_filter.min_age is not None or user_filter.max_age is not None:
+            ages = self.ages[rows]
+            if user_filter.min_age is not None:
+                mask &= ages >= user_filter.min_age
+            if user_filter.max_age is not None:
+                mask &= ages <= user_filter.max_age
+        if user_filter.start_date_from is not None or user_filter.start_date_to is not None:
+            start_date_codes = self.start_dates.codes[rows]
+            if user_filter.start_date_from is not None:
+                mask &= start_date_codes >= self.start_dates.get_lower_code(
+                    user_filter.start_date_from)
+            if user_filter.start_date_to is not None:
+                mask &= start_date_codes < self.start_dates.get_upper_code(
+                    user_filter.start_date_to)
+        if user_filter.name_prefix is not None:
+            mask &= self.names.get_prefix_mask(rows, user_filter.name_prefix)
+        if user_filter.email_prefix is not None:
+            mask &= self.emails.get_prefix_mask(rows, user_filter.email_prefix)
+        return rows[mask]
+    def get_count_by_team_of(self, rows) -> dict[str, int]:
+        """_Counts the users of the rows in each team._
+
+        Args:
+            rows (np.ndarray): The rows to count.
+
+        Returns:
+            dict[str, int]: Number of users of each team, teams without users excluded.
+        """
+        counts = np.bincount(self.team_codes[rows], minlength=len(self.teams))
+        return {self.teams[code]: int(count) for code, count in enumerate(counts) if count}
+    def get_average_age_by_team_of(self, rows) -> dict[str, float]:
+        """_Calculates the average age of the users of the rows in each team._
+
+        Args:
+            rows (np.ndarray): The rows to aggregate.
+
+        Returns:
+            dict[str, float]: Average age of each team, rounded to 1 decimal,
+            teams without users excluded.
+        """
+        team_codes = self.team_codes[rows]
+        counts = np.bincount(team_codes, minlength=len(self.teams))
+        age_sums = np.bincount(team_codes, weights=self.ages[rows], minlength=len(self.teams))
+        return {self.teams[code]: round(float(age_sums[code]) / int(count), 1)
+                for code, count in enumerate(counts) if count}
+    def to_users(self, rows) -> list[User]:
+        """_Converts rows back to `User` objects._
+
+        The values were validated when the store was built, so the users are
+        constructed without validation.
+
+        Args:
+            rows (np.ndarray): The rows to convert.
+
+        Returns:
+            list[User]: The users of the rows, in the order of the rows.
+        """
+        return [
+            User.model_construct(
+                name=name, email=email, age=age, team=self.teams[team_code],
+                start_date=start_date)
+            for name, email, age, team_code, start_date in zip(
+                self.names.get_values(rows), self.emails.get_values(rows),
+                self.ages[rows].tolist(), self.team_codes[rows].tolist(),
+                self.start_dates.get_values(rows))
+        ]
+    def to_records(self, rows) -> list[UserRecord]:
+        """_Converts rows to compact `UserRecord` objects._
+
+        The team names of the records are the strings of `teams`, shared by
+        all the records of a team, and their sequences are their rows.
+
+        Args:
+            rows (np.ndarray): The rows to convert.
+
+        Returns:
+            list[UserRecord]: The records of the rows, in the order of the rows.
+        """
+        return [
+            UserRecord(name, email, age, self.teams[team_code], start_date, row)
+            for name, email, age, team_code, start_date, row in zip(
+                self.names.get_values(rows), self.emails.get_values(rows),
+                self.ages[rows].tolist(), self.team_codes[rows].tolist(),
+                self.start_dates.get_values(rows), np.asarray(rows).tolist())
+        ]
@@ -1,12 +1,22 @@
 """_json_service.py_
 
 This module provides the JSONService class, a stateless utility for
-serializing Python objects to JSON strings and formatting standardized
-JSON responses for API endpoints.
+serializing Python objects to JSON strings, formatting standardized
+JSON responses for API endpoints, and streaming items as NDJSON.
+
+The encoding of the responses (`encode` and the pre-encoded fragments) uses
+the Rust encoder of pydantic-core, which handles Pydantic models directly and
+returns bytes, while `serialize` keeps the output of `json.dumps`.
 """
 
 import json
+from collections.abc import Iterable, Iterator
 from typing import Any
+from fastapi import Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+NDJSON_BATCH_SIZE = 1000
 
 class JSONService():
     """_A stateless utility service for JSON serialization and response formatting._
@@ -14,6 +24,8 @@ class JSONService():
     This class provides static methods to:
         - Serialize Python objects into JSON strings.
         - Format data into a standard JSON response structure with status and message.
+        - Encode that structure directly into JSON bytes, optionally around
+          pre-encoded data, for the high-throughput response path.
 
     Example:
         >>> from app.services.json_service import JSONService
@@ -63,3 +75,113 @@ class JSONService():
         if data is not None:
             response["data"] = data
         return response
+    @staticmethod
+    def encode(
+        data: Any | None = None,
+        status: int = 200,
+        message: str | None = None,
+        encoded_data: bytes | None = None) -> bytes:
+        """_Encodes a standardized JSON response into bytes._
+
+        The envelope is the same as the one of `format`. The data can be given
+        already encoded, e.g. as a concatenation of pre-encoded JSON fragments,
+        in which case it is inserted as is.
+
+        Args:
+            data (Any | None): Optional payload data to encode in the response.
+            status (int): HTTP-like status code. Defaults to 200.
+            message (str | None): Optional status message. Defaults to "success" if not provided.
+            encoded_data (bytes | None): Optional payload data, already encoded in JSON.
+                Takes precedence over `data`.
+
+        Returns:
+            bytes: The JSON encoded response.
+
+        Example:
+            >>> JSONService.encode(encoded_data=b'[{"name":"Alice"}]')
+            b'{"status":200,"message":"success","data":[{"name":"Alice"}]}'
+        """
+        if encoded_data is None:
+            return to_json(JSONService.format(data=data, status=status, message=message))
+        envelope = to_json(JSONService.format(status=status, message=message))
+        return b"".join((envelope[:-1], b',"data":', encoded_data, b"}"))
+    @staticmethod
+    def response(
+        data: Any | None = None,
+        status: int = 200,
+        message: str | None = None,
+        encoded_data: bytes | None = None) -> Response:
+        """_Returns a standardized JSON response, encoded with `encode`._
+
+        The response bypasses the generic `jsonable_encoder` of FastAPI.
+
+        Args:
+            data (Any | None): Optional payload data to include in the response.
+            status (int): HTTP-like status code. Defaults to 200.
+            message (str | None): Optional status message. Defaults to "success" if not provided.
+            encoded_data (bytes | None): Optional payload data, already encoded in JSON.
+
+        Returns:
+            Response: The response, with the `application/json` media type.
+        """
+        return Response(
+            content=JSONService.encode(data, status, message, encoded_data),
+            media_type="application/json")
+    @staticmethod
+    def encode_array(fragments: Iterable[bytes]) -> bytes:
+        """_Encodes a JSON array from pre-encoded JSON fragments._
+
+        Args:
+            fragments (Iterable[bytes]): The JSON encoded items.
+
+        Returns:
+            bytes: The JSON array.
+        """
+        return b"[" + b",".join(fragments) + b"]"
+    @staticmethod
+    def encode_object(encoded_fields: dict[str, bytes]) -> bytes:
+        """_Encodes a JSON object from pre-encoded JSON values._
+
+        Args:
+            encoded_fields (dict[str, bytes]): The JSON encoded value of each key.
+
+        Returns:
+            bytes: The JSON object.
+
+        Example:
+            >>> JSONService.encode_object({"users": b"[]", "nextCursor": b"null"})
+            b'{"users":[],"nextCursor":null}'
+        """
+        return b"{" + b",".join(
+            to_json(key) + b":" + value for key, value in encoded_fields.items()) + b"}"
+    @staticmethod
+    def stream_ndjson(
+        items: Iterable[BaseModel | bytes],
+        batch_size: int = NDJSON_BATCH_SIZE) -> Iterator[bytes]:
+        """_Serializes Pydantic models incrementally as NDJSON (one JSON object per line)._
+
+        The items are serialized in batches, so memory use and time to first byte
+        do not grow with the number of items.
+
+        Args:
+            items (Iterable[BaseModel | bytes]): The models to serialize,
+                or their pre-encoded JSON.
+            batch_size (int): Number of items serialized per yielded chunk.
+
+        Yields:
+            bytes: The next chunk of NDJSON lines.
+
+        Example:
+            >>> StreamingResponse(
+            ...     JSONService.stream_ndjson(users), media_type="application/x-ndjson")
+        """
+        batch : list[bytes] = []
+        for item in items:
+            batch.append(item if isinstance(item, bytes) else to_json(item))
+            if len(batch) == batch_size:
+                batch.append(b"")
+                yield b"\n".join(batch)
+                batch = []
+        if batch:
+            batch.append(b"")
+            yield b"\n".join(batch)
@@ -3,16 +3,194 @@
 This module provides the LoggerService class, which configures and returns
 a singleton logger instance for the application. The logger uses a
 RotatingFileHandler to manage log files efficiently.
+
+If `LOG_QUEUE_ENABLED`, the records are put in a bounded queue and written
+to the file by a background thread (QueueListener), so logging never blocks
+the event loop on disk I/O or on the rotation of the file.
+
+Hot call sites log through a SampledLogger, which only writes a sample of
+the records (the first ones, then one every N, within a rate limit) and counts
+all of them, so the counters can be read programmatically instead.
 """
-# pylint: disable=too-few-public-methods
+# pylint: disable=too-many-instance-attributes
 
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_QUEUE_ENABLED = os.environ.get("LOG_QUEUE_ENABLED", "0") == "1"
+LOG_QUEUE_SIZE = int(os.environ.get("LOG_QUEUE_SIZE", "10000"))
+LOG_QUEUE_OVERFLOW = os.environ.get("LOG_QUEUE_OVERFLOW", "drop")
+LOG_SAMPLE_FIRST_N = 20
+LOG_RATE_LIMIT = float(os.environ.get("LOG_RATE_LIMIT", "10"))
+
+class BoundedQueueHandler(QueueHandler):
+    """_Queue handler with a policy for when the bounded queue is full._
+
+    With the "drop" policy, the records that do not fit in the queue are
+    dropped and counted. With the "block" policy, the caller waits for the
+    background listener to make room in the queue.
+
+    Attributes:
+        overflow (str): The overflow policy, "drop" or "block".
+        dropped_records (int): Number of records dropped because the queue was full.
+    """
+    def __init__(self, records_queue : queue.Queue, overflow : str = LOG_QUEUE_OVERFLOW):
+        """_Initializes the handler._
+
+        Args:
+            records_queue (queue.Queue): The bounded queue of the records.
+            overflow (str): The overflow policy, "drop" or "block".
+
+        Raises:
+            ValueError: If the overflow policy is unknown.
+        """
+        if overflow not in ("drop", "block"):
+            raise ValueError(f"Unknown log queue overflow policy: {overflow}")
+        super().__init__(records_queue)
+        self.overflow = overflow
+        self.dropped_records = 0
+    def enqueue(self, record : logging.LogRecord) -> None:
+        """_Puts a record in the queue, applying the overflow policy if it is full._
+
+        Args:
+            record (logging.LogRecord): The prepared record.
+        """
+        if self.overflow == "block":
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped_records += 1
+
+class SampledLogger:
+    """_Logs a sample of the records of a call site, and counts all of them._
+
+    The counts are kept both in total and in the current window, e.g. the
+    current load of the users, so the caller can log an aggregate such as
+    "312 skipped (first 20 shown)" at the end of the window.
+
+    A record is logged if it is one of the `first_n` records of the window,
+    or one every `sample_every` records after them, and if the rate limit
+    of `max_per_second` records allows it.
+
+    Attributes:
+        name (str): Name of the call site.
+        count (int): Total number of records.
+        logged (int): Total number of records actually logged.
+        window_count (int): Number of records of the current window.
+        window_logged (int): Number of records of the current window actually logged.
+
+    Example:
+        >>> skipped_rows_log = LoggerService.get_sampled_logger("users.skipped_rows")
+        >>> skipped_rows_log.start_window()
+        >>> skipped_rows_log.warning("Line %s - Skipping invalid user row", 3)
+        >>> logger_service.info("%s skipped (first %s shown)",
+        ...     skipped_rows_log.window_count, skipped_rows_log.window_logged)
+    """
+    def __init__(
+        self,
+        name : str,
+        logger : logging.Logger | None = None,
+        first_n : int = LOG_SAMPLE_FIRST_N,
+        sample_every : int = 0,
+        max_per_second : float = 0.0):
+        """_Initializes the sampled logger, with zero counts._
+
+        Args:
+            name (str): Name of the call site.
+            logger (logging.Logger | None): The logger writing the records.
+                Defaults to the "app" logger.
+            first_n (int): Number of records logged at the start of each window.
+            sample_every (int): After the first ones, one record every `sample_every`
+                is logged. 0 logs none of them.
+            max_per_second (float): Maximum number of records logged per second.
+                0 disables the rate limit.
+        """
+        self.name = name
+        self.logger = logger or LoggerService.get_logger()
+        self.first_n = first_n
+        self.sample_every = sample_every
+        self.max_per_second = max_per_second
+        self.count = 0
+        self.logged = 0
+        self.window_count = 0
+        self.window_logged = 0
+        self._tokens = max_per_second
+        self._tokens_updated_at = time.monotonic()
+        self._lock = threading.Lock()
+    def start_window(self) -> None:
+        """_Starts a new window, resetting the counts of the window._"""
+        with self._lock:
+            self.window_count = 0
+            self.window_logged = 0
+    def _is_sampled(self) -> bool:
+        """_Counts a record, and decides whether it is logged. Must hold the lock._"""
+        self.count += 1
+        self.window_count += 1
+        rank = self.window_count - self.first_n
+        if rank > 0 and (self.sample_every <= 0 or rank % self.sample_every != 0):
+            return False
+        if self.max_per_second > 0:
+            now = time.monotonic()
+            self._tokens = min(
+                self.max_per_second,
+                self._tokens + (now - self._tokens_updated_at) * self.max_per_second)
+            self._tokens_updated_at = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+        self.logged += 1
+        self.window_logged += 1
+        return True
+    def log(self, level : int, msg : str, *args, stacklevel : int = 2) -> bool:
+        """_Counts a record, and logs it if it is sampled._
+
+        The message is only formatted if the record is logged.
+
+        Args:
+            level (int): The logging level.
+            msg (str): The message format.
+            *args: The arguments of the message.
+            stacklevel (int): Stack level of the caller reported in the record.
+
+        Returns:
+            bool: True if the record was logged.
+        """
+        with self._lock:
+            sampled = self._is_sampled()
+        if sampled:
+            self.logger.log(level, msg, *args, stacklevel=stacklevel)
+        return sampled
+    def info(self, msg : str, *args) -> bool:
+        """_Counts an info record, and logs it if it is sampled (see `log`)._"""
+        return self.log(logging.INFO, msg, *args, stacklevel=3)
+    def warning(self, msg : str, *args) -> bool:
+        """_Counts a warning record, and logs it if it is sampled (see `log`)._"""
+        return self.log(logging.WARNING, msg, *args, stacklevel=3)
+    def get_counters(self) -> dict[str, int]:
+        """_Returns the total counts of the records._
+
+        Returns:
+            dict[str, int]: The number of records, logged and suppressed.
+        """
+        with self._lock:
+            return {
+                "count": self.count,
+                "logged": self.logged,
+                "suppressed": self.count - self.logged,
+            }
 
 class LoggerService:
     """_Service class for creating and configuring a logger instance._
 
-    This class provides a single static method to get a configured logger.
+    This class provides static methods to get a configured logger, to
+    flush it on shutdown, and to get the sampled loggers of hot call sites
+    and their counters.
     The logger is set to INFO level and writes logs to a rotating file
     ('app.log'), with a maximum size of 1 MB per file and 5 backup files.
 
@@ -21,14 +199,31 @@ class LoggerService:
         >>> logger = LoggerService.get_logger()
         >>> logger.info("This is an info message")
     """
+    _listeners : dict[str, QueueListener] = {}
+    _sampled_loggers : dict[str, SampledLogger] = {}
+    _sampled_loggers_lock = threading.Lock()
     @staticmethod
-    def get_logger():
+    def get_logger(
+        name : str = "app",
+        queue_enabled : bool = LOG_QUEUE_ENABLED,
+        queue_size : int = LOG_QUEUE_SIZE,
+        overflow : str = LOG_QUEUE_OVERFLOW):
         """_Returns a configured logger instance for the application._
 
         The logger is named "app", uses the INFO level, and writes logs
         to 'app.log' with rotation to avoid large files. If the logger
         already has handlers, it will not add duplicate handlers.
 
+        In queue mode, the logger only has a BoundedQueueHandler, and the
+        rotating file handler is run by a background QueueListener.
+
+        Args:
+            name (str): Name of the logger. Defaults to "app".
+            queue_enabled (bool): Whether the records are written by a background thread.
+                Defaults to `LOG_QUEUE_ENABLED`.
+            queue_size (int): Maximum number of records waiting in the queue.
+            overflow (str): Policy when the queue is full, "drop" or "block".
+
         Returns:
             logging.Logger: A configured logger instance.
 
@@ -38,13 +233,77 @@ class LoggerService:
             >>> logger.warning("This is a warning")
         ```
         """
-        logger = logging.getLogger("app")
+        logger = logging.getLogger(name)
         logger.setLevel(logging.INFO)
         if not logger.handlers:
             handler = RotatingFileHandler(filename="app.log", maxBytes=1_000_000, backupCount=5)
             formatter = logging.Formatter("[%(asctime)s] %(levelname)s in %(module)s: %(message)s")
             handler.setFormatter(formatter)
-            logger.addHandler(handler)
+            if queue_enabled:
+                queue_handler = BoundedQueueHandler(queue.Queue(maxsize=queue_size), overflow)
+                listener = QueueListener(queue_handler.queue, handler, respect_handler_level=True)
+                listener.start()
+                LoggerService._listeners[name] = listener
+                logger.addHandler(queue_handler)
+            else:
+                logger.addHandler(handler)
         return logger
+    @staticmethod
+    def shutdown(name : str = "app") -> None:
+        """_Flushes the pending records of a logger, and stops its background listener._
+
+        The queued records are all written before this method returns. The records
+        logged afterwards are written synchronously by the file handler.
+        Without queue mode, this only flushes the handlers of the logger.
+
+        Args:
+            name (str): Name of the logger. Defaults to "app".
+        """
+        logger = logging.getLogger(name)
+        listener = LoggerService._listeners.pop(name, None)
+        if listener is not None:
+            listener.stop()
+            for handler in list(logger.handlers):
+                if isinstance(handler, BoundedQueueHandler):
+                    logger.removeHandler(handler)
+            for handler in listener.handlers:
+                logger.addHandler(handler)
+        for handler in logger.handlers:
+            handler.flush()
+    @staticmethod
+    def get_sampled_logger(name : str, **kwargs) -> SampledLogger:
+        """_Returns the sampled logger of a call site, creating it on the first call._
+
+        Args:
+            name (str): Name of the call site.
+            **kwargs: The sampling options of the SampledLogger, used on the first call.
+
+        Returns:
+            SampledLogger: The sampled logger of the call site.
+        """
+        with LoggerService._sampled_loggers_lock:
+            sampled_logger = LoggerService._sampled_loggers.get(name)
+            if sampled_logger is None:
+                sampled_logger = SampledLogger(name, **kwargs)
+                LoggerService._sampled_loggers[name] = sampled_logger
+            return sampled_logger
+    @staticmethod
+    def get_counters() -> dict[str, dict[str, int]]:
+        """_Returns the counters of the records of each sampled call site._
+
+        Returns:
+            dict[str, dict[str, int]]: The counters (see `SampledLogger.get_counters`)
+            by name of call site.
+
+        Example:
+            >>> LoggerService.get_counters()["users.skipped_rows"]["count"]
+            312
+        """
+        with LoggerService._sampled_loggers_lock:
+            sampled_loggers = list(LoggerService._sampled_loggers.values())
+        return {
+            sampled_logger.name: sampled_logger.get_counters()
+            for sampled_logger in sampled_loggers
+        }
 # Global logger instance accessible throughout the application
 logger_service = LoggerService.get_logger()
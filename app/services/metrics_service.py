@@ -0,0 +1,265 @@
+"""_metrics_service.py_
+
+This module provides the MetricsService class, which records the metrics of
+the API (requests, latencies, response sizes, loads of the users, memory)
+and renders them in the Prometheus text exposition format, and the
+MetricsMiddleware ASGI middleware recording the metrics of each request.
+
+The metrics are plain counters of the process, without locks: the request
+metrics are only updated by the event loop thread, and the metrics of a load
+are replaced with single assignments by the thread of the refresh. With several
+worker processes, each worker exposes its own metrics.
+"""
+# pylint: disable=too-few-public-methods
+
+import os
+import time
+from bisect import bisect_left
+from app.services.logger_service import LoggerService
+from app.services.response_cache import response_cache
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000, 100_000_000)
+
+class Histogram:
+    """_Cumulative histogram of observed values, as exposed by Prometheus._
+
+    Attributes:
+        buckets (tuple[float, ...]): Upper bounds of the buckets, in increasing order.
+        bucket_counts (list[int]): Number of observations of each bucket (not cumulative),
+            plus the observations above the last bound.
+        count (int): Number of observations.
+        sum (float): Sum of the observed values.
+    """
+    def __init__(self, buckets : tuple[float, ...]):
+        """_Initializes an empty histogram._
+
+        Args:
+            buckets (tuple[float, ...]): Upper bounds of the buckets, in increasing order.
+        """
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+    def observe(self, value : float) -> None:
+        """_Adds an observation to the histogram._
+
+        Args:
+            value (float): The observed value.
+        """
+        self.bucket_counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+    def render(self, name : str, labels : str) -> list[str]:
+        """_Returns the lines of the histogram in the Prometheus text format._
+
+        Args:
+            name (str): Name of the metric.
+            labels (str): The formatted labels of the histogram, without braces.
+
+        Returns:
+            list[str]: The bucket, sum and count lines.
+        """
+        lines = []
+        cumulative_count = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), self.bucket_counts):
+            cumulative_count += bucket_count
+            bound_label = "+Inf" if bound == float("inf") else f"{bound:g}"
+            lines.append(f'{name}_bucket{{{labels},le="{bound_label}"}} {cumulative_count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum:g}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+class MetricsService:
+    """_Records the metrics of the API, and renders them for Prometheus._
+
+    Attributes:
+        _request_latencies (dict[tuple[str, str, int], Histogram]): Latency of the
+            requests in seconds, by method, route and status.
+        _response_sizes (dict[tuple[str, str, int], Histogram]): Size of the responses
+            in bytes, by method, route and status.
+        _loads_total (int): Number of loads of the users.
+        _last_load (dict[str, float]): Metrics of the last load of the users.
+
+    Example:
+        >>> metrics_service.observe_request("GET", "/users/", 200, 0.002, 512)
+        >>> print(metrics_service.render())
+    """
+    def __init__(self):
+        """_Initializes the metrics, with no request nor load recorded._"""
+        self._request_latencies : dict[tuple[str, str, int], Histogram] = {}
+        self._response_sizes : dict[tuple[str, str, int], Histogram] = {}
+        self._loads_total = 0
+        self._rejected_rows_total = 0
+        self._last_load : dict[str, float] = {}
+    def observe_request(
+        self,
+        method : str,
+        route : str,
+        status : int,
+        duration : float,
+        size : int) -> None:
+        """_Records a request._
+
+        Args:
+            method (str): The HTTP method.
+            route (str): The path template of the route, e.g. "/users/refresh/{refresh_id}".
+            status (int): The HTTP status of the response.
+            duration (float): Duration of the request, in seconds.
+            size (int): Size of the body of the response, in bytes.
+        """
+        key = (method, route, status)
+        latencies = self._request_latencies.get(key)
+        if latencies is None:
+            latencies = self._request_latencies[key] = Histogram(LATENCY_BUCKETS)
+            self._response_sizes[key] = Histogram(SIZE_BUCKETS)
+        latencies.observe(duration)
+        self._response_sizes[key].observe(size)
+    def observe_load(
+        self,
+        duration : float,
+        nb_users : int,
+        nb_rejected_rows : int,
+        dataset_size : int) -> None:
+        """_Records a load of the users._
+
+        Args:
+            duration (float): Duration of the load, in seconds.
+            nb_users (int): Number of valid users loaded.
+            nb_rejected_rows (int): Number of invalid rows skipped.
+            dataset_size (int): Number of users of the dataset after the load.
+        """
+        nb_rows = nb_users + nb_rejected_rows
+        self._last_load = {
+            "duration_seconds": duration,
+            "rows_per_second": nb_rows / duration if duration > 0 else 0.0,
+            "rejected_rows": nb_rejected_rows,
+            "dataset_size": dataset_size,
+        }
+        self._rejected_rows_total += nb_rejected_rows
+        self._loads_total += 1
+    @staticmethod
+    def get_resident_memory() -> int | None:
+        """_Returns the resident set size (RSS) of the process, in bytes._
+
+        Returns:
+            int | None: The RSS, or None if it cannot be read (non-Linux systems).
+        """
+        try:
+            with open("/proc/self/statm", encoding="ascii") as statm_file:
+                nb_resident_pages = int(statm_file.read().split()[1])
+        except (OSError, ValueError, IndexError):
+            return None
+        return nb_resident_pages * os.sysconf("SC_PAGE_SIZE")
+    def render(self) -> str:
+        """_Renders all the metrics in the Prometheus text exposition format._
+
+        Returns:
+            str: The metrics, one sample per line.
+        """
+        lines = [
+            "# HELP http_requests_total Number of HTTP requests.",
+            "# TYPE http_requests_total counter",
+        ]
+        request_labels = {
+            key: f'method="{key[0]}",route="{key[1]}",status="{key[2]}"'
+            for key in list(self._request_latencies)
+        }
+        for key, labels in request_labels.items():
+            lines.append(f"http_requests_total{{{labels}}} {self._request_latencies[key].count}")
+        lines += [
+            "# HELP http_request_duration_seconds Latency of the HTTP requests.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for key, labels in request_labels.items():
+            lines += self._request_latencies[key].render("http_request_duration_seconds", labels)
+        lines += [
+            "# HELP http_response_size_bytes Size of the bodies of the HTTP responses.",
+            "# TYPE http_response_size_bytes histogram",
+        ]
+        for key, labels in request_labels.items():
+            lines += self._response_sizes[key].render("http_response_size_bytes", labels)
+        lines += [
+            "# HELP users_loads_total Number of loads of the users.",
+            "# TYPE users_loads_total counter",
+            f"users_loads_total {self._loads_total}",
+            "# HELP users_rejected_rows_total Number of invalid rows skipped by the loads.",
+            "# TYPE users_rejected_rows_total counter",
+            f"users_rejected_rows_total {self._rejected_rows_total}",
+        ]
+        for name, value in self._last_load.items():
+            lines += [
+                f"# HELP users_last_load_{name} Metric of the last load of the users.",
+                f"# TYPE users_last_load_{name} gauge",
+                f"users_last_load_{name} {value:g}",
+            ]
+        lines += [
+            "# HELP response_cache_hits_total Number of responses served from the cache.",
+            "# TYPE response_cache_hits_total counter",
+            f"response_cache_hits_total {response_cache.hits}",
+            "# HELP response_cache_misses_total Number of responses built on a cache miss.",
+            "# TYPE response_cache_misses_total counter",
+            f"response_cache_misses_total {response_cache.misses}",
+            "# HELP log_records_total Number of records of the sampled log call sites.",
+            "# TYPE log_records_total counter",
+        ]
+        for site, counters in LoggerService.get_counters().items():
+            lines.append(
+                f'log_records_total{{site="{site}",outcome="logged"}} {counters["logged"]}')
+            lines.append(
+                f'log_records_total{{site="{site}",outcome="suppressed"}} {counters["suppressed"]}')
+        resident_memory = MetricsService.get_resident_memory()
+        if resident_memory is not None:
+            lines += [
+                "# HELP process_resident_memory_bytes Resident memory size in bytes.",
+                "# TYPE process_resident_memory_bytes gauge",
+                f"process_resident_memory_bytes {resident_memory}",
+            ]
+        return "\n".join(lines) + "\n"
+
+class MetricsMiddleware:
+    """_ASGI middleware recording the latency, status and response size of each HTTP request._
+
+    The route is the path template of the matched route, so the number of
+    metrics does not grow with the paths requested. The latency covers the
+    whole response, including the body of streaming responses.
+
+    Example:
+        >>> app.add_middleware(MetricsMiddleware)
+    """
+    def __init__(self, app, metrics : MetricsService | None = None):
+        """_Wraps an ASGI application._
+
+        Args:
+            app: The ASGI application.
+            metrics (MetricsService | None): The metrics to update. Defaults to the
+                global `metrics_service`.
+        """
+        self.app = app
+        self.metrics = metrics or metrics_service
+    async def __call__(self, scope, receive, send):
+        """_Handles a request, recording its metrics once the response is sent._"""
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started_at = time.perf_counter()
+        response = {"status": 500, "size": 0}
+        async def send_and_measure(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+            elif message["type"] == "http.response.body":
+                response["size"] += len(message.get("body", b""))
+            await send(message)
+        try:
+            await self.app(scope, receive, send_and_measure)
+        finally:
+            route = scope.get("route")
+            self.metrics.observe_request(
+                scope["method"],
+                getattr(route, "path", "unmatched"),
+                response["status"],
+                time.perf_counter() - started_at,
+                response["size"])
+
+# Global metrics of the process
+metrics_service = MetricsService()
@@ -0,0 +1,211 @@
+"""_pagination_service.py_
+
+This module provides the PaginationService class, a stateless utility for
+cursor-based pagination over the in-memory order of the users.
+
+Two kinds of cursors are provided:
+    - position cursors (`paginate`), for the results computed per request,
+      such as the ranked results of a search;
+    - key cursors (`paginate_by_key`), for the users of the dataset written
+      in place: the cursor holds the sort key and the sequence of the last
+      user of the page, and the next page starts after them by bisection, so
+      the users added or removed before the cursor do not shift the pages.
+      A key cursor is only valid for the dataset generation it was built on,
+      whose sequences it refers to.
+"""
+# pylint: disable=too-many-arguments,too-many-positional-arguments
+
+import base64
+import binascii
+import json
+from bisect import bisect_left
+from collections.abc import Callable, Sequence
+from typing import Any
+
+class PaginationService:
+    """_A stateless utility service for cursor-based pagination._
+
+    A cursor is an opaque, URL-safe string encoding the position of the next
+    item in the paginated sequence, or the key of the last item of the page.
+
+    Example:
+        >>> page, next_cursor = PaginationService.paginate(users, limit=100)
+        >>> page, next_cursor = PaginationService.paginate(users, limit=100, cursor=next_cursor)
+    """
+    @staticmethod
+    def encode_cursor(position: int) -> str:
+        """_Encodes a position into an opaque cursor._
+
+        Args:
+            position (int): Position of the next item.
+
+        Returns:
+            str: The cursor.
+        """
+        return base64.urlsafe_b64encode(f"p{position}".encode("ascii")).decode("ascii")
+    @staticmethod
+    def decode_cursor(cursor: str) -> int:
+        """_Decodes a cursor into a position._
+
+        Args:
+            cursor (str): The cursor returned with a previous page.
+
+        Returns:
+            int: Position of the next item.
+
+        Raises:
+            ValueError: If the cursor is invalid.
+        """
+        try:
+            decoded = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("ascii")
+        except (binascii.Error, UnicodeError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+        if not decoded.startswith("p") or not decoded[1:].isdigit():
+            raise ValueError(f"Invalid cursor: {cursor}")
+        return int(decoded[1:])
+    @staticmethod
+    def paginate(
+        items: Sequence[Any],
+        limit: int | None = None,
+        cursor: str | None = None) -> tuple[Sequence[Any], str | None]:
+        """_Returns a page of items, and the cursor of the next page._
+
+        Args:
+            items (Sequence[Any]): The items to paginate, in a stable order.
+            limit (int | None): Maximum number of items of the page. If None,
+                all the items after the cursor are returned.
+            cursor (str | None): Cursor of the page. If None, the page starts
+                with the first item.
+
+        Returns:
+            tuple[Sequence[Any], str | None]: The page, and the cursor of the next
+            page, or None if this is the last page.
+
+        Raises:
+            ValueError: If the cursor is invalid.
+        """
+        start = PaginationService.decode_cursor(cursor) if cursor is not None else 0
+        end = len(items) if limit is None else min(start + limit, len(items))
+        next_cursor = PaginationService.encode_cursor(end) if end < len(items) else None
+        return items[start:end], next_cursor
+    @staticmethod
+    def encode_key_cursor(generation : str, key : Any, seq : int) -> str:
+        """_Encodes the sort key and the sequence of the last item of a page into a cursor._
+
+        Args:
+            generation (str): Generation of the dataset the items come from.
+            key (Any): Sort key of the item, a JSON value (None without sort).
+            seq (int): Sequence of the item.
+
+        Returns:
+            str: The cursor.
+        """
+        encoded = json.dumps({"g": generation, "k": key, "s": seq}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(encoded.encode("utf-8")).decode("ascii")
+    @staticmethod
+    def decode_key_cursor(cursor : str, generation : str) -> tuple[Any, int]:
+        """_Decodes a key cursor into the sort key and the sequence of the last item of a page._
+
+        Args:
+            cursor (str): The cursor returned with a previous page.
+            generation (str): Generation of the current dataset.
+
+        Returns:
+            tuple[Any, int]: The sort key and the sequence of the last item.
+
+        Raises:
+            ValueError: If the cursor is invalid, or was built on another generation.
+        """
+        try:
+            decoded = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        except (binascii.Error, UnicodeError, ValueError) as e:
+            raise ValueError(f"Invalid cursor: {cursor}") from e
+        if (not isinstance(decoded, dict) or decoded.keys() != {"g", "k", "s"}
+                or not isinstance(decoded["g"], str) or not isinstance(decoded["s"], int)):
+            raise ValueError(f"Invalid cursor: {cursor}")
+        if decoded["g"] != generation:
+            raise ValueError(
+                f"Cursor of generation {decoded['g']}, the users were reloaded (now {generation})")
+        return decoded["k"], decoded["s"]
+    @staticmethod
+    def bisect_after(
+        items: Sequence[Any],
+        last_key: Any,
+        last_seq: int,
+        get_key: Callable[[Any], Any] | None = None,
+        descending: bool = False) -> int:
+        """_Returns the position of the first item after a sort key and a sequence, by bisection._
+
+        Args:
+            items (Sequence[Any]): The items, in the order of `paginate_by_key`.
+            last_key (Any): Sort key of the last item returned, None without sort.
+            last_seq (int): Sequence of the last item returned.
+            get_key (Callable[[Any], Any] | None): Sort key of the items, or None
+                if they are in `seq` order.
+            descending (bool): Whether the items are sorted by decreasing key.
+
+        Returns:
+            int: The position, the number of items if none is after.
+
+        Raises:
+            TypeError: If the key cannot be compared with the keys of the items.
+        """
+        def is_after(item) -> bool:
+            key = get_key(item) if get_key is not None else None
+            if key == last_key:
+                return item.seq > last_seq
+            return key < last_key if descending else key > last_key
+        return bisect_left(items, True, key=is_after)
+    @staticmethod
+    def paginate_by_key(
+        items: Sequence[Any],
+        generation: str,
+        limit: int | None = None,
+        cursor: str | None = None,
+        get_key: Callable[[Any], Any] | None = None,
+        descending: bool = False) -> tuple[Sequence[Any], str | None]:
+        """_Returns a page of items, and the key cursor of the next page._
+
+        The items are in increasing `seq` order, or sorted by `get_key` with
+        the items of equal keys in increasing `seq` order, in both directions.
+        The page starts after the item of the cursor, found by bisection, even
+        if this item was removed since.
+
+        Args:
+            items (Sequence[Any]): The items to paginate, with a `seq` attribute.
+            generation (str): Generation of the dataset the items come from.
+            limit (int | None): Maximum number of items of the page, at least 1.
+                If None, all the items after the cursor are returned.
+            cursor (str | None): Cursor of the page. If None, the page starts
+                with the first item.
+            get_key (Callable[[Any], Any] | None): Sort key of the items, a JSON
+                value, or None if they are in `seq` order.
+            descending (bool): Whether the items are sorted by decreasing key.
+
+        Returns:
+            tuple[Sequence[Any], str | None]: The page, and the cursor of the next
+            page, or None if this is the last page.
+
+        Raises:
+            ValueError: If the cursor is invalid, or was built on another generation.
+
+        Example:
+            >>> page, next_cursor = PaginationService.paginate_by_key(
+            ...     users, generation, limit=100, get_key=lambda user: user.age)
+        """
+        start = 0
+        if cursor is not None:
+            last_key, last_seq = PaginationService.decode_key_cursor(cursor, generation)
+            try:
+                start = PaginationService.bisect_after(
+                    items, last_key, last_seq, get_key, descending)
+            except TypeError as e:
+                raise ValueError(f"Invalid cursor: {cursor}") from e
+        end = len(items) if limit is None else min(start + limit, len(items))
+        page = items[start:end]
+        next_cursor = None
+        if end < len(items):
+            last_item = page[-1]
+            next_cursor = PaginationService.encode_key_cursor(
+                generation, get_key(last_item) if get_key is not None else None, last_item.seq)
+        return page, next_cursor
@@ -0,0 +1,263 @@
+"""_profiling_service.py_
+
+This module provides the ProfilingService class, which captures cProfile
+profiles of requests on demand, and the ProfilingMiddleware ASGI middleware.
+
+Profiling is opt-in (`PROFILING_ENABLED`). A request is profiled if it has the
+`X-Profile` header, or if it is drawn in the `PROFILING_SAMPLE_RATE` fraction
+of the requests. Each profile is written in the pstats format to a bounded
+ring of files (`PROFILING_DIR`, at most `PROFILING_MAX_PROFILES` profiles),
+with a JSON summary attributing the time to UserService, JSONService and
+the serialization.
+
+cProfile profiles the whole thread: while a request awaits, the other
+requests running on the event loop are profiled too. Only one request is
+profiled at a time. The profiler is stopped on the event loop, and the
+profile is written from a worker thread, so the disk I/O does not block
+the other requests.
+"""
+# pylint: disable=too-few-public-methods
+
+import asyncio
+import cProfile
+import json
+import os
+import pstats
+import random
+import tempfile
+import threading
+import time
+
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "0") == "1"
+PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", "0"))
+PROFILING_HEADER = "x-profile"
+PROFILING_DIR = os.environ.get("PROFILING_DIR") or os.path.join(
+    tempfile.gettempdir(), "collaborators-profiles")
+PROFILING_MAX_PROFILES = int(os.environ.get("PROFILING_MAX_PROFILES", "50"))
+PROFILE_SUFFIX = ".prof"
+SUMMARY_SUFFIX = ".json"
+
+# Modules of each group of the time attribution
+USER_SERVICE_MODULES = (
+    "user_service.py", "user_dataset.py", "user_stats.py",
+    "shared_user_dataset.py", "columnar_user_store.py")
+JSON_SERVICE_MODULES = ("json_service.py",)
+SERIALIZATION_MARKERS = ("pydantic", "to_json", "model_dump", "/json/")
+
+class ProfilingService:
+    """_Captures the profiles of requests in a bounded ring of files, and lists them._
+
+    Attributes:
+        enabled (bool): Whether requests can be profiled.
+        sample_rate (float): Fraction of the requests profiled without the header.
+        profiles_dir (str): Directory of the profiles.
+        max_profiles (int): Maximum number of profiles kept, the oldest are removed.
+
+    Example:
+        >>> profiling_service.list_profiles()
+        [{"name": "1718000000000000000-1234", "method": "GET", "path": "/stats/", ...}]
+    """
+    def __init__(
+        self,
+        enabled : bool = PROFILING_ENABLED,
+        sample_rate : float = PROFILING_SAMPLE_RATE,
+        profiles_dir : str = PROFILING_DIR,
+        max_profiles : int = PROFILING_MAX_PROFILES):
+        """_Initializes the service, without creating the directory of the profiles._
+
+        Args:
+            enabled (bool): Whether requests can be profiled. Defaults to `PROFILING_ENABLED`.
+            sample_rate (float): Fraction of the requests profiled without the header.
+            profiles_dir (str): Directory of the profiles.
+            max_profiles (int): Maximum number of profiles kept.
+        """
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.profiles_dir = profiles_dir
+        self.max_profiles = max_profiles
+        self._active_lock = threading.Lock()
+    def should_profile(self, profile_header : str | None) -> bool:
+        """_Decides whether a request is profiled._
+
+        Args:
+            profile_header (str | None): Value of the `X-Profile` header of the request, if any.
+
+        Returns:
+            bool: True if profiling is enabled, and the request has the header
+            or is drawn in the sample.
+        """
+        if not self.enabled:
+            return False
+        if profile_header is not None:
+            return profile_header.lower() not in ("0", "false")
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+    def try_start(self) -> cProfile.Profile | None:
+        """_Starts profiling, unless another request is being profiled._
+
+        Returns:
+            cProfile.Profile | None: The enabled profiler, to pass to `stop`,
+            or None if another request is being profiled.
+        """
+        if not self._active_lock.acquire(blocking=False):  # pylint: disable=consider-using-with
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            self._active_lock.release()
+            return None
+        return profiler
+    def stop(self, profiler : cProfile.Profile) -> None:
+        """_Stops profiling, so that another request can be profiled._
+
+        It must be called from the thread which started profiling.
+
+        Args:
+            profiler (cProfile.Profile): The profiler returned by `try_start`.
+        """
+        try:
+            profiler.disable()
+        finally:
+            self._active_lock.release()
+    def save(self, profiler : cProfile.Profile, method : str, path : str, duration : float) -> str:
+        """_Writes the profile of a stopped profiler and its summary to the ring._
+
+        The profile is written to the disk: call it from a worker thread
+        (`asyncio.to_thread`) when serving requests.
+
+        Args:
+            profiler (cProfile.Profile): The profiler, stopped with `stop`.
+            method (str): The HTTP method of the request.
+            path (str): The path of the request.
+            duration (float): Duration of the request, in seconds.
+
+        Returns:
+            str: The name of the profile.
+        """
+        stats = pstats.Stats(profiler)
+        name = f"{time.time_ns()}-{os.getpid()}"
+        os.makedirs(self.profiles_dir, exist_ok=True)
+        stats.dump_stats(os.path.join(self.profiles_dir, name + PROFILE_SUFFIX))
+        summary = {
+            "name": name,
+            "method": method,
+            "path": path,
+            "duration": duration,
+            "time_by_group": ProfilingService.get_time_by_group(stats),
+        }
+        with open(os.path.join(self.profiles_dir, name + SUMMARY_SUFFIX), "w",
+                  encoding="utf-8") as summary_file:
+            json.dump(summary, summary_file)
+        self._remove_old_profiles()
+        return name
+    @staticmethod
+    def get_time_by_group(stats : pstats.Stats) -> dict[str, float]:
+        """_Attributes the own time (tottime) of the profiled functions to groups._
+
+        Args:
+            stats (pstats.Stats): The statistics of a profile.
+
+        Returns:
+            dict[str, float]: Time in seconds spent in UserService (and its datasets),
+            JSONService, the serialization (Pydantic, json), and in total.
+        """
+        time_by_group = {"UserService": 0.0, "JSONService": 0.0, "serialization": 0.0, "total": 0.0}
+        for (filename, _, function_name), (_, _, own_time, _, _) in stats.stats.items():
+            time_by_group["total"] += own_time
+            location = f"{filename}:{function_name}"
+            if filename.endswith(USER_SERVICE_MODULES):
+                time_by_group["UserService"] += own_time
+            elif filename.endswith(JSON_SERVICE_MODULES):
+                time_by_group["JSONService"] += own_time
+            elif any(marker in location for marker in SERIALIZATION_MARKERS):
+                time_by_group["serialization"] += own_time
+        return time_by_group
+    def _get_profile_names(self) -> list[str]:
+        """_Returns the names of the profiles of the ring, from the oldest to the newest._"""
+        try:
+            file_names = os.listdir(self.profiles_dir)
+        except FileNotFoundError:
+            return []
+        return sorted(
+            file_name.removesuffix(PROFILE_SUFFIX)
+            for file_name in file_names if file_name.endswith(PROFILE_SUFFIX))
+    def _remove_old_profiles(self) -> None:
+        """_Removes the oldest profiles beyond `max_profiles`._"""
+        profile_names = self._get_profile_names()
+        for name in profile_names[:max(0, len(profile_names) - self.max_profiles)]:
+            for suffix in (PROFILE_SUFFIX, SUMMARY_SUFFIX):
+                try:
+                    os.remove(os.path.join(self.profiles_dir, name + suffix))
+                except FileNotFoundError:
+                    pass
+    def list_profiles(self) -> list[dict]:
+        """_Returns the summaries of the captured profiles, from the newest to the oldest._
+
+        Returns:
+            list[dict]: The summary of each profile (name, method, path, duration
+            and time by group).
+        """
+        summaries = []
+        for name in reversed(self._get_profile_names()):
+            try:
+                with open(os.path.join(self.profiles_dir, name + SUMMARY_SUFFIX),
+                          encoding="utf-8") as summary_file:
+                    summaries.append(json.load(summary_file))
+            except (OSError, ValueError):
+                summaries.append({"name": name})
+        return summaries
+    def get_profile_path(self, name : str) -> str | None:
+        """_Returns the path of the pstats file of a profile._
+
+        Args:
+            name (str): The name of the profile.
+
+        Returns:
+            str | None: The path of the file, or None if the profile is unknown.
+        """
+        if name not in self._get_profile_names():
+            return None
+        return os.path.join(self.profiles_dir, name + PROFILE_SUFFIX)
+
+class ProfilingMiddleware:
+    """_ASGI middleware profiling the requests selected by a ProfilingService._
+
+    Example:
+        >>> app.add_middleware(ProfilingMiddleware)
+    """
+    def __init__(self, app, profiling : ProfilingService | None = None):
+        """_Wraps an ASGI application._
+
+        Args:
+            app: The ASGI application.
+            profiling (ProfilingService | None): The profiling service. Defaults to
+                the global `profiling_service`.
+        """
+        self.app = app
+        self.profiling = profiling or profiling_service
+    async def __call__(self, scope, receive, send):
+        """_Handles a request, profiling it if it is selected._"""
+        if scope["type"] != "http" or not self.profiling.enabled:
+            await self.app(scope, receive, send)
+            return
+        profile_header = None
+        for header_name, header_value in scope["headers"]:
+            if header_name == PROFILING_HEADER.encode("latin-1"):
+                profile_header = header_value.decode("latin-1")
+        profiler = None
+        if self.profiling.should_profile(profile_header):
+            profiler = self.profiling.try_start()
+        if profiler is None:
+            await self.app(scope, receive, send)
+            return
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.profiling.stop(profiler)
+            await asyncio.to_thread(
+                self.profiling.save,
+                profiler, scope["method"], scope["path"], time.perf_counter() - started_at)
+
+# Global profiling service of the application
+profiling_service = ProfilingService()
@@ -0,0 +1,184 @@
+"""_response_cache.py_
+
+This module provides the ResponseCache class, a bounded LRU cache of encoded
+JSON responses, and the global `response_cache` instance used by the routers.
+
+The responses of /users and /stats only depend on the loaded dataset and on
+the query parameters, so they are cached by (route, params, generation of the
+dataset). A new generation makes every cached response unreachable, so the
+cache is cleared as soon as a response of a newer generation is requested.
+
+Each cached response has a strong ETag (a hash of its bytes), and requests
+with a matching `If-None-Match` header are answered with a 304 Not Modified.
+"""
+# pylint: disable=too-many-instance-attributes
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from fastapi import Request, Response
+
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+class ResponseCache:
+    """_Bounded LRU cache of encoded responses, with their ETag._
+
+    The cache is bounded both in number of entries and in total size of the
+    cached bytes. The least recently used entries are evicted first, and a
+    response larger than the maximum size is never cached.
+
+    Attributes:
+        max_entries (int): Maximum number of cached responses.
+        max_bytes (int): Maximum total size of the cached responses.
+        generation (int | None): Generation of the dataset of the cached responses.
+        hits (int): Number of responses found in the cache.
+        misses (int): Number of responses built because they were not cached.
+
+    Example:
+        >>> response_cache.get_response(
+        ...     request, ("/users/", (team,)), user_service.get_generation(),
+        ...     lambda: JSONService.encode(data=users))
+    """
+    def __init__(
+        self,
+        max_entries : int = RESPONSE_CACHE_MAX_ENTRIES,
+        max_bytes : int = RESPONSE_CACHE_MAX_BYTES):
+        """_Initializes an empty cache._
+
+        Args:
+            max_entries (int): Maximum number of cached responses. 0 disables the cache.
+            max_bytes (int): Maximum total size of the cached responses, in bytes.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.generation : int | None = None
+        self.hits = 0
+        self.misses = 0
+        self._entries : OrderedDict[Hashable, tuple[bytes, str]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+    def __len__(self) -> int:
+        """_Returns the number of cached responses._"""
+        return len(self._entries)
+    @staticmethod
+    def get_etag(content : bytes) -> str:
+        """_Returns the strong ETag of a response content._
+
+        Args:
+            content (bytes): The encoded response.
+
+        Returns:
+            str: The quoted ETag.
+        """
+        return f'"{hashlib.blake2b(content, digest_size=16).hexdigest()}"'
+    @staticmethod
+    def is_not_modified(if_none_match : str | None, etag : str) -> bool:
+        """_Checks whether an `If-None-Match` header matches an ETag._
+
+        As required for `If-None-Match`, the weak comparison is used, so
+        `W/"..."` validators returned by a proxy also match.
+
+        Args:
+            if_none_match (str | None): The value of the header, if any.
+            etag (str): The ETag of the current response.
+
+        Returns:
+            bool: True if the client already has the current response.
+        """
+        if not if_none_match:
+            return False
+        for validator in if_none_match.split(","):
+            validator = validator.strip()
+            if validator == "*" or validator.removeprefix("W/") == etag:
+                return True
+        return False
+    def clear(self) -> None:
+        """_Removes all the cached responses._"""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+    def get(self, key : Hashable, generation : int) -> tuple[bytes, str] | None:
+        """_Returns a cached response, marking it as recently used._
+
+        Args:
+            key (Hashable): The key of the response (route and params).
+            generation (int): The current generation of the dataset.
+
+        Returns:
+            tuple[bytes, str] | None: The content and ETag of the response,
+            or None if it is not cached for this generation.
+        """
+        with self._lock:
+            if generation != self.generation:
+                return None
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+    def put(self, key : Hashable, generation : int, content : bytes) -> tuple[bytes, str]:
+        """_Caches a response, evicting the least recently used ones if needed._
+
+        The responses of older generations are removed first.
+
+        Args:
+            key (Hashable): The key of the response (route and params).
+            generation (int): The generation of the dataset the response was built from.
+            content (bytes): The encoded response.
+
+        Returns:
+            tuple[bytes, str]: The content and ETag of the response.
+        """
+        entry = (content, ResponseCache.get_etag(content))
+        with self._lock:
+            if self.generation is not None and generation < self.generation:
+                return entry
+            if generation != self.generation:
+                self._entries.clear()
+                self._size = 0
+                self.generation = generation
+            if self.max_entries <= 0 or len(content) > self.max_bytes:
+                return entry
+            previous_entry = self._entries.pop(key, None)
+            if previous_entry is not None:
+                self._size -= len(previous_entry[0])
+            self._entries[key] = entry
+            self._size += len(content)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, (evicted_content, _) = self._entries.popitem(last=False)
+                self._size -= len(evicted_content)
+        return entry
+    def get_response(
+        self,
+        request : Request,
+        key : Hashable,
+        generation : int,
+        build : Callable[[], bytes]) -> Response:
+        """_Returns the cached JSON response of a key, building and caching it if needed._
+
+        Args:
+            request (Request): The HTTP request, for its `If-None-Match` header.
+            key (Hashable): The key of the response (route and params).
+            generation (int): The current generation of the dataset.
+            build (Callable[[], bytes]): Builds the encoded response on a cache miss.
+
+        Returns:
+            Response: The JSON response with its ETag, or a 304 Not Modified
+            if the client already has it.
+        """
+        entry = self.get(key, generation)
+        if entry is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            entry = self.put(key, generation, build())
+        content, etag = entry
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if ResponseCache.is_not_modified(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=content, media_type="application/json", headers=headers)
+
+# Global cache of the responses of the API
+response_cache = ResponseCache()
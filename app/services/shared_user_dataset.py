@@ -0,0 +1,634 @@
+"""_shared_user_dataset.py_
+
+This module provides the SharedUserDataset class, which shares one copy of the
+users between all the worker processes of the API.
+
+One process loads and validates the users, then publishes them as a generation:
+a directory of memory-mapped NumPy arrays (the columns of a ColumnarUserStore
+and the precomputed indexes), and a `CURRENT` file naming the latest generation.
+The sort orders of the adult users and their search index are built once, by
+the publishing process, and published in the generation next to the columns.
+The other processes attach to the generation read-only, so the pages of the
+dataset are shared through the OS page cache instead of being copied in each
+worker. Publishing a new generation is an atomic rename of the `CURRENT` file.
+
+NumPy is required, and the publication lock uses `fcntl` (POSIX only).
+"""
+# pylint: disable=too-many-instance-attributes
+
+import json
+import os
+import shutil
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from contextlib import contextmanager
+from app.models.user import User, ADULT_AGE
+from app.models.user_record import UserRecord
+from app.services.columnar_user_store import ColumnarUserStore, StringColumn, np
+from app.services.user_stats import UserStats, STATS_TOP_N
+from app.services.user_dataset import UserDataset, SortedUsers, SORT_FIELDS
+from app.services.user_filter import UserFilter
+from app.services.user_search_index import UserSearchIndex
+from app.services.user_loader import duplicate_emails_log
+
+USERS_SHARED_DIR = os.environ.get("USERS_SHARED_DIR") or None
+SHARED_DATASET_POLL_INTERVAL = 1.0
+CURRENT_GENERATION_FILE = "CURRENT"
+LOCK_FILE = ".lock"
+METADATA_FILE = "metadata.json"
+# Version of the arrays of a generation: older generations are published again
+SHARED_FORMAT_VERSION = 4
+COLUMN_NAMES = ["ages", "team_codes"]
+# Each string column is saved as 3 arrays: <name>_codes, <name>_offsets and <name>_buffer
+STRING_COLUMN_NAMES = ["names", "emails", "start_dates"]
+STRING_ARRAY_SUFFIXES = ["codes", "offsets", "buffer"]
+INDEX_NAMES = ["adult_rows", "minor_rows", "adult_rows_by_team", "team_offsets", "email_rows"]
+# Each sort order of the adult users is saved as 2 arrays: the rows sorted globally,
+# and sorted within each team, between the offsets of the team in `team_offsets`
+SORTED_ROWS_NAMES = {
+    prefix + field: (
+        f"sorted_rows_{field}_{'desc' if prefix else 'asc'}",
+        f"sorted_rows_{field}_{'desc' if prefix else 'asc'}_by_team")
+    for field in SORT_FIELDS for prefix in ("", "-")}
+# The search index, if published, is saved as the texts of the adult users, its sorted
+# entries and trigrams (offsets and buffer of their UTF-8 bytes), and the positions of
+# the adult users of each trigram, between its offsets
+SEARCH_INDEX_NAMES = [
+    "search_texts_offsets", "search_texts_buffer", "search_entries_offsets",
+    "search_entries_buffer", "search_ngrams_offsets", "search_ngrams_buffer",
+    "search_postings_offsets", "search_postings"]
+
+class StringArray(Sequence):
+    """_Read-only strings, stored as the offsets of their UTF-8 bytes in a buffer._
+
+    The strings are read through memory views of the arrays, without creating
+    NumPy objects, so reading a string of a memory-mapped array costs about the
+    same as reading it from a list.
+
+    Attributes:
+        offsets (np.ndarray): Offset of each string in `buffer`, followed by the
+            size of `buffer` (int64).
+        buffer (np.ndarray): UTF-8 bytes of the strings, in order (uint8).
+
+    Example:
+        >>> strings = StringArray(*StringArray.to_arrays(["bob", "alice"]))
+        >>> strings[1]
+        'alice'
+    """
+    def __init__(self, offsets, buffer):
+        """_Initializes the strings from their arrays._
+
+        Args:
+            offsets (np.ndarray): Offsets of the strings in `buffer`, followed by its size.
+            buffer (np.ndarray): UTF-8 bytes of the strings.
+        """
+        self.offsets = offsets
+        self.buffer = buffer
+        self._offsets_view = memoryview(offsets)
+        self._buffer_view = memoryview(buffer)
+    @staticmethod
+    def to_arrays(values : list[str]) -> tuple:
+        """_Returns the arrays of strings._
+
+        Args:
+            values (list[str]): The strings.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: The offsets and the buffer of the strings.
+        """
+        encoded_values = [value.encode("utf-8") for value in values]
+        offsets = np.zeros(len(encoded_values) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded_values], out=offsets[1:])
+        return offsets, np.frombuffer(b"".join(encoded_values), dtype=np.uint8)
+    def __len__(self) -> int:
+        """_Returns the number of strings._"""
+        return len(self._offsets_view) - 1
+    def __getitem__(self, index : int) -> str:
+        """_Returns the string at a position._"""
+        offsets = self._offsets_view
+        return str(self._buffer_view[offsets[index]:offsets[index + 1]], "utf-8")
+
+class SortedStringArray(StringArray):
+    """_Read-only sorted strings, bisected like a BlockList._
+
+    UTF-8 bytes sort like the code points of the strings, so sorted strings
+    stay sorted in their arrays. The entries of the search index of a
+    generation are memory-mapped this way.
+
+    Example:
+        >>> strings = SortedStringArray(*SortedStringArray.to_arrays(["alice", "bob"]))
+        >>> strings.bisect("b".__gt__)
+        1
+    """
+    def bisect(self, is_before : Callable[[str], bool]) -> int:
+        """_Returns the position of the first string not before a place, as `BlockList.bisect`._"""
+        return bisect_left(range(len(self)), True, key=lambda index: not is_before(self[index]))
+    def iter_range(self, start : int, end : int) -> Iterator[str]:
+        """_Iterates over the strings of a range of positions._"""
+        return map(self.__getitem__, range(start, end))
+
+class SharedUserDataset:
+    """_Read-only view of a generation of users published in a shared directory._
+
+    The adult users of each team are stored contiguously in `adult_rows_by_team`,
+    between the offsets of the team in `team_offsets`, so a team lookup is a slice.
+    The rows of the adult users are also stored in each sort order, globally and
+    within each team between the same offsets, so a sorted page is a slice too.
+    The rows sorted by lowercase email are stored in `email_rows`, so an email
+    lookup is a bisection.
+    The search index of the adult users, if published, is read from its arrays:
+    only the dictionary of its trigrams is built when the generation is attached.
+    The stats of the adult users are computed with vectorized operations when
+    the generation is attached.
+
+    Attributes:
+        generation (str): Name of the generation.
+        source_key (tuple | None): Key of the CSV content the generation was loaded from.
+        store (ColumnarUserStore): Memory-mapped columns of the users.
+
+    Example:
+        >>> generation = SharedUserDataset.publish(users, "/dev/shm/users", source_key)
+        >>> dataset = SharedUserDataset.attach("/dev/shm/users", generation)
+        >>> dataset.get_adult_users_of_team("Backend")
+    """
+    def __init__(self, shared_dir : str, generation : str):
+        """_Attaches to a published generation, memory-mapping its arrays read-only._
+
+        Args:
+            shared_dir (str): The shared directory.
+            generation (str): Name of the generation to attach to.
+
+        Raises:
+            RuntimeError: If NumPy is not installed.
+            OSError: If the generation cannot be read.
+        """
+        if np is None:
+            raise RuntimeError("The shared user dataset requires NumPy to be installed")
+        generation_dir = os.path.join(shared_dir, generation)
+        with open(os.path.join(generation_dir, METADATA_FILE),
+                  encoding="utf-8") as metadata_file:
+            metadata = json.load(metadata_file)
+        names = COLUMN_NAMES + INDEX_NAMES + [
+            name for sorted_rows_names in SORTED_ROWS_NAMES.values() for name in sorted_rows_names]
+        if metadata["search_index"]:
+            names += SEARCH_INDEX_NAMES
+        arrays = {
+            name: np.load(os.path.join(generation_dir, f"{name}.npy"), mmap_mode="r")
+            for name in names
+        }
+        string_columns = {
+            name: StringColumn(*(
+                np.load(os.path.join(generation_dir, f"{name}_{suffix}.npy"), mmap_mode="r")
+                for suffix in STRING_ARRAY_SUFFIXES))
+            for name in STRING_COLUMN_NAMES
+        }
+        self.generation = generation
+        self.source_key = tuple(metadata["source_key"]) if metadata["source_key"] else None
+        self.store = ColumnarUserStore(
+            ages=arrays["ages"],
+            team_codes=arrays["team_codes"],
+            teams=metadata["teams"],
+            **string_columns)
+        self._adult_rows = arrays["adult_rows"]
+        self._minor_rows = arrays["minor_rows"]
+        self._adult_rows_by_team = arrays["adult_rows_by_team"]
+        self._team_offsets = arrays["team_offsets"]
+        self._email_rows = arrays["email_rows"]
+        self._sorted_rows : dict[str, tuple[np.ndarray, np.ndarray]] = {
+            sort: (arrays[name], arrays[name_by_team])
+            for sort, (name, name_by_team) in SORTED_ROWS_NAMES.items()}
+        self._search_index : UserSearchIndex | None = None
+        if metadata["search_index"]:
+            self._search_index = self._attach_search_index(arrays)
+        self._build_stats()
+    def __len__(self) -> int:
+        """_Returns the number of users of the generation._"""
+        return len(self.store)
+    @staticmethod
+    def attach(shared_dir : str, generation : str) -> "SharedUserDataset":
+        """_Attaches to a published generation._
+
+        Args:
+            shared_dir (str): The shared directory.
+            generation (str): Name of the generation to attach to.
+
+        Returns:
+            SharedUserDataset: The read-only dataset of the generation.
+        """
+        return SharedUserDataset(shared_dir, generation)
+    @staticmethod
+    def get_current_generation(shared_dir : str) -> str | None:
+        """_Returns the name of the latest published generation._
+
+        Args:
+            shared_dir (str): The shared directory.
+
+        Returns:
+            str | None: The name of the generation, or None if nothing was published.
+        """
+        try:
+            with open(os.path.join(shared_dir, CURRENT_GENERATION_FILE),
+                      encoding="utf-8") as current_file:
+                return current_file.read().strip() or None
+        except FileNotFoundError:
+            return None
+    @staticmethod
+    def get_source_key(shared_dir : str, generation : str) -> tuple | None:
+        """_Returns the key of the CSV content a generation was loaded from._
+
+        Args:
+            shared_dir (str): The shared directory.
+            generation (str): Name of the generation.
+
+        Returns:
+            tuple | None: The key of the CSV content, or None if it is unknown
+            or if the generation was published in an older format.
+        """
+        with open(os.path.join(shared_dir, generation, METADATA_FILE),
+                  encoding="utf-8") as metadata_file:
+            metadata = json.load(metadata_file)
+        if metadata.get("format") != SHARED_FORMAT_VERSION:
+            return None
+        source_key = metadata["source_key"]
+        return tuple(source_key) if source_key else None
+    @staticmethod
+    @contextmanager
+    def lock(shared_dir : str):
+        """_Context manager holding the exclusive publication lock of the shared directory._
+
+        Only one process at a time loads and publishes the users, the others
+        wait for the lock and then attach to the published generation.
+
+        Args:
+            shared_dir (str): The shared directory.
+        """
+        import fcntl  # pylint: disable=import-outside-toplevel
+        os.makedirs(shared_dir, exist_ok=True)
+        with open(os.path.join(shared_dir, LOCK_FILE), "a", encoding="utf-8") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    @staticmethod
+    def publish(
+        users_data : list[User],
+        shared_dir : str,
+        source_key : tuple | None = None,
+        search_index : bool = True) -> str:
+        """_Publishes the users as a new generation of the shared directory._
+
+        The generation is fully written before the `CURRENT` file is atomically
+        replaced, so processes never attach to a partial generation. Generations
+        older than the previous one are removed; processes still mapping them
+        keep their pages until they swap.
+
+        The emails found more than once are reported by `duplicate_emails_log`,
+        and only the first user of each email is found by `get_user_by_email`.
+
+        Args:
+            users_data (list[User]): The validated users to publish, in their original order.
+            shared_dir (str): The shared directory.
+            source_key (tuple | None): Key of the CSV content the users were loaded from.
+            search_index (bool): Whether to build and publish the search index,
+                otherwise built by each process on its first search.
+
+        Returns:
+            str: The name of the new generation.
+        """
+        store = ColumnarUserStore.from_users(users_data)
+        adult_rows = store.get_adult_users_of()
+        adult_team_codes = store.team_codes[adult_rows]
+        team_counts = np.bincount(adult_team_codes, minlength=len(store.teams))
+        arrays = {
+            "ages": store.ages,
+            "team_codes": store.team_codes,
+            "adult_rows": adult_rows,
+            "minor_rows": np.flatnonzero(store.ages < ADULT_AGE),
+            "adult_rows_by_team": adult_rows[np.argsort(adult_team_codes, kind="stable")],
+            "team_offsets": np.concatenate(([0], np.cumsum(team_counts))),
+            "email_rows": SharedUserDataset._get_email_rows(users_data),
+        }
+        for name in STRING_COLUMN_NAMES:
+            string_column = getattr(store, name)
+            for suffix in STRING_ARRAY_SUFFIXES:
+                arrays[f"{name}_{suffix}"] = getattr(string_column, suffix)
+        arrays.update(SharedUserDataset._get_sorted_rows_arrays(store, adult_rows))
+        if search_index:
+            arrays.update(SharedUserDataset._get_search_index_arrays(store, adult_rows))
+        return SharedUserDataset._write_generation(shared_dir, arrays, {
+            "format": SHARED_FORMAT_VERSION,
+            "teams": store.teams,
+            "source_key": source_key,
+            "search_index": search_index,
+        })
+    @staticmethod
+    def _get_sorted_rows_arrays(store : ColumnarUserStore, adult_rows) -> dict:
+        """_Returns the rows of the adult users in each sort order, globally and by team._
+
+        Args:
+            store (ColumnarUserStore): The columns of the users.
+            adult_rows (np.ndarray): The rows of the adult users, increasing.
+
+        Returns:
+            dict[str, np.ndarray]: The arrays of `SORTED_ROWS_NAMES`, by name.
+        """
+        arrays = {}
+        for sort, (name, name_by_team) in SORTED_ROWS_NAMES.items():
+            field, descending = UserDataset.parse_sort(sort)
+            sorted_rows = store.get_sorted_rows(adult_rows, field, descending)
+            arrays[name] = sorted_rows
+            # A stable sort by team keeps the sort order within each team
+            arrays[name_by_team] = sorted_rows[
+                np.argsort(store.team_codes[sorted_rows], kind="stable")]
+        return arrays
+    @staticmethod
+    def _get_search_index_arrays(store : ColumnarUserStore, adult_rows) -> dict:
+        """_Builds the search index of the adult users, and returns its arrays._
+
+        The positions of the users in the index are their positions in `adult_rows`.
+
+        Args:
+            store (ColumnarUserStore): The columns of the users.
+            adult_rows (np.ndarray): The rows of the adult users, increasing.
+
+        Returns:
+            dict[str, np.ndarray]: The arrays of `SEARCH_INDEX_NAMES`, by name.
+        """
+        texts, entries, ngram_positions = UserSearchIndex.build_parts(
+            store.names.get_values(adult_rows), store.emails.get_values(adult_rows))
+        ngrams = sorted(ngram_positions)
+        postings_offsets = np.zeros(len(ngrams) + 1, dtype=np.int64)
+        np.cumsum([len(ngram_positions[ngram]) for ngram in ngrams], out=postings_offsets[1:])
+        texts_offsets, texts_buffer = StringArray.to_arrays(list(texts.values()))
+        entries_offsets, entries_buffer = SortedStringArray.to_arrays(entries)
+        ngrams_offsets, ngrams_buffer = SortedStringArray.to_arrays(ngrams)
+        return {
+            "search_texts_offsets": texts_offsets,
+            "search_texts_buffer": texts_buffer,
+            "search_entries_offsets": entries_offsets,
+            "search_entries_buffer": entries_buffer,
+            "search_ngrams_offsets": ngrams_offsets,
+            "search_ngrams_buffer": ngrams_buffer,
+            "search_postings_offsets": postings_offsets,
+            # The postings are arrays of unsigned 4-byte integers, concatenated
+            "search_postings": np.frombuffer(
+                b"".join(ngram_positions[ngram].tobytes() for ngram in ngrams), dtype=np.uint32),
+        }
+    def _attach_search_index(self, arrays : dict) -> UserSearchIndex:
+        """_Returns the search index of the adult users, reading its published arrays._
+
+        Args:
+            arrays (dict[str, np.ndarray]): The memory-mapped arrays of the generation.
+
+        Returns:
+            UserSearchIndex: The index, searching the arrays without copying them.
+        """
+        ngrams = SortedStringArray(arrays["search_ngrams_offsets"], arrays["search_ngrams_buffer"])
+        # Slices of a memory view iterate over plain integers, without copying the postings
+        postings = memoryview(arrays["search_postings"])
+        postings_offsets = arrays["search_postings_offsets"].tolist()
+        return UserSearchIndex.from_parts(
+            StringArray(arrays["search_texts_offsets"], arrays["search_texts_buffer"]),
+            SortedStringArray(arrays["search_entries_offsets"], arrays["search_entries_buffer"]),
+            {ngram: postings[postings_offsets[index]:postings_offsets[index + 1]]
+             for index, ngram in enumerate(ngrams)})
+    @staticmethod
+    def _get_email_rows(users_data : list[User]):
+        """_Returns the rows sorted by lowercase email, reporting the duplicate emails._
+
+        Args:
+            users_data (list[User]): The users, in their original order.
+
+        Returns:
+            np.ndarray: The rows, in increasing lowercase email, then original order.
+        """
+        email_keys = [user.email.lower() for user in users_data]
+        email_rows = np.array(sorted(range(len(users_data)), key=email_keys.__getitem__),
+                              dtype=np.int64)
+        for index in range(1, len(email_rows)):
+            if email_keys[email_rows[index]] == email_keys[email_rows[index - 1]]:
+                duplicate_emails_log.warning(
+                    "Duplicate email %s: user %s not indexed, %s kept",
+                    users_data[email_rows[index]].email, users_data[email_rows[index]].name,
+                    users_data[email_rows[index - 1]].name)
+        return email_rows
+    @staticmethod
+    def _write_generation(shared_dir : str, arrays : dict, metadata : dict) -> str:
+        """_Writes a new generation, makes it the current one, and removes the older ones._
+
+        Args:
+            shared_dir (str): The shared directory.
+            arrays (dict[str, np.ndarray]): The arrays of the generation, by name.
+            metadata (dict): The metadata of the generation.
+
+        Returns:
+            str: The name of the new generation.
+        """
+        previous_generation = SharedUserDataset.get_current_generation(shared_dir)
+        generation = f"{time.time_ns()}-{os.getpid()}"
+        generation_dir = os.path.join(shared_dir, generation)
+        os.makedirs(generation_dir)
+        for name, array in arrays.items():
+            np.save(os.path.join(generation_dir, f"{name}.npy"), array)
+        with open(os.path.join(generation_dir, METADATA_FILE), "w",
+                  encoding="utf-8") as metadata_file:
+            json.dump(metadata, metadata_file)
+        current_path = os.path.join(shared_dir, CURRENT_GENERATION_FILE)
+        with open(current_path + ".tmp", "w", encoding="utf-8") as current_file:
+            current_file.write(generation)
+        os.replace(current_path + ".tmp", current_path)
+        for old_generation in os.listdir(shared_dir):
+            old_generation_dir = os.path.join(shared_dir, old_generation)
+            if (old_generation not in (generation, previous_generation)
+                    and os.path.isdir(old_generation_dir)):
+                shutil.rmtree(old_generation_dir, ignore_errors=True)
+        return generation
+    def _build_stats(self) -> None:
+        """_Computes the stats of the adult users, globally and for each team._"""
+        store = self.store
+        self._adult_stats = UserStats.from_aggregates(
+            count=len(self._adult_rows),
+            age_sum=int(store.ages[self._adult_rows].sum()),
+            oldest_users=store.to_records(
+                store.get_n_oldest_users(self._adult_rows, STATS_TOP_N)))
+        self._adult_stats_by_team : dict[str, UserStats] = {}
+        for team_code, team in enumerate(store.teams):
+            team_rows = self._get_adult_rows_of_team_code(team_code)
+            if len(team_rows) == 0:
+                continue
+            self._adult_stats_by_team[team] = UserStats.from_aggregates(
+                count=len(team_rows),
+                age_sum=int(store.ages[team_rows].sum()),
+                oldest_users=store.to_records(
+                    store.get_n_oldest_users(team_rows, STATS_TOP_N)))
+    def _get_adult_rows_of_team_code(self, team_code : int):
+        """_Returns the rows of the adult users of a team, in their original order._
+
+        Args:
+            team_code (int): The code of the team.
+
+        Returns:
+            np.ndarray: A read-only slice of the shared team index.
+        """
+        start, end = self._team_offsets[team_code], self._team_offsets[team_code + 1]
+        return self._adult_rows_by_team[start:end]
+    def get_encoded_users(self, users_data : list[User | UserRecord]) -> list[bytes]:
+        """_Returns the JSON encoding of users._
+
+        The users of a shared generation are built on demand, so they are
+        encoded on demand too.
+
+        Args:
+            users_data (list[User | UserRecord]): The users to encode.
+
+        Returns:
+            list[bytes]: The JSON encoding of each user, in order.
+        """
+        return [UserDataset.encode_user(user) for user in users_data]
+    def iter_encoded_users(self, users_data : Iterable[User | UserRecord]) -> Iterator[bytes]:
+        """_Returns an iterator over the JSON encoding of users, one user at a time._
+
+        Args:
+            users_data (Iterable[User | UserRecord]): The users to encode.
+
+        Returns:
+            Iterator[bytes]: The JSON encoding of each user, in order.
+        """
+        return map(UserDataset.encode_user, users_data)
+    def get_user_by_email(self, email : str) -> UserRecord | None:
+        """_Returns the user of an email, bisecting the rows sorted by lowercase email._
+
+        Args:
+            email (str): The email, case-insensitive.
+
+        Returns:
+            UserRecord | None: The first user with this email, or None if it is unknown.
+        """
+        email_key = email.lower()
+        emails = self.store.emails
+        email_rows = self._email_rows
+        def get_email_key(index):
+            return emails[email_rows[index]].lower()
+        index = bisect_left(range(len(email_rows)), email_key, key=get_email_key)
+        if index == len(email_rows) or get_email_key(index) != email_key:
+            return None
+        return self.store.to_records(email_rows[index:index + 1])[0]
+    def get_columnar_store(self) -> ColumnarUserStore:
+        """_Returns the memory-mapped columnar store of the users._"""
+        return self.store
+    def get_users(self) -> SortedUsers:
+        """_Returns all the users, in their original order._
+
+        The users are a lazy view of the rows: only the users read are built.
+        """
+        return SortedUsers(self.store.get_rows(), self.store.to_records)
+    def get_adult_users(self) -> SortedUsers:
+        """_Returns the adult users, in their original order, as a lazy view of the rows._"""
+        return SortedUsers(self._adult_rows, self.store.to_records)
+    def get_minor_users(self) -> SortedUsers:
+        """_Returns the minor users, in their original order, as a lazy view of the rows._"""
+        return SortedUsers(self._minor_rows, self.store.to_records)
+    def get_adult_users_of_team(self, team : str) -> SortedUsers:
+        """_Returns the adult users of a team, in their original order._
+
+        Args:
+            team (str): The team name.
+
+        Returns:
+            SortedUsers: A lazy view of the rows of the adult users of the team,
+            empty if the team is unknown.
+        """
+        team_code = self.store.get_team_code(team)
+        if team_code is None:
+            return SortedUsers(self._adult_rows[:0], self.store.to_records)
+        return SortedUsers(self._get_adult_rows_of_team_code(team_code), self.store.to_records)
+    def get_sorted_adult_users(self, sort : str, team : str | None = None) -> SortedUsers:
+        """_Returns the adult users in a sort order, optionally of a team._
+
+        The rows are read from the sort orders published with the generation.
+
+        Args:
+            sort (str): The sort order, a field of `SORT_FIELDS` optionally prefixed by "-".
+            team (str | None): Optional team name.
+
+        Returns:
+            SortedUsers: The adult users in the sort order, empty if the team is unknown.
+
+        Raises:
+            ValueError: If the sort order is invalid.
+        """
+        UserDataset.parse_sort(sort)
+        sorted_rows, sorted_rows_by_team = self._sorted_rows[sort]
+        if team is not None:
+            team_code = self.store.get_team_code(team)
+            if team_code is None:
+                sorted_rows = sorted_rows[:0]
+            else:
+                start, end = self._team_offsets[team_code], self._team_offsets[team_code + 1]
+                sorted_rows = sorted_rows_by_team[start:end]
+        return SortedUsers(sorted_rows, self.store.to_records)
+    def filter_adult_users(self, user_filter : UserFilter, sort : str | None = None) -> SortedUsers:
+        """_Returns the adult users matching a filter, optionally in a sort order._
+
+        The filter is evaluated with vectorized masks over the shared columns.
+
+        Args:
+            user_filter (UserFilter): The filter.
+            sort (str | None): Optional sort order. If None, the users are in
+                their original order.
+
+        Returns:
+            SortedUsers: The matching adult users.
+
+        Raises:
+            ValueError: If the sort order is invalid.
+        """
+        sort_field, descending = UserDataset.parse_sort(sort) if sort is not None else (None, False)
+        rows = self.store.get_filtered_rows(self._adult_rows, user_filter)
+        if sort_field is not None:
+            rows = self.store.get_sorted_rows(rows, sort_field, descending)
+        return SortedUsers(rows, self.store.to_records)
+    def get_search_index(self) -> UserSearchIndex:
+        """_Returns the search index of the adult users, by their positions in `adult_rows`._
+
+        The index is read from the generation if it was published with it,
+        otherwise built in the memory of the process on the first call.
+        """
+        if self._search_index is None:
+            self._search_index = UserSearchIndex(
+                self.store.names.get_values(self._adult_rows),
+                self.store.emails.get_values(self._adult_rows))
+        return self._search_index
+    def search_adult_users(self, query : str, max_results : int) -> SortedUsers:
+        """_Returns the adult users whose name or email matches a query, best matches first._
+
+        Args:
+            query (str): The query, matched case-insensitively.
+            max_results (int): Maximum number of results.
+
+        Returns:
+            SortedUsers: The matching adult users, ranked.
+        """
+        positions = self.get_search_index().search(query, max_results)
+        return SortedUsers(
+            self._adult_rows[np.array(positions, dtype=np.int64)], self.store.to_records)
+    def get_adult_stats_by_team(self) -> dict[str, UserStats]:
+        """_Returns the stats of the adult users of each team, keyed by team name._
+
+        The returned dictionary is the precomputed index and must not be modified.
+        """
+        return self._adult_stats_by_team
+    def get_adult_stats(self, team : str | None = None) -> UserStats:
+        """_Returns the stats of the adult users, optionally of a team._
+
+        Args:
+            team (str | None): Optional team name. If None, the stats cover all adult users.
+
+        Returns:
+            UserStats: The stats, empty if the team is unknown.
+        """
+        if team is None:
+            return self._adult_stats
+        return self._adult_stats_by_team.get(team) or UserStats()
@@ -0,0 +1,280 @@
+"""_user_change_log.py_
+
+This module provides the UserChangeLog class, the append-only log of the
+writes to the users (upserts and deletes by email), and its compaction back
+into the CSV file.
+
+Each write is appended to the log (`<csv>.changes`, one JSON object per line)
+before it is applied in memory, and the log is replayed on top of the CSV
+file when the users are reloaded, so the writes survive a restart without
+rewriting the CSV file on each of them.
+
+When the log reaches `USERS_CHANGE_LOG_COMPACT_EVERY` changes, it is merged
+into the CSV file in a background thread:
+    - the log is renamed to `<csv>.changes.compacting`, the next writes go to a new log;
+    - the changes are applied to the rows of the CSV file, written to a
+      temporary file then atomically renamed, the other rows unchanged;
+    - the renamed log is removed.
+
+The signatures (modification time and size) of the CSV file read and written
+by the last compaction are kept, so the file watcher can recognize the
+rewrite, whose changes are already applied in memory, instead of reloading
+the file.
+
+A compaction interrupted before the removal is finished on the next one,
+and replaying changes already merged into the CSV file gives the same users,
+as long as their emails are unique.
+"""
+# pylint: disable=too-many-instance-attributes
+
+import csv
+import json
+import os
+import threading
+from pydantic_core import to_json
+from app.models.user import User
+from app.services.user_dataset import UserDataset
+from app.services.user_loader import UserLoader, USER_CSV_FIELDS
+from app.services.logger_service import logger_service
+
+USERS_CHANGE_LOG_ENABLED = os.environ.get("USERS_CHANGE_LOG_ENABLED", "1") == "1"
+USERS_CHANGE_LOG_COMPACT_EVERY = int(os.environ.get("USERS_CHANGE_LOG_COMPACT_EVERY", "1000"))
+USERS_CHANGE_LOG_FSYNC = os.environ.get("USERS_CHANGE_LOG_FSYNC", "0") == "1"
+CHANGE_LOG_SUFFIX = ".changes"
+COMPACTING_SUFFIX = ".compacting"
+UPSERT = "upsert"
+DELETE = "delete"
+
+class UserChangeLog:
+    """_Append-only log of the writes to the users of a CSV file, compacted into it._
+
+    The changes are (operation, value) pairs: (`UPSERT`, User) or (`DELETE`, email).
+
+    Attributes:
+        csv_path (str): Path to the CSV file.
+        path (str): Path to the log.
+        compacting_path (str): Path to the log being merged into the CSV file.
+        compact_every (int): Number of changes of the log which triggers a compaction.
+        fsync (bool): Whether each change is flushed to the disk before being applied.
+        nb_changes (int): Number of changes in the log.
+        last_compaction (tuple[tuple[int, int], tuple[int, int]] | None): The
+            (modification time in ns, size) of the CSV file read, then written,
+            by the last compaction, None before the first one.
+        compaction_lock (threading.Lock): Held while the CSV file is being rewritten.
+            A reload holds it too, so the CSV file and the logs it reads stay consistent.
+
+    Example:
+        >>> change_log = UserChangeLog(CSV_PATH)
+        >>> change_log.append_upsert(user)
+        >>> for operation, value in change_log.read_changes():
+        ...     print(operation, value)
+    """
+    def __init__(
+        self,
+        csv_path : str,
+        compact_every : int = USERS_CHANGE_LOG_COMPACT_EVERY,
+        fsync : bool = USERS_CHANGE_LOG_FSYNC):
+        """_Initializes the log of a CSV file, counting the changes already logged._
+
+        Args:
+            csv_path (str): Path to the CSV file.
+            compact_every (int): Number of changes which triggers a compaction.
+                Defaults to `USERS_CHANGE_LOG_COMPACT_EVERY`.
+            fsync (bool): Whether each change is flushed to the disk. Defaults to
+                `USERS_CHANGE_LOG_FSYNC`.
+        """
+        self.csv_path = csv_path
+        self.path = csv_path + CHANGE_LOG_SUFFIX
+        self.compacting_path = self.path + COMPACTING_SUFFIX
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.nb_changes = len(UserChangeLog._read_change_file(self.path))
+        self.last_compaction : tuple[tuple[int, int], tuple[int, int]] | None = None
+        self.compaction_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._file = None
+        self._compaction_thread : threading.Thread | None = None
+    def append_upsert(self, user : User) -> None:
+        """_Logs the upsert of a user._
+
+        Raises:
+            OSError: If the change cannot be written.
+        """
+        self._append({"op": UPSERT, "user": user})
+    def append_delete(self, email : str) -> None:
+        """_Logs the delete of the user of an email._
+
+        Raises:
+            OSError: If the change cannot be written.
+        """
+        self._append({"op": DELETE, "email": email})
+    def _append(self, change : dict) -> None:
+        """_Appends a change to the log, as a line of JSON._"""
+        line = to_json(change) + b"\n"
+        with self._lock:
+            if self._file is None:
+                self._file = open(self.path, "ab")  # pylint: disable=consider-using-with
+            self._file.write(line)
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self.nb_changes += 1
+    def read_changes(self) -> list[tuple[str, User | str]]:
+        """_Returns the changes not merged into the CSV file yet, in order._
+
+        Returns:
+            list[tuple[str, User | str]]: The changes of the log being compacted, if any,
+            then those of the log.
+        """
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+        return (UserChangeLog._read_change_file(self.compacting_path)
+                + UserChangeLog._read_change_file(self.path))
+    @staticmethod
+    def _read_change_file(path : str) -> list[tuple[str, User | str]]:
+        """_Reads the changes of a log file, skipping the invalid lines._
+
+        A partial last line, left by a crash while a change was appended, is an invalid line.
+
+        Args:
+            path (str): Path to the log file.
+
+        Returns:
+            list[tuple[str, User | str]]: The changes, empty if the file does not exist.
+        """
+        changes : list[tuple[str, User | str]] = []
+        try:
+            change_file = open(path, "rb")  # pylint: disable=consider-using-with
+        except FileNotFoundError:
+            return changes
+        with change_file:
+            for i_line, line in enumerate(change_file, start=1):
+                try:
+                    change = json.loads(line)
+                    if change["op"] == UPSERT:
+                        changes.append((UPSERT, User.model_validate(change["user"])))
+                    elif change["op"] == DELETE:
+                        changes.append((DELETE, str(change["email"])))
+                    else:
+                        raise ValueError(f"Unknown operation {change['op']}")
+                except (ValueError, KeyError, TypeError) as e:
+                    logger_service.warning(
+                        "Change log %s - Line %s skipped: %s", path, i_line, e)
+        return changes
+    @staticmethod
+    def apply_changes(dataset : UserDataset, changes : list[tuple[str, User | str]]) -> None:
+        """_Applies changes to a dataset, in order._
+
+        Args:
+            dataset (UserDataset): The dataset to modify.
+            changes (list[tuple[str, User | str]]): The changes.
+        """
+        for operation, value in changes:
+            if operation == UPSERT:
+                dataset.upsert_user(value)
+            else:
+                dataset.delete_user(value)
+    def should_compact(self) -> bool:
+        """_Returns True if the log has reached `compact_every` changes._"""
+        return self.nb_changes >= self.compact_every
+    def request_compaction(self) -> bool:
+        """_Starts a compaction in a background thread, unless one is running._
+
+        Returns:
+            bool: True if a compaction was started.
+        """
+        with self._lock:
+            if self._compaction_thread is not None and self._compaction_thread.is_alive():
+                return False
+            self._compaction_thread = threading.Thread(
+                target=self._run_compaction, name="users-change-log-compaction", daemon=True)
+            self._compaction_thread.start()
+        return True
+    def _run_compaction(self) -> None:
+        """_Compacts the log, logging the errors of the background thread._"""
+        try:
+            self.compact()
+        except (OSError, ValueError) as e:
+            logger_service.error("Change log %s not compacted: %s", self.path, e)
+    def compact(self) -> int:
+        """_Merges the changes of the log into the CSV file, and removes them from the log._
+
+        Returns:
+            int: The number of changes merged.
+
+        Raises:
+            OSError: If the CSV file cannot be rewritten.
+            ValueError: If the CSV header does not match `USER_CSV_FIELDS`.
+        """
+        with self.compaction_lock:
+            with self._lock:
+                if not os.path.exists(self.compacting_path):
+                    if not os.path.exists(self.path):
+                        return 0
+                    if self._file is not None:
+                        self._file.close()
+                        self._file = None
+                    os.replace(self.path, self.compacting_path)
+                    self.nb_changes = 0
+            changes = UserChangeLog._read_change_file(self.compacting_path)
+            self.last_compaction = UserChangeLog.merge_changes_into_csv(self.csv_path, changes)
+            os.remove(self.compacting_path)
+        logger_service.info(
+            "Change log compacted: %s changes merged into %s", len(changes), self.csv_path)
+        return len(changes)
+    @staticmethod
+    def merge_changes_into_csv(
+        csv_path : str,
+        changes : list[tuple[str, User | str]]) -> tuple[tuple[int, int], tuple[int, int]]:
+        """_Rewrites a CSV file with changes applied to its rows._
+
+        The changes are applied like `UserDataset.upsert_user` and `delete_user`:
+        an upsert replaces the first valid row of the email, or appends a row,
+        and a delete removes the first valid row of the email. The other rows,
+        invalid ones included, are written back unchanged.
+
+        Args:
+            csv_path (str): Path to the CSV file.
+            changes (list[tuple[str, User | str]]): The changes, in order.
+
+        Returns:
+            tuple[tuple[int, int], tuple[int, int]]: The (modification time in ns,
+            size) of the file once read, and once rewritten.
+
+        Raises:
+            OSError: If the CSV file cannot be rewritten.
+            ValueError: If the CSV header does not match `USER_CSV_FIELDS`.
+        """
+        with open(csv_path, newline="", encoding="utf-8") as csvfile:
+            rows : list[list[str] | None] = list(csv.reader(csvfile))
+            read_stat = os.fstat(csvfile.fileno())
+        if not rows or rows[0] != USER_CSV_FIELDS:
+            raise ValueError(f"Invalid CSV header: expected {USER_CSV_FIELDS}, got {rows[:1]}")
+        row_indexes_by_email : dict[str, list[int]] = {}
+        for i_row in range(1, len(rows)):
+            user = UserLoader.parse_user_row(dict(zip(USER_CSV_FIELDS, rows[i_row])))
+            if user is not None:
+                row_indexes_by_email.setdefault(
+                    UserDataset.get_email_key(user.email), []).append(i_row)
+        for operation, value in changes:
+            if operation == UPSERT:
+                row_indexes = row_indexes_by_email.setdefault(
+                    UserDataset.get_email_key(value.email), [])
+                row = [value.name, value.email, str(value.age), value.team, value.start_date]
+                if row_indexes:
+                    rows[row_indexes[0]] = row
+                else:
+                    row_indexes.append(len(rows))
+                    rows.append(row)
+            else:
+                row_indexes = row_indexes_by_email.get(UserDataset.get_email_key(value))
+                if row_indexes:
+                    rows[row_indexes.pop(0)] = None
+        with open(csv_path + ".tmp", "w", newline="", encoding="utf-8") as csvfile:
+            writer = csv.writer(csvfile, lineterminator="\n")
+            writer.writerows(row for row in rows if row is not None)
+        os.replace(csv_path + ".tmp", csv_path)
+        written_stat = os.stat(csv_path)
+        return ((read_stat.st_mtime_ns, read_stat.st_size),
+                (written_stat.st_mtime_ns, written_stat.st_size))
@@ -0,0 +1,723 @@
+"""_user_dataset.py_
+
+This module provides the UserDataset class, which holds one version of the
+in-memory users together with their indexes and stats. UserService builds a
+new dataset off to the side when the users are reloaded, then swaps it in
+with a single assignment, so readers never see a half-built dataset.
+
+The users are stored as compact UserRecord instances, built from the validated
+`User` models when they are added. Each record gets the next sequence of the
+dataset, and every list of users (all users, adults, minors, teams) is kept
+in increasing sequence, the order of the data source.
+
+The adult users can be read in a sort order (see `get_sorted_adult_users`):
+the sort orders are built once per dataset, globally and for each team, so a
+sorted page or a top-K is a slice of a sort order.
+The users are indexed by email (case-insensitive) for the point reads, and
+an email found more than once is reported by `duplicate_emails_log`.
+
+The same sort orders answer the range and prefix criteria of the filters
+(see `filter_adult_users`) by bisection. The names and emails of the adult
+users are indexed for the type-ahead search (see `search_adult_users`).
+
+The users can be upserted and deleted one at a time (see `upsert_user` and
+`delete_user`) without rebuilding anything: the lists, the sort orders, the
+stats and the search index are updated in place, each user being found by
+bisection on its sequence or on its sort key. The lists and the sort orders
+are BlockLists, so an insert or a delete only shifts the users of one block
+instead of the whole list.
+"""
+# pylint: disable=too-many-instance-attributes,too-many-public-methods
+
+import dataclasses
+import heapq
+import itertools
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from operator import attrgetter
+from pydantic_core import to_json
+from app.models.user import User, ADULT_AGE
+from app.models.user_record import UserRecord
+from app.services.block_list import BlockList
+from app.services.user_stats import UserStats
+from app.services.columnar_user_store import ColumnarUserStore
+from app.services.user_filter import UserFilter
+from app.services.user_search_index import UserSearchIndex
+from app.services.user_loader import duplicate_emails_log
+
+# Fields the users can be sorted by, "-" prefixed for the descending order
+SORT_FIELDS = ("age", "start_date", "name")
+# Sort orders built with the dataset, the other ones are built on their first read
+PRESORTED_SORTS = ("age", "-age", "start_date", "name")
+SORT_KEYS = {
+    "age": lambda user: user.age,
+    "start_date": lambda user: user.start_date,
+    "name": lambda user: user.name,
+}
+SEQ_KEY = attrgetter("seq")
+# Batches of users larger than this drop the sort orders and the search index,
+# rebuilt on their next read, instead of inserting the users one by one
+INCREMENTAL_MAX_BATCH = 1000
+# Names of the datasets of this process, which the key cursors of the pages refer to
+DATASET_GENERATIONS = itertools.count(1)
+
+class SortedUsers(Sequence):
+    """_Read-only sequence of users in a sort order, backed by a permutation._
+
+    The permutation holds the positions of the users in the sort order, and
+    only the users of a slice are looked up, so a page of a large sorted
+    dataset costs the size of the page. The permutation can also hold the
+    users themselves, with `list` to look them up.
+
+    Attributes:
+        order (Sequence): Positions of the users, in the sort order.
+        get_users (Callable[[Sequence], list[UserRecord]]): Returns the users
+            at the given positions, in order.
+
+    Example:
+        >>> sorted_users = dataset.get_sorted_adult_users("-age")
+        >>> sorted_users[:10]
+    """
+    def __init__(self, order : Sequence, get_users : Callable[[Sequence], list[UserRecord]]):
+        """_Initializes the sequence from a permutation._
+
+        Args:
+            order (Sequence): Positions of the users, in the sort order.
+            get_users (Callable[[Sequence], list[UserRecord]]): Returns the users
+                at the given positions.
+        """
+        self.order = order
+        self.get_users = get_users
+    def __len__(self) -> int:
+        """_Returns the number of users._"""
+        return len(self.order)
+    def __iter__(self):
+        """_Iterates over the users, looking them up in a single batch._"""
+        return iter(self.get_users(self.order))
+    def __getitem__(self, index):
+        """_Returns the user at a position, or the list of the users of a slice._"""
+        if isinstance(index, slice):
+            return self.get_users(self.order[index])
+        return self.get_users([self.order[index]])[0]
+
+class UserDataset:
+    """_In-memory users, with the adult/minor partition, the team index and the stats._
+
+    Attributes:
+        generation (str): Name of the dataset, unique in the process: the sequences
+            of the users are only comparable within a dataset.
+        users (BlockList): The users, in the order of the data source.
+        _adult_users (BlockList): Precomputed view of users aged 18 or older.
+        _minor_users (BlockList): Precomputed view of users younger than 18.
+        _adult_users_by_team (dict[str, BlockList]): Adult users indexed by team name.
+        _adult_stats (UserStats): Aggregates over all the adult users.
+        _adult_stats_by_team (dict[str, UserStats]): Aggregates over the adult users of each team.
+        _columnar_store (ColumnarUserStore | None): Columnar copy of the users, built on demand.
+        _encoded_users (dict[int, bytes]): JSON encoding of each user, keyed by the `id` of the
+            user, so list responses are a concatenation of bytes. The users must not be mutated.
+        _sort_orders (dict[str, dict[str | None, BlockList]]): The adult users
+            (or the adult users of a team) in each sort order, keyed by sort and team.
+        _search_index (UserSearchIndex | None): Search index of the adult users, built on demand.
+        _search_users (dict[int, UserRecord]): The adult users of the search index, keyed
+            by sequence, their position in the index.
+        _users_by_email (dict[str, UserRecord]): The first user of each email, keyed by
+            lowercase email.
+        _duplicate_users_by_email (dict[str, BlockList]): The other users of the
+            emails found more than once, keyed by lowercase email.
+        _next_seq (int): Sequence of the next user added.
+
+    Example:
+        >>> dataset = UserDataset()
+        >>> for users_chunk in UserLoader.load_users_by_chunks():
+        ...     dataset.add_users(users_chunk)
+        >>> dataset.get_adult_users_of_team("Backend")
+    """
+    def __init__(self, users_data : list[User | UserRecord] | None = None):
+        """_Initializes the dataset, indexing the given users in a single pass._
+
+        The adult users are indexed by team, so that team-filtered reads are
+        a dictionary lookup instead of a scan of the whole dataset.
+        The original order of the users is preserved in every index.
+
+        Args:
+            users_data (list[User | UserRecord] | None): Optional initial users.
+        """
+        self.generation = str(next(DATASET_GENERATIONS))
+        self.users = BlockList()
+        self._adult_users = BlockList()
+        self._minor_users = BlockList()
+        self._adult_users_by_team : dict[str, BlockList] = {}
+        self._adult_stats = UserStats(get_sequence=SEQ_KEY)
+        self._adult_stats_by_team : dict[str, UserStats] = {}
+        self._columnar_store : ColumnarUserStore | None = None
+        self._encoded_users : dict[int, bytes] = {}
+        self._sort_orders : dict[str, dict[str | None, BlockList]] = {}
+        self._search_index : UserSearchIndex | None = None
+        self._search_users : dict[int, UserRecord] = {}
+        self._users_by_email : dict[str, UserRecord] = {}
+        self._duplicate_users_by_email : dict[str, BlockList] = {}
+        self._next_seq = 0
+        if users_data is not None:
+            self.add_users(users_data)
+    def __len__(self) -> int:
+        """_Returns the number of users of the dataset._"""
+        return len(self.users)
+    @staticmethod
+    def to_record(user : User | UserRecord) -> UserRecord:
+        """_Returns a new compact record of a user._
+
+        A record is copied, since its sequence belongs to the dataset holding it.
+
+        Args:
+            user (User | UserRecord): The validated user.
+
+        Returns:
+            UserRecord: The record of the user.
+        """
+        if isinstance(user, UserRecord):
+            return dataclasses.replace(user)
+        return UserRecord.from_user(user)
+    @staticmethod
+    def encode_user(user : User | UserRecord) -> bytes:
+        """_Returns the JSON encoding of a user, from its record or its model._
+
+        Args:
+            user (User | UserRecord): The user.
+
+        Returns:
+            bytes: The JSON encoding of the user.
+        """
+        if isinstance(user, UserRecord):
+            return user.to_json()
+        return to_json(user)
+    @staticmethod
+    def get_email_key(email : str) -> str:
+        """_Returns the key of an email in the email index: the lowercase email._
+
+        An email already in lowercase is its own key, so the index does not
+        hold a copy of it.
+
+        Args:
+            email (str): The email.
+
+        Returns:
+            str: The key of the email.
+        """
+        email_key = email.lower()
+        return email if email_key == email else email_key
+    @staticmethod
+    def _insert_by_seq(users_data : BlockList, user : UserRecord) -> None:
+        """_Inserts a user in a list of users in increasing sequence, appending it if last._"""
+        seq = user.seq
+        users_data.insert_sorted(user, lambda other_user: other_user.seq < seq)
+    @staticmethod
+    def _remove_by_seq(users_data : BlockList, user : UserRecord) -> None:
+        """_Removes a user from a list of users in increasing sequence, found by bisection._
+
+        Raises:
+            ValueError: If the user is not in the list.
+        """
+        seq = user.seq
+        if not users_data.remove_sorted(user, lambda other_user: other_user.seq < seq):
+            raise ValueError(f"User not in dataset: {user.email}")
+    @staticmethod
+    def _get_is_before_in_sort_order(
+        user : UserRecord,
+        get_key : Callable[[UserRecord], object],
+        descending : bool) -> Callable[[UserRecord], bool]:
+        """_Returns the predicate of the users before a user in a sort order._
+
+        The users with equal keys are in increasing sequence, in both directions,
+        like the stable sort which built the order.
+
+        Args:
+            user (UserRecord): The user.
+            get_key (Callable[[UserRecord], object]): The sort key.
+            descending (bool): Whether the order is descending.
+
+        Returns:
+            Callable[[UserRecord], bool]: Returns True if a user is before the user
+            in the sort order.
+        """
+        key = get_key(user)
+        seq = user.seq
+        def is_before(other_user : UserRecord) -> bool:
+            other_key = get_key(other_user)
+            if other_key == key:
+                return other_user.seq < seq
+            return other_key > key if descending else other_key < key
+        return is_before
+    def _index_user(self, user : UserRecord, appended : bool = True) -> None:
+        """_Adds a user to the indexes and to the stats, and pre-encodes it in JSON._
+
+        Args:
+            user (UserRecord): The user to index, with its sequence.
+            appended (bool): Whether the user has the highest sequence indexed so far,
+                so it is appended to the lists of users instead of inserted by bisection.
+        """
+        add_by_seq = BlockList.append if appended else UserDataset._insert_by_seq
+        self._encoded_users[id(user)] = user.to_json()
+        self._add_to_email_index(user)
+        if user.age < ADULT_AGE:
+            add_by_seq(self._minor_users, user)
+            return
+        add_by_seq(self._adult_users, user)
+        team_users = self._adult_users_by_team.get(user.team)
+        if team_users is None:
+            team_users = self._adult_users_by_team[user.team] = BlockList()
+        add_by_seq(team_users, user)
+        self._adult_stats.add(user)
+        if user.team not in self._adult_stats_by_team:
+            self._adult_stats_by_team[user.team] = UserStats(get_sequence=SEQ_KEY)
+        self._adult_stats_by_team[user.team].add(user)
+        for sort, orders in self._sort_orders.items():
+            field, descending = UserDataset.parse_sort(sort)
+            get_key = SORT_KEYS[field]
+            is_before = UserDataset._get_is_before_in_sort_order(user, get_key, descending)
+            if user.team not in orders:
+                orders[user.team] = BlockList()
+            for order in (orders[None], orders[user.team]):
+                order.insert_sorted(user, is_before)
+        if self._search_index is not None:
+            self._search_users[user.seq] = user
+            self._search_index.add(user.name, user.email, user.seq)
+    def _add_to_email_index(self, user : UserRecord) -> None:
+        """_Adds a user to the email index, or to the other users of its email._"""
+        email_key = UserDataset.get_email_key(user.email)
+        indexed_user = self._users_by_email.get(email_key)
+        if indexed_user is None:
+            self._users_by_email[email_key] = user
+        else:
+            if indexed_user.seq > user.seq:
+                # An updated user inserted back before the other users of its email
+                self._users_by_email[email_key] = user
+                kept_user, duplicate_user = user, indexed_user
+            else:
+                kept_user, duplicate_user = indexed_user, user
+            duplicate_emails_log.warning(
+                "Duplicate email %s: user %s not indexed, %s kept", duplicate_user.email,
+                duplicate_user.name, kept_user.name)
+            UserDataset._insert_by_seq(
+                self._duplicate_users_by_email.setdefault(email_key, BlockList()), duplicate_user)
+    def add_user(self, user : User | UserRecord) -> None:
+        """_Adds a single user, updating the indexes and the stats incrementally._
+
+        Args:
+            user (User | UserRecord): The user to add, stored as a record.
+        """
+        user = UserDataset.to_record(user)
+        user.seq = self._next_seq
+        self._next_seq += 1
+        self.users.append(user)
+        self._columnar_store = None
+        self._index_user(user)
+    def add_users(self, users_data : list[User | UserRecord]) -> None:
+        """_Adds a batch of users, updating the indexes and the stats incrementally._
+
+        A batch larger than `INCREMENTAL_MAX_BATCH` drops the sort orders and the
+        search index instead, rebuilt on their next read.
+
+        Args:
+            users_data (list[User | UserRecord]): The users to add, in order,
+                stored as records.
+        """
+        users_data = [UserDataset.to_record(user) for user in users_data]
+        for seq, user in enumerate(users_data, start=self._next_seq):
+            user.seq = seq
+        self._next_seq += len(users_data)
+        self.users.extend(users_data)
+        self._columnar_store = None
+        if len(users_data) > INCREMENTAL_MAX_BATCH:
+            self._sort_orders = {}
+            self._search_index = None
+            self._search_users = {}
+        for user in users_data:
+            self._index_user(user)
+    def upsert_user(self, user : User | UserRecord) -> bool:
+        """_Adds a user, or replaces the user of its email in place._
+
+        The new record takes the sequence of the replaced one, so the user
+        keeps its place in the order of the data source.
+
+        Args:
+            user (User | UserRecord): The user, stored as a record.
+
+        Returns:
+            bool: True if the user was added, False if it replaced a user.
+        """
+        user = UserDataset.to_record(user)
+        replaced_user = self.get_user_by_email(user.email)
+        if replaced_user is None:
+            self.add_user(user)
+            return True
+        self.remove_user(replaced_user)
+        user.seq = replaced_user.seq
+        UserDataset._insert_by_seq(self.users, user)
+        self._index_user(user, appended=False)
+        return False
+    def delete_user(self, email : str) -> UserRecord | None:
+        """_Removes the user of an email, if any._
+
+        Args:
+            email (str): The email, case-insensitive.
+
+        Returns:
+            UserRecord | None: The removed user, or None if the email is unknown.
+        """
+        user = self.get_user_by_email(email)
+        if user is not None:
+            self.remove_user(user)
+        return user
+    def remove_user(self, user : User | UserRecord) -> None:
+        """_Removes a single user, updating the indexes and the stats incrementally._
+
+        Args:
+            user (User | UserRecord): The record of the user, as returned by this
+                dataset, or a `User` model equal to it.
+
+        Raises:
+            ValueError: If the user is not in the dataset.
+        """
+        if not isinstance(user, UserRecord):
+            user = self._find_record(user)
+        UserDataset._remove_by_seq(self.users, user)
+        self._columnar_store = None
+        del self._encoded_users[id(user)]
+        self._remove_from_email_index(user)
+        if user.age < ADULT_AGE:
+            UserDataset._remove_by_seq(self._minor_users, user)
+            return
+        UserDataset._remove_by_seq(self._adult_users, user)
+        team_users = self._adult_users_by_team[user.team]
+        UserDataset._remove_by_seq(team_users, user)
+        for sort, orders in self._sort_orders.items():
+            field, descending = UserDataset.parse_sort(sort)
+            is_before = UserDataset._get_is_before_in_sort_order(
+                user, SORT_KEYS[field], descending)
+            for team in (None, user.team):
+                orders[team].remove_sorted(user, is_before)
+            if not orders[user.team]:
+                del orders[user.team]
+        if self._search_index is not None:
+            self._search_index.remove(user.seq)
+            del self._search_users[user.seq]
+        # The stats refill their top N from their own users, without a sort order
+        self._adult_stats.remove(user)
+        if team_users:
+            self._adult_stats_by_team[user.team].remove(user)
+        else:
+            del self._adult_users_by_team[user.team]
+            del self._adult_stats_by_team[user.team]
+    def _remove_from_email_index(self, user : UserRecord) -> None:
+        """_Removes a user from the email index, promoting the next user of its email, if any._"""
+        email_key = UserDataset.get_email_key(user.email)
+        duplicate_users = self._duplicate_users_by_email.get(email_key)
+        if self._users_by_email.get(email_key) is user:
+            if duplicate_users:
+                self._users_by_email[email_key] = duplicate_users.pop(0)
+            else:
+                del self._users_by_email[email_key]
+        elif duplicate_users is not None:
+            UserDataset._remove_by_seq(duplicate_users, user)
+        if duplicate_users is not None and not duplicate_users:
+            del self._duplicate_users_by_email[email_key]
+    def _find_record(self, user : User) -> UserRecord:
+        """_Returns the first record of the dataset equal to a `User` model, using the email index._
+
+        Args:
+            user (User): The user to find.
+
+        Returns:
+            UserRecord: The record of the user.
+
+        Raises:
+            ValueError: If the user is not in the dataset.
+        """
+        email_key = UserDataset.get_email_key(user.email)
+        indexed_user = self._users_by_email.get(email_key)
+        records = [] if indexed_user is None else [indexed_user]
+        records.extend(self._duplicate_users_by_email.get(email_key, []))
+        for record in records:
+            if (record.email == user.email and record.name == user.name and record.age == user.age
+                    and record.team == user.team and record.start_date == user.start_date):
+                return record
+        raise ValueError(f"User not in dataset: {user.email}")
+    def get_users(self) -> BlockList:
+        """_Returns all the users, in their original order._"""
+        return self.users
+    def get_encoded_users(self, users_data : list[User | UserRecord]) -> list[bytes]:
+        """_Returns the pre-encoded JSON of users, encoding the users not in the dataset._
+
+        Args:
+            users_data (list[User | UserRecord]): The users, as returned by this dataset.
+
+        Returns:
+            list[bytes]: The JSON encoding of each user, in order.
+        """
+        encoded_users = self._encoded_users
+        return [
+            encoded_users.get(id(user)) or UserDataset.encode_user(user) for user in users_data]
+    def iter_encoded_users(self, users_data : Iterable[User | UserRecord]) -> Iterator[bytes]:
+        """_Returns an iterator over the pre-encoded JSON of users, one user at a time._
+
+        Unlike `get_encoded_users`, the users are looked up as they are consumed,
+        e.g. by a stream, so no list of all their encodings is built.
+
+        Args:
+            users_data (Iterable[User | UserRecord]): The users, as returned by this dataset.
+
+        Returns:
+            Iterator[bytes]: The JSON encoding of each user, in order.
+        """
+        encoded_users = self._encoded_users
+        return (
+            encoded_users.get(id(user)) or UserDataset.encode_user(user) for user in users_data)
+    def get_user_by_email(self, email : str) -> UserRecord | None:
+        """_Returns the user of an email, using the email index._
+
+        Args:
+            email (str): The email, case-insensitive.
+
+        Returns:
+            UserRecord | None: The first user with this email, or None if it is unknown.
+        """
+        return self._users_by_email.get(UserDataset.get_email_key(email))
+    def get_columnar_store(self) -> ColumnarUserStore:
+        """_Returns the columnar store of the users, built on the first call._
+
+        Raises:
+            RuntimeError: If NumPy is not installed.
+        """
+        if self._columnar_store is None:
+            self._columnar_store = ColumnarUserStore.from_users(self.users)
+        return self._columnar_store
+    def get_adult_users(self) -> BlockList:
+        """_Returns the precomputed adult users, in their original order._"""
+        return self._adult_users
+    def get_minor_users(self) -> BlockList:
+        """_Returns the precomputed minor users, in their original order._"""
+        return self._minor_users
+    def get_adult_users_of_team(self, team : str) -> Sequence[UserRecord]:
+        """_Returns the adult users of a team, using the team index._
+
+        Args:
+            team (str): The team name.
+
+        Returns:
+            Sequence[UserRecord]: The adult users of the team, empty if the team is unknown.
+        """
+        return self._adult_users_by_team.get(team, [])
+    @staticmethod
+    def parse_sort(sort : str) -> tuple[str, bool]:
+        """_Parses a sort order, a field optionally prefixed by "-" for the descending order._
+
+        Args:
+            sort (str): The sort order, such as "age" or "-age".
+
+        Returns:
+            tuple[str, bool]: The field, and whether the order is descending.
+
+        Raises:
+            ValueError: If the field is not in `SORT_FIELDS`.
+        """
+        field = sort.removeprefix("-")
+        if field not in SORT_FIELDS:
+            raise ValueError(f"Invalid sort: {sort}")
+        return field, sort.startswith("-")
+    def build_sort_orders(self, sorts : Sequence[str] = PRESORTED_SORTS) -> None:
+        """_Builds the sort orders of the adult users, globally and for each team._
+
+        Each order is a stable sort of the adult users: the users with equal
+        keys keep their original order, in both directions. The order of each
+        team is derived from the global order in a single pass, without sorting.
+        The orders are then kept up to date as the users are added and removed.
+
+        Args:
+            sorts (Sequence[str]): The sort orders to build. Defaults to `PRESORTED_SORTS`.
+
+        Raises:
+            ValueError: If a sort order is invalid.
+        """
+        for sort in sorts:
+            field, descending = UserDataset.parse_sort(sort)
+            order = sorted(self._adult_users, key=SORT_KEYS[field], reverse=descending)
+            team_orders : dict[str, list[UserRecord]] = {
+                team: [] for team in self._adult_users_by_team}
+            for user in order:
+                team_orders[user.team].append(user)
+            orders : dict[str | None, BlockList] = {
+                team: BlockList(team_order) for team, team_order in team_orders.items()}
+            orders[None] = BlockList(order)
+            self._sort_orders[sort] = orders
+    def get_sorted_adult_users(self, sort : str, team : str | None = None) -> SortedUsers:
+        """_Returns the adult users in a sort order, optionally of a team._
+
+        The sort order is built on the first read if it was not built with
+        the dataset, and kept up to date as the users change.
+
+        Args:
+            sort (str): The sort order, a field of `SORT_FIELDS` optionally prefixed by "-".
+            team (str | None): Optional team name.
+
+        Returns:
+            SortedUsers: The adult users in the sort order, empty if the team is unknown.
+
+        Raises:
+            ValueError: If the sort order is invalid.
+        """
+        return SortedUsers(self._get_sort_order(sort, team), list)
+    def _get_sort_order(self, sort : str, team : str | None = None) -> Sequence[UserRecord]:
+        """_Returns the adult users in a sort order, building the order if needed._
+
+        Raises:
+            ValueError: If the sort order is invalid.
+        """
+        UserDataset.parse_sort(sort)
+        orders = self._sort_orders.get(sort)
+        if orders is None:
+            self.build_sort_orders([sort])
+            orders = self._sort_orders[sort]
+        return orders.get(team, [])
+    def _get_range_candidates(
+        self,
+        field : str,
+        low : object,
+        high : object,
+        high_inclusive : bool = True) -> tuple[int, Iterator[UserRecord]]:
+        """_Bisects the ascending sort order of a field for a range of values._
+
+        Args:
+            field (str): The field, in `SORT_FIELDS`.
+            low (object): Minimum value, inclusive, or None.
+            high (object): Maximum value, or None.
+            high_inclusive (bool): Whether the maximum value is included.
+
+        Returns:
+            tuple[int, Iterator[UserRecord]]: The number of candidates, and the candidates.
+        """
+        order = self._get_sort_order(field)
+        if not order:
+            return 0, iter(())
+        key = SORT_KEYS[field]
+        start = 0 if low is None else order.bisect(lambda user: key(user) < low)
+        if high is None:
+            end = len(order)
+        elif high_inclusive:
+            end = order.bisect(lambda user: key(user) <= high)
+        else:
+            end = order.bisect(lambda user: key(user) < high)
+        end = max(start, end)
+        return end - start, order.iter_range(start, end)
+    def _plan_candidates(self, user_filter : UserFilter) -> tuple[str, Iterator[UserRecord]]:
+        """_Chooses the most selective index of a filter, and returns its candidates._
+
+        The size of the candidates of each index is known without iterating
+        them: the sum of the sizes of the teams, or the width of the range
+        bisected in a sort order. The index with the fewest candidates wins,
+        and a full scan is used if no criterion has an index.
+
+        Args:
+            user_filter (UserFilter): The filter.
+
+        Returns:
+            tuple[str, Iterator[UserRecord]]: The name of the index, and the candidates,
+            in increasing sequence for the scan and the team index, in the order of
+            the field otherwise.
+        """
+        adult_users = self._adult_users
+        plans : list[tuple[int, str, Iterator[UserRecord]]] = [
+            (len(adult_users), "scan", iter(adult_users))]
+        if user_filter.teams is not None:
+            teams_users = [
+                self._adult_users_by_team[team] for team in user_filter.teams
+                if team in self._adult_users_by_team]
+            candidates = (
+                iter(teams_users[0]) if len(teams_users) == 1
+                else heapq.merge(*teams_users, key=SEQ_KEY))
+            plans.append((sum(map(len, teams_users)), "team", candidates))
+        ranges = []
+        if user_filter.min_age is not None or user_filter.max_age is not None:
+            ranges.append(("age", user_filter.min_age, user_filter.max_age, True))
+        if user_filter.start_date_from is not None or user_filter.start_date_to is not None:
+            ranges.append((
+                "start_date", user_filter.start_date_from, user_filter.start_date_to, True))
+        if user_filter.name_prefix is not None:
+            ranges.append((
+                "name", user_filter.name_prefix, user_filter.get_name_upper_bound(), False))
+        for field, low, high, high_inclusive in ranges:
+            nb_candidates, candidates = self._get_range_candidates(field, low, high, high_inclusive)
+            plans.append((nb_candidates, field, candidates))
+        _, index_name, candidates = min(plans, key=lambda plan: plan[0])
+        return index_name, candidates
+    def filter_adult_users(self, user_filter : UserFilter, sort : str | None = None) -> SortedUsers:
+        """_Returns the adult users matching a filter, optionally in a sort order._
+
+        The candidates are read from the most selective index of the filter
+        (see `_plan_candidates`), and the compiled predicate of the filter is
+        applied to them. The matching users are then put back in their original
+        order, and stably sorted if a sort order is given, unless the candidates
+        of the index are already in that order.
+
+        Args:
+            user_filter (UserFilter): The filter.
+            sort (str | None): Optional sort order. If None, the users are in
+                their original order.
+
+        Returns:
+            SortedUsers: The matching adult users.
+
+        Raises:
+            ValueError: If the sort order is invalid.
+        """
+        field, descending = UserDataset.parse_sort(sort) if sort is not None else (None, False)
+        matches = user_filter.compile()
+        index_name, candidates = self._plan_candidates(user_filter)
+        users_data = [user for user in candidates if matches(user)]
+        if field == index_name and not descending:
+            return SortedUsers(users_data, list)
+        if index_name not in ("scan", "team"):
+            users_data.sort(key=SEQ_KEY)
+        if field is not None:
+            users_data.sort(key=SORT_KEYS[field], reverse=descending)
+        return SortedUsers(users_data, list)
+    def get_search_index(self) -> UserSearchIndex:
+        """_Returns the search index of the adult users, built on the first call._"""
+        if self._search_index is None:
+            adult_users = self._adult_users
+            self._search_users = {user.seq: user for user in adult_users}
+            self._search_index = UserSearchIndex(
+                [user.name for user in adult_users],
+                [user.email for user in adult_users],
+                [user.seq for user in adult_users])
+        return self._search_index
+    def search_adult_users(self, query : str, max_results : int) -> SortedUsers:
+        """_Returns the adult users whose name or email matches a query, best matches first._
+
+        Args:
+            query (str): The query, a prefix of a word of the name or of the email,
+                or a substring of them, matched case-insensitively.
+            max_results (int): Maximum number of results.
+
+        Returns:
+            SortedUsers: The matching adult users, ranked.
+        """
+        positions = self.get_search_index().search(query, max_results)
+        search_users = self._search_users
+        return SortedUsers([search_users[position] for position in positions], list)
+    def get_adult_stats_by_team(self) -> dict[str, UserStats]:
+        """_Returns the stats of the adult users of each team, keyed by team name._
+
+        The returned dictionary is the precomputed index and must not be modified.
+        """
+        return self._adult_stats_by_team
+    def get_adult_stats(self, team : str | None = None) -> UserStats:
+        """_Returns the stats of the adult users, optionally of a team._
+
+        Args:
+            team (str | None): Optional team name. If None, the stats cover all adult users.
+
+        Returns:
+            UserStats: The stats, empty if the team is unknown.
+        """
+        if team is None:
+            return self._adult_stats
+        return self._adult_stats_by_team.get(team) or UserStats()
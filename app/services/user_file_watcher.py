@@ -0,0 +1,256 @@
+"""_user_file_watcher.py_
+
+This module provides the UserFileWatcher class, which keeps the users of
+UserService in sync with the CSV file without restarting the application.
+
+The watcher polls the modification time and size of the file in a background
+thread, and waits for them to be stable (debouncing) before acting. When rows
+were only appended to the file, only the new tail is parsed and added to
+UserService incrementally. A rewrite of the file by the compaction of the
+change log of UserService is absorbed, its changes being already applied in
+memory. Any other change triggers a full reload.
+"""
+# pylint: disable=too-many-instance-attributes
+
+import csv
+import hashlib
+import os
+import threading
+import time
+from app.services.user_loader import UserLoader, CSV_PATH
+from app.services.user_service import UserService, user_service
+from app.services.logger_service import logger_service
+
+USERS_WATCH_ENABLED = os.environ.get("USERS_WATCH_ENABLED", "0") == "1"
+WATCH_POLL_INTERVAL = 1.0
+WATCH_DEBOUNCE = 0.5
+APPEND_CHECK_WINDOW = 64 * 1024
+
+class UserFileWatcher:
+    """_Watches the users CSV file, and updates UserService when it changes._
+
+    The watcher remembers the byte offset and the number of rows it loaded,
+    counted like the loader does: blank lines are not rows, and a quoted line
+    break does not end a row.
+    A change is considered an append when the file grew, the loaded content
+    ended on a line boundary, and the last `APPEND_CHECK_WINDOW` bytes before
+    the offset are unchanged. Only complete lines of the tail are loaded.
+    If the dataset was reloaded or modified by someone else since the watcher
+    loaded it, any change of the file triggers a full reload, unless the file
+    was rewritten by the compaction of the change log from the loaded content,
+    and the dataset was only modified by the logged writes. The full reloads
+    go through `UserService.request_refresh`, so they are coalesced with the
+    other refresh requests.
+
+    Example:
+        >>> watcher = UserFileWatcher(user_service)
+        >>> watcher.start()
+        >>> ...
+        >>> watcher.stop()
+    """
+    def __init__(
+        self,
+        service : UserService,
+        file_path : str = CSV_PATH,
+        poll_interval : float = WATCH_POLL_INTERVAL,
+        debounce : float = WATCH_DEBOUNCE):
+        """_Initializes the watcher, without loading nor watching the file._
+
+        Args:
+            service (UserService): The service to update.
+            file_path (str): Path to the CSV file. Defaults to the global `CSV_PATH`.
+            poll_interval (float): Seconds between two checks of the file.
+            debounce (float): Seconds the file must stay unchanged before being loaded.
+        """
+        self.service = service
+        self.file_path = file_path
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self._loaded_signature : tuple[int, int] | None = None
+        self._pending_change : tuple[tuple[int, int], float] | None = None
+        self._offset = 0
+        self._nb_rows = 0
+        self._window_digest = b""
+        self._generation = -1
+        self._stop_event = threading.Event()
+        self._thread : threading.Thread | None = None
+    def start(self) -> None:
+        """_Loads the users from the file, then starts watching it in a background thread._"""
+        self._full_reload()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name="users-file-watcher", daemon=True)
+        self._thread.start()
+    def stop(self) -> None:
+        """_Stops watching the file, waiting for the background thread to end._"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    def _run(self) -> None:
+        """_Checks the file every `poll_interval` seconds, until stopped._"""
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                self.check()
+            except (OSError, ValueError, RuntimeError) as e:
+                logger_service.error("Users file watcher error: %s", e)
+    def _get_signature(self) -> tuple[int, int]:
+        """_Returns the modification time (ns) and size of the file._"""
+        file_stat = os.stat(self.file_path)
+        return file_stat.st_mtime_ns, file_stat.st_size
+    def check(self) -> str | None:
+        """_Checks the file once, and loads the changes if it has been stable long enough._
+
+        Returns:
+            str | None: "append" if the new rows were added, "compaction" if the file
+            was rewritten by the compaction of the change log, "reload" if the users
+            were fully reloaded, or None if nothing was loaded.
+        """
+        signature = self._get_signature()
+        if signature == self._loaded_signature:
+            self._pending_change = None
+            return None
+        now = time.monotonic()
+        if self._pending_change is None or self._pending_change[0] != signature:
+            self._pending_change = (signature, now)
+            return None
+        if now - self._pending_change[1] < self.debounce:
+            return None
+        self._pending_change = None
+        if self._absorb_compaction(signature):
+            return "compaction"
+        if self.service.generation == self._generation and self._is_append(signature[1]):
+            try:
+                self._load_appended_rows(signature)
+                return "append"
+            except RuntimeError as e:
+                logger_service.info("Users file appended, reloading it: %s", e)
+        self._full_reload()
+        return "reload"
+    def _full_reload(self) -> None:
+        """_Reloads all the users, and remembers the loaded content of the file._
+
+        The reload is requested with `UserService.request_refresh`, and waited for.
+        If the file changed during the reload, the loaded content is unknown,
+        so another full reload is done at the next check.
+
+        Raises:
+            RuntimeError: If the reload failed.
+        """
+        signature_before = self._get_signature()
+        refresh_id = self.service.request_refresh(self.file_path)
+        if self.service.wait_for_refresh(refresh_id) != "done":
+            raise RuntimeError(
+                f"Users refresh {refresh_id} failed: {self.service.get_refresh_error(refresh_id)}")
+        self._generation = self.service.generation
+        self._remember_loaded_content(signature_before)
+    def _absorb_compaction(self, signature : tuple[int, int]) -> bool:
+        """_Absorbs a rewrite of the file by the compaction of the change log of the service._
+
+        The rewrite is absorbed if the compaction read the content loaded by the
+        watcher and wrote the current one, and the users were only changed by
+        logged writes since they were loaded: the users are then already those
+        of the file, and the watcher only remembers its new content.
+
+        Args:
+            signature (tuple[int, int]): The current signature of the file.
+
+        Returns:
+            bool: True if the rewrite was absorbed.
+        """
+        change_log = self.service.get_change_log()
+        if (self._loaded_signature is None or change_log is None
+                or change_log.csv_path != self.file_path
+                or change_log.last_compaction != (self._loaded_signature, signature)):
+            return False
+        generation = self.service.get_logged_writes_generation(self._generation)
+        if generation is None:
+            return False
+        self._generation = generation
+        self._remember_loaded_content(signature)
+        logger_service.info("Users file compacted: already loaded")
+        return True
+    def _remember_loaded_content(self, signature : tuple[int, int]) -> None:
+        """_Remembers the rows, offset and digest of the content of the file loaded in memory._
+
+        If the file changed since it was loaded, the loaded content is unknown,
+        so a full reload is done at the next check.
+
+        Args:
+            signature (tuple[int, int]): The signature of the file when it was loaded.
+        """
+        nb_rows = self._count_rows()
+        if self._get_signature() != signature:
+            self._loaded_signature = None
+            self._offset = 0
+            return
+        self._loaded_signature = signature
+        self._nb_rows = nb_rows
+        self._offset = signature[1]
+        self._window_digest = self._get_window_digest(self._offset)
+    def _count_rows(self) -> int:
+        """_Counts the rows of the file after its header, like `csv.DictReader` does._
+
+        Returns:
+            int: The number of rows, blank lines excluded.
+        """
+        with open(self.file_path, newline="", encoding="utf-8") as csvfile:
+            reader = csv.reader(csvfile)
+            next(reader, None)
+            return sum(1 for row in reader if row)
+    def _get_window_digest(self, offset : int) -> bytes:
+        """_Returns the hash of the `APPEND_CHECK_WINDOW` bytes before an offset._
+
+        Args:
+            offset (int): The byte offset ending the window.
+
+        Returns:
+            bytes: The SHA-256 digest of the window.
+        """
+        start = max(0, offset - APPEND_CHECK_WINDOW)
+        with open(self.file_path, "rb") as csvfile:
+            csvfile.seek(start)
+            window = csvfile.read(offset - start)
+        return hashlib.sha256(window).digest()
+    def _is_append(self, size : int) -> bool:
+        """_Checks whether rows were only appended since the last load._
+
+        Args:
+            size (int): The current size of the file.
+
+        Returns:
+            bool: True if the loaded content is unchanged and the file grew.
+        """
+        if self._offset == 0 or size <= self._offset:
+            return False
+        with open(self.file_path, "rb") as csvfile:
+            csvfile.seek(self._offset - 1)
+            if csvfile.read(1) != b"\n":
+                return False
+        return self._get_window_digest(self._offset) == self._window_digest
+    def _load_appended_rows(self, signature : tuple[int, int]) -> None:
+        """_Loads the complete lines appended since the last load, and adds their users._
+
+        Args:
+            signature (tuple[int, int]): The signature of the file when the append was detected.
+
+        Raises:
+            RuntimeError: If the users of the service cannot be modified, or were
+                modified since the watcher loaded them.
+        """
+        with open(self.file_path, "rb") as csvfile:
+            csvfile.seek(self._offset)
+            tail = csvfile.read(signature[1] - self._offset)
+        end = self._offset + tail.rfind(b"\n") + 1
+        if end <= self._offset:
+            return
+        users, nb_rows = UserLoader.load_users_of_byte_range(
+            self.file_path, (self._offset, end), self._nb_rows, fast_validation=True)
+        self._generation = self.service.append_users(users, self._generation)
+        self._offset = end
+        self._nb_rows += nb_rows
+        self._window_digest = self._get_window_digest(end)
+        self._loaded_signature = signature if end == signature[1] else None
+        logger_service.info("Users file appended: %s rows loaded", nb_rows)
+
+# Global watcher instance of the users CSV file
+user_file_watcher = UserFileWatcher(user_service)
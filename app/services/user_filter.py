@@ -0,0 +1,150 @@
+"""_user_filter.py_
+
+This module provides the UserFilter class, the criteria of a server-side
+filter of the users (teams, age range, start date range, name and email
+prefixes), compiled into a single predicate.
+
+The datasets use the criteria to pick the most selective index first
+(see `UserDataset.filter_adult_users`), then apply the compiled predicate
+to the candidates of that index only.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import date
+from app.models.user_record import UserRecord
+from app.models.users_query import UsersQuery
+
+# Upper bound of the strings starting with a prefix, when appended to it
+PREFIX_UPPER_BOUND = "\U0010ffff"
+
+@dataclass(kw_only=True, eq=False)
+class UserFilter:
+    """_Criteria of a filter of the users, all of them must match._
+
+    The criteria are given by keyword, None meaning no criterion. The start
+    dates can be given as dates, and are compared as YYYY-MM-DD strings, and
+    the prefixes are case-sensitive, so each criterion can be answered by a
+    sorted index.
+
+    Attributes:
+        teams (list[str] | None): Teams of the users, any of them.
+        min_age (int | None): Minimum age, inclusive.
+        max_age (int | None): Maximum age, inclusive.
+        start_date_from (str | None): Minimum start date, inclusive, in YYYY-MM-DD format.
+        start_date_to (str | None): Maximum start date, inclusive, in YYYY-MM-DD format.
+        name_prefix (str | None): Prefix of the names.
+        email_prefix (str | None): Prefix of the emails.
+
+    Example:
+        >>> user_filter = UserFilter(teams=["Backend", "Ops"], min_age=30, name_prefix="Al")
+        >>> matches = user_filter.compile()
+        >>> [user for user in users if matches(user)]
+    """
+    teams: list[str] | None = None
+    min_age: int | None = None
+    max_age: int | None = None
+    start_date_from: date | str | None = None
+    start_date_to: date | str | None = None
+    name_prefix: str | None = None
+    email_prefix: str | None = None
+
+    def __post_init__(self):
+        """_Normalizes the criteria: unique teams, string dates, no empty prefix._"""
+        self.teams = list(dict.fromkeys(self.teams)) if self.teams else None
+        self.start_date_from = UserFilter._to_date_string(self.start_date_from)
+        self.start_date_to = UserFilter._to_date_string(self.start_date_to)
+        self.name_prefix = self.name_prefix or None
+        self.email_prefix = self.email_prefix or None
+    @staticmethod
+    def from_query(query : UsersQuery) -> "UserFilter":
+        """_Builds the filter of the query parameters of a retrieval of the users._
+
+        Args:
+            query (UsersQuery): The query parameters, whose `team` and `teams`
+                are merged into the teams of the filter.
+
+        Returns:
+            UserFilter: The filter, empty if the query has no criterion.
+        """
+        teams = None
+        if query.team is not None or query.teams is not None:
+            teams = [*([query.team] if query.team is not None else []), *(query.teams or [])]
+        return UserFilter(
+            teams=teams,
+            min_age=query.min_age,
+            max_age=query.max_age,
+            start_date_from=query.start_date_from,
+            start_date_to=query.start_date_to,
+            name_prefix=query.name_prefix,
+            email_prefix=query.email_prefix)
+    @staticmethod
+    def _to_date_string(value : date | str | None) -> str | None:
+        """_Returns a start date bound in YYYY-MM-DD format._"""
+        if isinstance(value, date):
+            return value.isoformat()
+        return value
+    def get_key(self) -> tuple:
+        """_Returns a hashable key of the criteria, for the response cache._"""
+        return (
+            tuple(self.teams) if self.teams else None, self.min_age, self.max_age,
+            self.start_date_from, self.start_date_to, self.name_prefix, self.email_prefix)
+    def is_empty(self) -> bool:
+        """_Returns True if the filter has no criterion._"""
+        return all(value is None for value in self.get_key())
+    def get_single_team(self) -> str | None:
+        """_Returns the team of a filter on exactly one team and nothing else, if any._
+
+        Such a filter is answered by the team index alone.
+        """
+        if self.teams is None or len(self.teams) != 1:
+            return None
+        if any(value is not None for value in self.get_key()[1:]):
+            return None
+        return self.teams[0]
+    def get_name_upper_bound(self) -> str | None:
+        """_Returns the exclusive upper bound of the names starting with the name prefix._"""
+        if self.name_prefix is None:
+            return None
+        return self.name_prefix + PREFIX_UPPER_BOUND
+    def compile(self) -> Callable[[UserRecord], bool]:
+        """_Compiles the criteria into a single predicate over the users._
+
+        Only the checks of the given criteria are kept, so a filter with one
+        criterion costs one check per user.
+
+        Returns:
+            Callable[[UserRecord], bool]: Returns True if a user matches all the criteria.
+        """
+        checks : list[Callable[[UserRecord], bool]] = []
+        if self.teams is not None:
+            teams = frozenset(self.teams)
+            checks.append(lambda user: user.team in teams)
+        if self.min_age is not None:
+            min_age = self.min_age
+            checks.append(lambda user: user.age >= min_age)
+        if self.max_age is not None:
+            max_age = self.max_age
+            checks.append(lambda user: user.age <= max_age)
+        if self.start_date_from is not None:
+            start_date_from = self.start_date_from
+            checks.append(lambda user: user.start_date >= start_date_from)
+        if self.start_date_to is not None:
+            start_date_to = self.start_date_to
+            checks.append(lambda user: user.start_date <= start_date_to)
+        if self.name_prefix is not None:
+            name_prefix = self.name_prefix
+            checks.append(lambda user: user.name.startswith(name_prefix))
+        if self.email_prefix is not None:
+            email_prefix = self.email_prefix
+            checks.append(lambda user: user.email.startswith(email_prefix))
+        if not checks:
+            return lambda user: True
+        if len(checks) == 1:
+            return checks[0]
+        def matches(user : UserRecord) -> bool:
+            for check in checks:
+                if not check(user):
+                    return False
+            return True
+        return matches
@@ -6,14 +6,53 @@ and logs any issues encountered during parsing.
 """
 # pylint: disable=too-few-public-methods
 
+import hashlib
+import io
+import multiprocessing
 import os
+import re
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import suppress
 from csv import DictReader
+from email_validator import SPECIAL_USE_DOMAIN_NAMES
+from pydantic_core import from_json, to_json
 from app.models.user import User
-from app.services.logger_service import logger_service
+from app.models.user_record import UserRecord
+from app.services.logger_service import LoggerService, logger_service
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 CSV_PATH = os.path.join(BASE_DIR, "..", "data", "users.csv")
 USER_CSV_FIELDS = ["name", "email", "age", "team", "start_date"]
+USERS_CHUNK_SIZE = 10_000
+
+# Conservative patterns for the fast validation path: a value matching them is
+# always accepted unchanged by the `User` model, other values get full validation.
+FAST_AGE_PATTERN = re.compile(r"[0-9]{1,3}")
+FAST_DATE_PATTERN = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}")
+FAST_EMAIL_PATTERN = re.compile(
+    r"(?=.{1,254}$)(?=[^@]{1,64}@)[A-Za-z0-9_+-]+(?:\.[A-Za-z0-9_+-]+)*"
+    r"@(?:(?=[a-z0-9-]{1,63}\.)[a-z0-9]+(?:-[a-z0-9]+)*\.)+([a-z]{2,63})")
+FAST_EMAIL_EXCLUDED_TLDS = frozenset(SPECIAL_USE_DOMAIN_NAMES)
+
+USERS_LOADING_WORKERS = int(os.environ.get("USERS_LOADING_WORKERS", "1"))
+PARALLEL_MIN_RANGE_SIZE = 1_000_000
+# The loading workers are not forked from the API process, which runs threads
+PARALLEL_START_METHOD = (
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+
+USERS_SNAPSHOT_ENABLED = os.environ.get("USERS_SNAPSHOT_ENABLED", "1") == "1"
+SNAPSHOT_SUFFIX = ".snapshot"
+SNAPSHOT_VERSION = 2
+
+# Hot call sites of the loading: the warnings of the first invalid rows of each
+# load are logged, and one info every `ADDED_USERS_LOG_EVERY` valid users.
+ADDED_USERS_LOG_EVERY = 100_000
+skipped_rows_log = LoggerService.get_sampled_logger("users.skipped_rows")
+# The emails found more than once are reported when the users are indexed
+duplicate_emails_log = LoggerService.get_sampled_logger("users.duplicate_emails")
+added_users_log = LoggerService.get_sampled_logger(
+    "users.added", first_n=0, sample_every=ADDED_USERS_LOG_EVERY)
 
 class UserLoader:
     """_A stateless utility class responsible for reading user data from a CSV file._
@@ -45,35 +84,316 @@ class UserLoader:
             ValueError: If the CSV header does not match the expected `USER_CSV_FIELDS`.
         """
         users = []
+        for users_chunk in UserLoader.load_users_by_chunks(file_path):
+            users.extend(users_chunk)
+        return users
+
+    @staticmethod
+    def load_users_by_chunks(
+        file_path: str = CSV_PATH,
+        chunk_size: int = USERS_CHUNK_SIZE,
+        fast_validation: bool = False) -> Iterator[list[User]]:
+        """_Streams users from a CSV file, yielding them in chunks of `User` objects._
+
+        The file is read row by row, so only one chunk of users is held by the loader
+        at a time, and the first chunk is available before the whole file is parsed.
+
+        Args:
+            file_path (str): Optional path to the CSV file. Defaults to the global `CSV_PATH`.
+            chunk_size (int): Maximum number of users per chunk. Defaults to `USERS_CHUNK_SIZE`.
+            fast_validation (bool): If True, rows are validated in bulk mode
+                (see `_fast_parse_user_row`). Defaults to False.
+
+        Yields:
+            list[User]: The next chunk of successfully parsed and validated `User` objects.
+
+        Raises:
+            ValueError: If `chunk_size` is not positive, or if the CSV header
+                does not match the expected `USER_CSV_FIELDS`.
+
+        Example:
+            >>> for users_chunk in UserLoader.load_users_by_chunks(chunk_size=1000):
+            ...     print(len(users_chunk))
+        """
+        if chunk_size <= 0:
+            raise ValueError(f"Invalid chunk size: expected a positive integer, got {chunk_size}")
+        UserLoader._start_logging_window()
+        nb_users = 0
         with open(file_path, newline='', encoding="utf-8") as csvfile:
             reader = DictReader(csvfile)
             if reader.fieldnames != USER_CSV_FIELDS:
                 raise ValueError(
                     f"Invalid CSV header: expected {USER_CSV_FIELDS}, got {reader.fieldnames}")
-            UserLoader._parse_user_rows(users, reader)
-            logger_service.info("Users data loaded: %s valid users", len(users))
-            return users
+            users_chunk : list[User] = []
+            for user in UserLoader.parse_user_rows(reader, fast_validation):
+                users_chunk.append(user)
+                if len(users_chunk) == chunk_size:
+                    nb_users += len(users_chunk)
+                    yield users_chunk
+                    users_chunk = []
+            if users_chunk:
+                nb_users += len(users_chunk)
+                yield users_chunk
+        UserLoader._log_loaded_users("loaded", nb_users)
+
+    @staticmethod
+    def load_users_in_parallel(
+        file_path: str = CSV_PATH,
+        max_workers: int | None = None,
+        fast_validation: bool = False,
+        min_range_size: int = PARALLEL_MIN_RANGE_SIZE) -> Iterator[list[UserRecord]]:
+        """_Loads users from a CSV file with several processes, yielding them in chunks._
+
+        The file is split into byte ranges on line boundaries, and each range is
+        parsed and validated by a worker of a `ProcessPoolExecutor`, started
+        with `PARALLEL_START_METHOD`. The workers send back the values of the
+        users as plain tuples, cheaper to pickle than `User` models, and the
+        chunks of records are yielded in the order of the file, one chunk per range.
+        The warnings for invalid rows are logged with their line numbers in the file.
+
+        The CSV file must have one row per line (no quoted line breaks).
+        No info log is written for the valid rows.
+
+        Args:
+            file_path (str): Optional path to the CSV file. Defaults to the global `CSV_PATH`.
+            max_workers (int | None): Maximum number of worker processes.
+                Defaults to the number of CPUs.
+            fast_validation (bool): If True, rows are validated in bulk mode
+                (see `_fast_parse_user_row`). Defaults to False.
+            min_range_size (int): Minimum size in bytes of a range, so that small
+                files are not split. Defaults to `PARALLEL_MIN_RANGE_SIZE`.
+
+        Yields:
+            list[UserRecord]: The successfully parsed and validated users of the next range.
+
+        Raises:
+            ValueError: If the CSV header does not match the expected `USER_CSV_FIELDS`.
+
+        Example:
+            >>> users = [user for users_chunk in UserLoader.load_users_in_parallel(max_workers=8)
+            ...          for user in users_chunk]
+        """
+        byte_ranges = UserLoader._split_in_byte_ranges(
+            file_path, max_workers or os.cpu_count() or 1, min_range_size)
+        UserLoader._start_logging_window()
+        nb_users = 0
+        nb_previous_rows = 0
+        with ProcessPoolExecutor(
+                max_workers=len(byte_ranges),
+                mp_context=multiprocessing.get_context(PARALLEL_START_METHOD)) as executor:
+            results = executor.map(
+                _load_users_of_byte_range,
+                [file_path] * len(byte_ranges),
+                byte_ranges,
+                [fast_validation] * len(byte_ranges))
+            for user_values, invalid_rows, nb_rows in results:
+                for i_user_row, user_row, error in invalid_rows:
+                    skipped_rows_log.warning(
+                        "Line %s - Skipping invalid user row %s: %s",
+                        nb_previous_rows + i_user_row, user_row, error)
+                nb_previous_rows += nb_rows
+                if user_values:
+                    nb_users += len(user_values)
+                    yield [UserRecord.from_values(*values) for values in user_values]
+        UserLoader._log_loaded_users("loaded", nb_users)
+
+    @staticmethod
+    def load_users_of_byte_range(
+        file_path: str,
+        byte_range: tuple[int, int],
+        nb_previous_rows: int = 0,
+        fast_validation: bool = False) -> tuple[list[UserRecord], int]:
+        """_Loads the users of a byte range of a CSV file, e.g. rows appended to it._
+
+        The range must start and end on line boundaries, after the header line.
+        Warnings for invalid rows are logged with their line numbers in the file.
+
+        Args:
+            file_path (str): Path to the CSV file.
+            byte_range (tuple[int, int]): The (start, end) byte offsets of the rows to load.
+            nb_previous_rows (int): Number of rows of the file before the range.
+            fast_validation (bool): If True, rows are validated in bulk mode
+                (see `_fast_parse_user_row`). Defaults to False.
+
+        Returns:
+            tuple[list[UserRecord], int]: The valid users, and the number of rows of the range.
+        """
+        UserLoader._start_logging_window()
+        user_values, invalid_rows, nb_rows = _load_users_of_byte_range(
+            file_path, byte_range, fast_validation)
+        users = [UserRecord.from_values(*values) for values in user_values]
+        for i_user_row, user_row, error in invalid_rows:
+            skipped_rows_log.warning(
+                "Line %s - Skipping invalid user row %s: %s",
+                nb_previous_rows + i_user_row, user_row, error)
+        UserLoader._log_loaded_users("appended", len(users))
+        return users, nb_rows
+
+    @staticmethod
+    def get_snapshot_key(file_path: str = CSV_PATH) -> tuple[int, int, str]:
+        """_Computes the key identifying the current content of a CSV file._
+
+        Args:
+            file_path (str): Optional path to the CSV file. Defaults to the global `CSV_PATH`.
+
+        Returns:
+            tuple[int, int, str]: The modification time (ns), size and SHA-256 of the file.
+        """
+        with open(file_path, "rb") as csvfile:
+            file_stat = os.fstat(csvfile.fileno())
+            file_hash = hashlib.file_digest(csvfile, "sha256").hexdigest()
+        return file_stat.st_mtime_ns, file_stat.st_size, file_hash
+
+    @staticmethod
+    def load_users_from_snapshot(
+        snapshot_key: tuple[int, int, str],
+        file_path: str = CSV_PATH) -> Iterator[list[UserRecord]] | None:
+        """_Loads the users from the snapshot of a CSV file, if it is up to date._
+
+        The snapshot is stored next to the CSV file (see `UserSnapshotWriter`).
+        Its users were validated when it was written, so they are rebuilt without
+        validation. The whole snapshot is read and checked before the first chunk
+        is returned, so an unreadable snapshot is ignored instead of failing a load.
+
+        Args:
+            snapshot_key (tuple[int, int, str]): Key of the current content of the
+                CSV file, computed with `get_snapshot_key`.
+            file_path (str): Optional path to the CSV file. Defaults to the global `CSV_PATH`.
+
+        Returns:
+            Iterator[list[UserRecord]] | None: The chunks of users of the snapshot,
+            or None if there is no snapshot, or if it does not match the content of the CSV file.
+        """
+        try:
+            with open(file_path + SNAPSHOT_SUFFIX, "rb") as snapshot_file:
+                header = from_json(snapshot_file.readline())
+                if (not isinstance(header, dict)
+                        or header.get("version") != SNAPSHOT_VERSION
+                        or tuple(header.get("key") or ()) != tuple(snapshot_key)):
+                    logger_service.info("Users snapshot outdated, ignored")
+                    return None
+                chunks_columns = [from_json(line) for line in snapshot_file]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger_service.warning("Users snapshot unreadable, ignored: %s", e)
+            return None
+        return UserLoader._get_snapshot_chunks(chunks_columns)
+
+    @staticmethod
+    def _get_snapshot_chunks(chunks_columns: list[list[list]]) -> Iterator[list[UserRecord]]:
+        """_Yields the users of the chunks of a snapshot, releasing each chunk once converted._
+
+        Args:
+            chunks_columns (list[list[list]]): The columns of each chunk, emptied by the iteration.
+
+        Yields:
+            list[UserRecord]: The users of the next chunk.
+        """
+        nb_users = 0
+        chunks_columns.reverse()
+        while chunks_columns:
+            users_chunk = [
+                UserRecord.from_values(*values) for values in zip(*chunks_columns.pop())]
+            nb_users += len(users_chunk)
+            yield users_chunk
+        logger_service.info("Users data loaded from snapshot: %s valid users", nb_users)
 
     @staticmethod
-    def _parse_user_rows(users : list[User], reader : DictReader[str]) -> None:
-        """_Parses individual rows from the CSV reader and appends valid users to the list._
+    def _split_in_byte_ranges(
+        file_path: str,
+        nb_ranges: int,
+        min_range_size: int) -> list[tuple[int, int]]:
+        """_Splits the rows of a CSV file into byte ranges starting on line boundaries._
+
+        Args:
+            file_path (str): Path to the CSV file.
+            nb_ranges (int): Maximum number of ranges.
+            min_range_size (int): Minimum size in bytes of a range.
+
+        Returns:
+            list[tuple[int, int]]: The (start, end) byte offsets of each range,
+            the header line excluded.
+
+        Raises:
+            ValueError: If the CSV header does not match the expected `USER_CSV_FIELDS`.
+        """
+        with open(file_path, "rb") as csvfile:
+            header = csvfile.readline()
+            fieldnames = DictReader(io.StringIO(header.decode("utf-8"))).fieldnames
+            if fieldnames != USER_CSV_FIELDS:
+                raise ValueError(
+                    f"Invalid CSV header: expected {USER_CSV_FIELDS}, got {fieldnames}")
+            start = csvfile.tell()
+            end = os.fstat(csvfile.fileno()).st_size
+            nb_ranges = max(1, min(nb_ranges, (end - start) // max(min_range_size, 1)))
+            boundaries = [start]
+            for i_range in range(1, nb_ranges):
+                csvfile.seek(max(start + (end - start) * i_range // nb_ranges, boundaries[-1]))
+                csvfile.readline()
+                boundaries.append(csvfile.tell())
+            boundaries.append(end)
+        return list(zip(boundaries[:-1], boundaries[1:]))
+
+    @staticmethod
+    def _start_logging_window() -> None:
+        """_Starts the sampling window of the hot call sites for a new load._"""
+        skipped_rows_log.start_window()
+        duplicate_emails_log.start_window()
+        added_users_log.start_window()
+
+    @staticmethod
+    def _log_loaded_users(action: str, nb_users: int) -> None:
+        """_Logs the number of valid users of a load, of skipped rows and of duplicate emails._
+
+        Args:
+            action (str): The action of the load, e.g. "loaded" or "appended".
+            nb_users (int): The number of valid users.
+        """
+        logger_service.info(
+            "Users data %s: %s valid users, %s skipped (first %s shown)",
+            action, nb_users, skipped_rows_log.window_count, skipped_rows_log.window_logged)
+        if duplicate_emails_log.window_count:
+            logger_service.warning(
+                "Users data %s: %s duplicate emails (first %s shown)", action,
+                duplicate_emails_log.window_count, duplicate_emails_log.window_logged)
+
+    @staticmethod
+    def parse_user_rows(
+        reader : Iterable[dict[str, str]],
+        fast_validation : bool = False,
+        invalid_rows : list[tuple[int, dict[str, str], str]] | None = None) -> Iterator[User]:
+        """_Parses individual rows from the CSV reader and yields the valid users._
 
         This method iterates through each CSV row, checks for missing or invalid data,
         and logs appropriate warnings for any issues. Valid rows are converted into
-        `User` model instances and added to the provided list.
+        `User` model instances and yielded one by one.
+
+        In fast validation mode, rows passing the precompiled checks of
+        `_fast_parse_user_row` are built without Pydantic validation and without
+        an info log, and only the other rows go through the full validation.
 
         Args:
-            users (list[User]): The list where valid `User` objects will be appended.
             reader (csv.DictReader): The CSV reader object used to iterate through rows.
+            fast_validation (bool): If True, enables the fast validation path.
+            invalid_rows (list | None): If given, nothing is logged, and the
+                (line, row, error) of each invalid row is appended to this list instead.
 
-        Returns:
-            None
+        Yields:
+            User: The next successfully parsed and validated user.
 
         Logs:
-            - Info: When a valid user is added.
-            - Warning: When a row is skipped due to invalid or missing data.
+            - Info: When a valid user is added (full validation only), sampled
+              by `added_users_log`.
+            - Warning: When a row is skipped due to invalid or missing data,
+              sampled by `skipped_rows_log`.
         """
         for i_user_row, user_row in enumerate(reader, start=1):
+            if fast_validation:
+                user = UserLoader._fast_parse_user_row(user_row)
+                if user is not None:
+                    yield user
+                    continue
             try:
                 for field in USER_CSV_FIELDS:
                     if not user_row.get(field):
@@ -91,9 +411,168 @@ class UserLoader:
                     age=user_age,
                     team=user_team,
                     start_date=user_start_date)
-                users.append(user)
-                logger_service.info("Line %s - New User added : %s", i_user_row, user.name)
             except (ValueError, KeyError, TypeError) as e:
-                logger_service.warning(
-                    "Line %s - Skipping invalid user row %s: %s", 
+                if invalid_rows is not None:
+                    invalid_rows.append((i_user_row, user_row, str(e)))
+                    continue
+                skipped_rows_log.warning(
+                    "Line %s - Skipping invalid user row %s: %s",
                     i_user_row, user_row, e)
+                continue
+            if invalid_rows is None:
+                added_users_log.info("Line %s - New User added : %s", i_user_row, user.name)
+            yield user
+
+    @staticmethod
+    def parse_user_row(user_row : dict[str, str]) -> User | None:
+        """_Parses a single CSV row like the loading does, without logging._
+
+        Args:
+            user_row (dict[str, str]): The CSV row, keyed by `USER_CSV_FIELDS`.
+
+        Returns:
+            User | None: The user, or None if the row is invalid.
+        """
+        for user in UserLoader.parse_user_rows([user_row], fast_validation=True, invalid_rows=[]):
+            return user
+        return None
+
+    @staticmethod
+    def _fast_parse_user_row(user_row : dict[str, str]) -> User | None:
+        """_Builds a user from a CSV row without Pydantic validation, if the row is safe._
+
+        The email, age and start date columns are checked against precompiled
+        patterns, which only match values the `User` model accepts unchanged.
+        The user is then built with `User.model_construct`, skipping the
+        `EmailStr` validation.
+
+        Args:
+            user_row (dict[str, str]): The CSV row to parse.
+
+        Returns:
+            User | None: The user, or None if the row needs the full validation.
+        """
+        user_name = user_row.get("name")
+        user_email = user_row.get("email")
+        user_age = user_row.get("age")
+        user_team = user_row.get("team")
+        user_start_date = user_row.get("start_date")
+        if not (user_name and user_email and user_age and user_team and user_start_date):
+            return None
+        user_email = user_email.strip()
+        user_start_date = user_start_date.strip()
+        email_match = FAST_EMAIL_PATTERN.fullmatch(user_email)
+        if (email_match is None
+                or email_match.group(1) in FAST_EMAIL_EXCLUDED_TLDS
+                or FAST_AGE_PATTERN.fullmatch(user_age) is None
+                or FAST_DATE_PATTERN.fullmatch(user_start_date) is None):
+            return None
+        return User.model_construct(
+            name=user_name.strip(),
+            email=user_email,
+            age=int(user_age),
+            team=user_team.strip(),
+            start_date=user_start_date)
+
+class UserSnapshotWriter:
+    """_Writes the snapshot of the validated users of a CSV file, chunk by chunk._
+
+    The snapshot is a JSON lines file: a header with the format version and the
+    key of the CSV content, then the columns of each chunk of users. It holds
+    only data, so reading it never executes code. The chunks are written while
+    the users are loaded, so the users are never held twice, to a temporary
+    file renamed by `commit`, so readers never see a partial snapshot.
+
+    A snapshot is only a cache: an error while writing it is logged, and the
+    rest of the snapshot is dropped.
+
+    Example:
+        >>> snapshot_writer = UserSnapshotWriter(UserLoader.get_snapshot_key(CSV_PATH))
+        >>> for users_chunk in UserLoader.load_users_by_chunks(CSV_PATH):
+        ...     snapshot_writer.write(users_chunk)
+        >>> snapshot_writer.commit()
+    """
+    def __init__(self, snapshot_key: tuple[int, int, str], file_path: str = CSV_PATH):
+        """_Starts the snapshot, writing its header to the temporary file._
+
+        Args:
+            snapshot_key (tuple[int, int, str]): Key of the CSV content, computed
+                with `get_snapshot_key` before the file was loaded.
+            file_path (str): Optional path to the CSV file. Defaults to the global `CSV_PATH`.
+        """
+        self.path = file_path + SNAPSHOT_SUFFIX
+        self.nb_users = 0
+        self._file = None
+        try:
+            self._file = open(self.path + ".tmp", "wb")  # pylint: disable=consider-using-with
+            self._file.write(to_json({"version": SNAPSHOT_VERSION, "key": snapshot_key}) + b"\n")
+        except OSError as e:
+            self._fail(e)
+    def write(self, users: list[User | UserRecord]) -> None:
+        """_Appends a chunk of users to the snapshot._"""
+        if self._file is None:
+            return
+        try:
+            self._file.write(to_json((
+                [user.name for user in users],
+                [user.email for user in users],
+                [user.age for user in users],
+                [user.team for user in users],
+                [user.start_date for user in users])) + b"\n")
+            self.nb_users += len(users)
+        except OSError as e:
+            self._fail(e)
+    def commit(self) -> None:
+        """_Closes the snapshot and atomically replaces the previous one._"""
+        if self._file is None:
+            return
+        snapshot_file, self._file = self._file, None
+        try:
+            snapshot_file.close()
+            os.replace(self.path + ".tmp", self.path)
+        except OSError as e:
+            self._fail(e)
+            return
+        logger_service.info("Users snapshot written: %s users", self.nb_users)
+    def abort(self) -> None:
+        """_Drops the snapshot, unless it was committed._"""
+        if self._file is None:
+            return
+        snapshot_file, self._file = self._file, None
+        with suppress(OSError):
+            snapshot_file.close()
+        with suppress(OSError):
+            os.remove(self.path + ".tmp")
+    def _fail(self, error: OSError) -> None:
+        """_Logs an error of the snapshot, and drops it._"""
+        logger_service.warning("Users snapshot not written: %s", error)
+        self.abort()
+        with suppress(OSError):
+            os.remove(self.path + ".tmp")
+
+def _load_users_of_byte_range(
+    file_path: str,
+    byte_range: tuple[int, int],
+    fast_validation: bool) -> tuple[list[tuple], list[tuple[int, dict[str, str], str]], int]:
+    """_Parses and validates the rows of a byte range of a CSV file (worker process)._
+
+    Args:
+        file_path (str): Path to the CSV file.
+        byte_range (tuple[int, int]): The (start, end) byte offsets of the rows to parse.
+        fast_validation (bool): If True, enables the fast validation path.
+
+    Returns:
+        tuple: The (name, email, age, team, start_date) values of the valid users,
+        the (line, row, error) of the invalid rows with line numbers relative to
+        the range, and the number of rows of the range.
+    """
+    start, end = byte_range
+    with open(file_path, "rb") as csvfile:
+        csvfile.seek(start)
+        text = csvfile.read(end - start).decode("utf-8")
+    user_rows = list(DictReader(io.StringIO(text, newline=''), fieldnames=USER_CSV_FIELDS))
+    invalid_rows : list[tuple[int, dict[str, str], str]] = []
+    user_values = [
+        (user.name, user.email, user.age, user.team, user.start_date)
+        for user in UserLoader.parse_user_rows(user_rows, fast_validation, invalid_rows)]
+    return user_values, invalid_rows, len(user_rows)
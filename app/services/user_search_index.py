@@ -0,0 +1,264 @@
+"""_user_search_index.py_
+
+This module provides the UserSearchIndex class, the type-ahead search index
+over the names and emails of the users.
+
+The index has two parts, built once per dataset and then kept up to date:
+    - a prefix index: the words of the names and the emails, casefolded and
+      sorted, so the keys starting with a query are a range found by bisection.
+      Each entry is the key followed by the position of its user, so the
+      entries are a single BlockList of strings;
+    - an n-gram index: the positions of the users containing each trigram of
+      their casefolded name or email, so the substring matches of a query are
+      among the users of its rarest trigram.
+
+The results are ranked: the exact matches of a word or an email first, then
+the prefix matches in the order of their keys, then the substring matches in
+the original order of the users. The users are identified by positions given
+by the caller, increasing in the original order of the users (e.g. their
+sequences), so the users with equal keys are ranked in that order too, however
+they were added.
+
+A user added after the build has its entries inserted by bisection in their
+block, and its position inserted in the postings of its trigrams, also kept
+in blocks. A removed user has its entries and postings removed the same way,
+so the size of the index follows the number of users, whatever the number of
+upserts.
+
+The parts of an index can also be built once (`build_parts`), saved as arrays,
+and searched from read-only views of them (`from_parts`), e.g. by the processes
+sharing a generation of users.
+"""
+
+from array import array
+from collections.abc import Mapping, Sequence
+from functools import partial
+from app.services.block_list import BlockList
+
+NGRAM_SIZE = 3
+# An entry of the prefix index is "<key>\x00<position in 8 hex digits>": the
+# separator sorts before any character of a key, so the entries sort like the
+# (key, position) pairs
+ENTRY_SEPARATOR = "\x00"
+POSITION_DIGITS = 8
+# The postings are blocks of unsigned integers, 4 bytes per position
+POSITIONS_BLOCK_TYPE = partial(array, "I")
+
+class UserSearchIndex:
+    """_Prefix and n-gram index over the names and emails of users._
+
+    The users are identified by their positions, unique and increasing in the
+    original order of the users, below 2**32.
+
+    Attributes:
+        _texts (dict[int, str]): Casefolded name and email of each position,
+            separated by a null character.
+        _entries (BlockList): Casefolded words of the names and emails, each followed
+            by the position of its user, sorted.
+        _ngram_positions (dict[str, BlockList]): Positions of the users containing each
+            trigram, in increasing order.
+
+    Example:
+        >>> index = UserSearchIndex([user.name for user in users], [user.email for user in users])
+        >>> [users[position] for position in index.search("ali", max_results=10)]
+    """
+    def __init__(
+        self,
+        names : list[str],
+        emails : list[str],
+        positions : list[int] | None = None):
+        """_Builds the index in a single pass over the users._
+
+        Args:
+            names (list[str]): Names of the users.
+            emails (list[str]): Emails of the users.
+            positions (list[int] | None): Positions of the users, increasing.
+                Defaults to their indexes in `names`.
+        """
+        texts, entries, ngram_positions = UserSearchIndex.build_parts(names, emails, positions)
+        self._texts = texts
+        self._entries = BlockList(entries)
+        self._ngram_positions = {
+            ngram: BlockList(ngram_positions_data, block_type=POSITIONS_BLOCK_TYPE)
+            for ngram, ngram_positions_data in ngram_positions.items()}
+    @staticmethod
+    def build_parts(
+        names : list[str],
+        emails : list[str],
+        positions : list[int] | None = None) -> tuple[dict[int, str], list[str], dict[str, array]]:
+        """_Builds the parts of the index in a single pass over the users._
+
+        Args:
+            names (list[str]): Names of the users.
+            emails (list[str]): Emails of the users.
+            positions (list[int] | None): Positions of the users, increasing.
+                Defaults to their indexes in `names`.
+
+        Returns:
+            tuple[dict[int, str], list[str], dict[str, array]]: The text of each
+            position, the sorted entries of the prefix index, and the increasing
+            positions of the users containing each trigram.
+        """
+        if positions is None:
+            positions = range(len(names))
+        texts : dict[int, str] = {}
+        entries : list[str] = []
+        ngram_positions : dict[str, array] = {}
+        for position, name, email in zip(positions, names, emails):
+            text = texts[position] = UserSearchIndex.get_text(name, email)
+            for key in UserSearchIndex.get_keys(text):
+                entries.append(UserSearchIndex.get_entry(key, position))
+            for ngram in UserSearchIndex.get_ngrams(text):
+                ngram_positions_data = ngram_positions.get(ngram)
+                if ngram_positions_data is None:
+                    ngram_positions_data = ngram_positions[ngram] = array("I")
+                ngram_positions_data.append(position)
+        entries.sort()
+        return texts, entries, ngram_positions
+    @classmethod
+    def from_parts(
+        cls,
+        texts : Mapping[int, str],
+        entries : Sequence[str],
+        ngram_positions : Mapping[str, Sequence[int]]) -> "UserSearchIndex":
+        """_Returns an index searching prebuilt parts, without copying them._
+
+        The parts are those of `build_parts`, possibly read-only views of them:
+        such an index can be searched, but not modified.
+
+        Args:
+            texts (Mapping[int, str]): The text of each position (see `get_text`).
+            entries (Sequence[str]): The sorted entries of the prefix index, with
+                the `bisect` and `iter_range` methods of a BlockList.
+            ngram_positions (Mapping[str, Sequence[int]]): The increasing positions
+                of the users containing each trigram.
+
+        Returns:
+            UserSearchIndex: The index.
+
+        Example:
+            >>> texts, entries, ngram_positions = UserSearchIndex.build_parts(names, emails)
+            >>> index = UserSearchIndex.from_parts(texts, BlockList(entries), ngram_positions)
+        """
+        index = cls.__new__(cls)
+        index._texts = texts
+        index._entries = entries
+        index._ngram_positions = ngram_positions
+        return index
+    def __len__(self) -> int:
+        """_Returns the number of users indexed._"""
+        return len(self._texts)
+    @staticmethod
+    def get_text(name : str, email : str) -> str:
+        """_Returns the indexed text of a user: its casefolded name and email._
+
+        The null separator keeps the trigrams of the name and of the email apart.
+        """
+        return str(name).casefold() + ENTRY_SEPARATOR + str(email).casefold()
+    @staticmethod
+    def get_keys(text : str) -> set[str]:
+        """_Returns the keys of the text of a user: the words of its name, and its email._"""
+        name_key, email_key = text.split(ENTRY_SEPARATOR)
+        keys = set(name_key.split())
+        keys.add(email_key)
+        return keys
+    @staticmethod
+    def get_entry(key : str, position : int) -> str:
+        """_Returns the entry of a key of the user of a position, in the prefix index._"""
+        return f"{key}{ENTRY_SEPARATOR}{position:0{POSITION_DIGITS}x}"
+    @staticmethod
+    def get_entry_position(entry : str) -> int:
+        """_Returns the position of the user of an entry of the prefix index._"""
+        return int(entry[-POSITION_DIGITS:], 16)
+    @staticmethod
+    def get_ngrams(text : str) -> set[str]:
+        """_Returns the trigrams of a text._
+
+        Args:
+            text (str): The text, casefolded.
+
+        Returns:
+            set[str]: The distinct trigrams, empty if the text is shorter than a trigram.
+        """
+        return {text[start:start + NGRAM_SIZE] for start in range(len(text) - NGRAM_SIZE + 1)}
+    def add(self, name : str, email : str, position : int) -> None:
+        """_Indexes a user at a position._
+
+        Args:
+            name (str): Name of the user.
+            email (str): Email of the user.
+            position (int): Position of the user, not indexed yet.
+
+        Raises:
+            ValueError: If a user is already indexed at the position.
+        """
+        if position in self._texts:
+            raise ValueError(f"Position already indexed: {position}")
+        text = self._texts[position] = UserSearchIndex.get_text(name, email)
+        for key in UserSearchIndex.get_keys(text):
+            entry = UserSearchIndex.get_entry(key, position)
+            self._entries.insert_sorted(entry, entry.__gt__)
+        for ngram in UserSearchIndex.get_ngrams(text):
+            positions = self._ngram_positions.get(ngram)
+            if positions is None:
+                positions = self._ngram_positions[ngram] = BlockList(
+                    block_type=POSITIONS_BLOCK_TYPE)
+            positions.insert_sorted(position, position.__gt__)
+    def remove(self, position : int) -> None:
+        """_Removes the user of a position from the index._
+
+        Raises:
+            ValueError: If no user is indexed at the position.
+        """
+        text = self._texts.pop(position, None)
+        if text is None:
+            raise ValueError(f"Position not indexed: {position}")
+        for key in UserSearchIndex.get_keys(text):
+            entry = UserSearchIndex.get_entry(key, position)
+            self._entries.remove_sorted(entry, entry.__gt__)
+        for ngram in UserSearchIndex.get_ngrams(text):
+            positions = self._ngram_positions[ngram]
+            positions.remove_sorted(position, position.__gt__)
+            if not positions:
+                del self._ngram_positions[ngram]
+    def search(self, query : str, max_results : int) -> list[int]:
+        """_Returns the positions of the users matching a query, ranked._
+
+        The search stops as soon as `max_results` users are found, so its cost
+        depends on the number of results asked, not on the number of users.
+
+        Args:
+            query (str): The query, matched case-insensitively.
+            max_results (int): Maximum number of results.
+
+        Returns:
+            list[int]: The positions of the matching users, best matches first,
+            each user at most once.
+        """
+        query = query.casefold().strip()
+        if not query or max_results <= 0:
+            return []
+        results : list[int] = []
+        found : set[int] = set()
+        entries = self._entries
+        start = entries.bisect(query.__gt__)
+        for entry in entries.iter_range(start, len(entries)):
+            if not entry.startswith(query):
+                break
+            position = UserSearchIndex.get_entry_position(entry)
+            if position not in found:
+                found.add(position)
+                results.append(position)
+                if len(results) == max_results:
+                    return results
+        if len(query) < NGRAM_SIZE:
+            return results
+        ngram_positions = [
+            self._ngram_positions.get(ngram, ()) for ngram in UserSearchIndex.get_ngrams(query)]
+        texts = self._texts
+        for position in min(ngram_positions, key=len):
+            if position not in found and query in texts[position]:
+                results.append(position)
+                if len(results) == max_results:
+                    break
+        return results
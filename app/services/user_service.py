@@ -4,10 +4,33 @@ This module provides the UserService class, which acts as a singleton responsibl
 for managing in-memory user data. It loads user records from the data source 
 (UserLoader) and provides convenient methods to filter and analyze user data.
 """
+# pylint: disable=too-many-instance-attributes,too-many-public-methods
 
+import asyncio
 import heapq
-from app.models.user import User
-from app.services.user_loader import UserLoader
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from contextlib import nullcontext
+from app.models.user import User, ADULT_AGE
+from app.models.user_record import UserRecord
+from app.services.user_loader import (
+    UserLoader, UserSnapshotWriter, CSV_PATH, USERS_LOADING_WORKERS, USERS_SNAPSHOT_ENABLED,
+    skipped_rows_log)
+from app.services.json_service import JSONService
+from app.services.logger_service import logger_service
+from app.services.metrics_service import metrics_service
+from app.services.user_stats import UserStats
+from app.services.user_dataset import UserDataset, SortedUsers
+from app.services.user_change_log import UserChangeLog, USERS_CHANGE_LOG_ENABLED
+from app.services.user_filter import UserFilter
+from app.services.columnar_user_store import ColumnarUserStore
+from app.services.shared_user_dataset import (
+    SharedUserDataset, USERS_SHARED_DIR, SHARED_DATASET_POLL_INTERVAL)
+
+REFRESH_FAILURES_KEPT = 100
+USERS_SEARCH_INDEX_ENABLED = os.environ.get("USERS_SEARCH_INDEX_ENABLED", "1") == "1"
 
 class UserService:
     """_Singleton service class that manages user data loaded from external sources._
@@ -15,9 +38,41 @@ class UserService:
     This class maintains the list of users in memory, allows refreshing the data,
     and provides convenient access and filtering methods.
 
+    The users, their indexes and their stats are held by a dataset
+    (`UserDataset`, or `SharedUserDataset` when `USERS_SHARED_DIR` is set).
+    A reload builds a new dataset off to the side and swaps it in with a single
+    assignment, so readers always see a complete dataset.
+
+    The users are returned as compact UserRecord instances, with the same
+    attributes as the `User` model. They are only converted to `User` models
+    at the API boundary (`to_users`, or their pre-encoded JSON).
+
+    The users loaded from a CSV file can be written one at a time (`create_user`,
+    `upsert_user`, `delete_user`): each write is logged in the change log of
+    the file, then applied to the dataset in place, without a reload.
+
+    The readers of the dataset run on the event loop, without lock. The writes
+    are serialized by the write lock in the threads of the callers, but their
+    changes to the dataset are applied on the event loop given to
+    `set_event_loop` (see `_apply_to_dataset`), between two reads, so the
+    readers never see a dataset being modified.
+
     Attributes:
         _instance (UserService): Singleton instance of the class.
-        users (list[User]): In-memory list of user objects.
+        users (list[UserRecord]): In-memory list of compact user records.
+        generation (int): Generation of the dataset, incremented each time it changes.
+        _unlogged_generation (int): Generation of the last change not logged in the
+            change log: a reload, or a write without change log.
+        csv_path (str): Path to the CSV file reloaded by default, the global `CSV_PATH`.
+        _dataset (UserDataset | SharedUserDataset): The current dataset.
+        _refresh_lock (threading.Lock): Lock protecting the state of the background refreshes.
+        _refresh_done (threading.Condition): Notified, with the refresh lock, when a refresh ends.
+        _write_lock (threading.Lock): Lock serializing the writes, and the swap
+            of a reloaded dataset.
+        _change_log (UserChangeLog | None): Change log of the CSV file the users were loaded
+            from, None if the writes are not persisted.
+        _event_loop (asyncio.AbstractEventLoop | None): Event loop of the readers, on which
+            the changes to the dataset are applied, None to apply them in the caller.
     """
     _instance: "UserService" = None
     def __new__(cls):
@@ -37,38 +92,816 @@ class UserService:
         If the singleton instance already exists, this constructor
         does not reinitialize the data.
         """
-        self.users = []
-    def refresh_users_data(self) -> None:
+        self.generation = 0
+        self._unlogged_generation = 0
+        self.csv_path = CSV_PATH
+        self._shared_dataset_checked_at = 0.0
+        self._refresh_lock = threading.Lock()
+        self._last_refresh_id = 0
+        self._running_refresh_id : int | None = None
+        self._pending_refresh_id : int | None = None
+        self._pending_refresh_file_path : str | None = None
+        self._refresh_done = threading.Condition(self._refresh_lock)
+        self._completed_refresh_id = 0
+        self._refresh_failures : dict[int, str] = {}
+        self._write_lock = threading.Lock()
+        self._change_log : UserChangeLog | None = None
+        self._event_loop : asyncio.AbstractEventLoop | None = None
+        self._dataset : UserDataset | SharedUserDataset = UserDataset([])
+    @property
+    def users(self) -> Sequence[UserRecord]:
+        """_In-memory list of users, in the order of the data source._
+
+        Returns:
+            Sequence[UserRecord]: The records of the users currently loaded,
+            a lazy view from the shared dataset.
+        """
+        return self._get_dataset().get_users()
+    @users.setter
+    def users(self, users_data : list[User | UserRecord]) -> None:
+        """_Replaces the in-memory list of users and rebuilds the indexes._
+
+        The users no longer come from a CSV file, so the next writes are not persisted.
+
+        Args:
+            users_data (list[User | UserRecord]): The new list of users.
+        """
+        dataset = UserDataset(users_data)
+        with self._write_lock:
+            self._change_log = None
+            self._swap_dataset(dataset)
+    def _swap_dataset(self, dataset : UserDataset | SharedUserDataset) -> None:
+        """_Atomically replaces the current dataset and increments the generation._
+
+        Args:
+            dataset (UserDataset | SharedUserDataset): The new, fully built dataset.
+        """
+        self._dataset = dataset
+        self._increment_generation()
+    def _increment_generation(self, logged : bool = False) -> None:
+        """_Increments the generation, remembering it unless the change is in the change log._
+
+        Args:
+            logged (bool): Whether the change is logged in the change log, so that
+                the users are still those of the CSV file and of the change log.
+        """
+        self.generation += 1
+        if not logged:
+            self._unlogged_generation = self.generation
+    def get_logged_writes_generation(self, generation : int) -> int | None:
+        """_Returns the current generation, if only logged writes changed the users since one._
+
+        A compaction of the change log rewrites the CSV file with the changes
+        already applied in memory: if the users were only changed by the logged
+        writes since they were loaded, they are still those of the rewritten file.
+
+        Args:
+            generation (int): The generation the users were loaded at.
+
+        Returns:
+            int | None: The current generation, or None if the users were reloaded
+            or changed without being logged since.
+        """
+        with self._write_lock:
+            if self._unlogged_generation > generation:
+                return None
+            return self.generation
+    def get_change_log(self) -> UserChangeLog | None:
+        """_Returns the change log of the CSV file the users were loaded from, if any._"""
+        return self._change_log
+    def _get_writable_dataset(self) -> UserDataset:
+        """_Returns the current dataset, ensuring it can be modified._
+
+        Returns:
+            UserDataset: The in-memory dataset of this process.
+
+        Raises:
+            RuntimeError: If the users are served from the shared dataset.
+        """
+        if not isinstance(self._dataset, UserDataset):
+            raise RuntimeError("Users served from the shared dataset are read-only")
+        return self._dataset
+    def set_event_loop(self, loop : asyncio.AbstractEventLoop | None) -> None:
+        """_Sets the event loop of the readers, on which the changes to the dataset are applied._
+
+        Args:
+            loop (asyncio.AbstractEventLoop | None): The running event loop of the
+                application, or None to apply the changes in the threads of the writers.
+
+        Example:
+            >>> user_service.set_event_loop(asyncio.get_running_loop())
+        """
+        self._event_loop = loop
+    def _apply_to_dataset(self, apply : Callable[[], object]) -> object:
+        """_Applies a change to the dataset on the event loop of the readers, and waits for it._
+
+        The readers do not lock the dataset: the change is applied by the event
+        loop between two reads, while the calling thread waits for it with the
+        write lock held. Without event loop, or when called from the event loop
+        itself, the change is applied directly.
+
+        Args:
+            apply (Callable[[], object]): Applies the change.
+
+        Returns:
+            object: The result of `apply`.
+        """
+        loop = self._event_loop
+        if loop is None or not loop.is_running():
+            return apply()
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is loop:
+            return apply()
+        async def apply_on_loop():
+            return apply()
+        return asyncio.run_coroutine_threadsafe(apply_on_loop(), loop).result()
+    def add_user(self, user : User) -> None:
+        """_Adds a single user, updating the indexes and the stats incrementally._
+
+        Like all the writes, it is serialized with the others by the write lock.
+        It is not logged in the change log.
+
+        Args:
+            user (User): The user to add.
+
+        Raises:
+            RuntimeError: If the users are served from the shared dataset.
+        """
+        with self._write_lock:
+            dataset = self._get_writable_dataset()
+            self._apply_to_dataset(lambda: dataset.add_user(user))
+            self._increment_generation()
+    def add_users(self, users_data : list[User | UserRecord]) -> None:
+        """_Adds a batch of users, updating the indexes and the stats incrementally._
+
+        The batch is added under the write lock, e.g. the rows appended to the
+        CSV file by the file watcher. It is not logged in the change log.
+
+        Args:
+            users_data (list[User | UserRecord]): The users to add, in order.
+
+        Raises:
+            RuntimeError: If the users are served from the shared dataset.
+        """
+        with self._write_lock:
+            dataset = self._get_writable_dataset()
+            self._apply_to_dataset(lambda: dataset.add_users(users_data))
+            self._increment_generation()
+    def remove_user(self, user : User) -> None:
+        """_Removes a single user, updating the indexes and the stats incrementally._
+
+        The user is removed under the write lock. It is not logged in the change log.
+
+        Args:
+            user (User): The user to remove, as returned by this service.
+
+        Raises:
+            ValueError: If the user is not loaded in memory.
+            RuntimeError: If the users are served from the shared dataset.
+        """
+        with self._write_lock:
+            dataset = self._get_writable_dataset()
+            self._apply_to_dataset(lambda: dataset.remove_user(user))
+            self._increment_generation()
+    def append_users(self, users_data : list[User | UserRecord], generation : int) -> int:
+        """_Adds the users of rows appended to the CSV file, unless the users changed since._
+
+        The check and the add are atomic under the write lock, so the rows are
+        never added on top of a dataset reloaded or modified in the meantime.
+
+        Args:
+            users_data (list[User | UserRecord]): The users of the appended rows, in order.
+            generation (int): The generation the users were loaded at.
+
+        Returns:
+            int: The new generation.
+
+        Raises:
+            RuntimeError: If the generation changed, or if the users are served
+                from the shared dataset.
+        """
+        with self._write_lock:
+            if self.generation != generation:
+                raise RuntimeError(
+                    f"Users changed since generation {generation} (now {self.generation})")
+            dataset = self._get_writable_dataset()
+            self._apply_to_dataset(lambda: dataset.add_users(users_data))
+            self._increment_generation()
+            return self.generation
+    def create_user(self, user : User) -> bool:
+        """_Adds a user, unless its email is already used, and persists it in the change log._
+
+        Args:
+            user (User): The validated user.
+
+        Returns:
+            bool: True if the user was added, False if its email is already used.
+
+        Raises:
+            RuntimeError: If the users are served from the shared dataset.
+            OSError: If the change cannot be logged, the user is then not added.
+        """
+        with self._write_lock:
+            dataset = self._get_writable_dataset()
+            if dataset.get_user_by_email(user.email) is not None:
+                return False
+            if self._change_log is not None:
+                self._change_log.append_upsert(user)
+            self._apply_to_dataset(lambda: dataset.add_user(user))
+            self._increment_generation(logged=self._change_log is not None)
+        self._compact_change_log_if_needed()
+        return True
+    def upsert_user(self, user : User) -> bool:
+        """_Adds or replaces in place the user of an email, and persists it in the change log._
+
+        The indexes, the sort orders and the stats are updated incrementally.
+
+        Args:
+            user (User): The validated user.
+
+        Returns:
+            bool: True if the user was added, False if it replaced a user.
+
+        Raises:
+            RuntimeError: If the users are served from the shared dataset.
+            OSError: If the change cannot be logged, the users are then unchanged.
+        """
+        with self._write_lock:
+            dataset = self._get_writable_dataset()
+            if self._change_log is not None:
+                self._change_log.append_upsert(user)
+            created = self._apply_to_dataset(lambda: dataset.upsert_user(user))
+            self._increment_generation(logged=self._change_log is not None)
+        self._compact_change_log_if_needed()
+        return created
+    def delete_user(self, email : str) -> bool:
+        """_Removes the user of an email, and persists it in the change log._
+
+        Args:
+            email (str): The email, case-insensitive.
+
+        Returns:
+            bool: True if the user was removed, False if the email is unknown.
+
+        Raises:
+            RuntimeError: If the users are served from the shared dataset.
+            OSError: If the change cannot be logged, the user is then not removed.
+        """
+        with self._write_lock:
+            dataset = self._get_writable_dataset()
+            if dataset.get_user_by_email(email) is None:
+                return False
+            if self._change_log is not None:
+                self._change_log.append_delete(email)
+            self._apply_to_dataset(lambda: dataset.delete_user(email))
+            self._increment_generation(logged=self._change_log is not None)
+        self._compact_change_log_if_needed()
+        return True
+    def _compact_change_log_if_needed(self) -> None:
+        """_Starts the compaction of the change log in the background, once it is long enough._"""
+        change_log = self._change_log
+        if change_log is not None and change_log.should_compact():
+            change_log.request_compaction()
+    def refresh_users_data(self, file_path : str | None = None) -> None:
         """_Reloads user data from the data source (CSV file via UserLoader)._
 
-        This method replaces the current in-memory list of users with
-        a newly loaded list.
+        This method builds a new dataset off to the side and swaps it in once
+        complete. The users are streamed from the loader in chunks, using its
+        fast validation mode, and the indexes are built incrementally as each
+        chunk arrives. The `PRESORTED_SORTS` orders, and the search index if
+        `USERS_SEARCH_INDEX_ENABLED`, are built before the swap. If
+        `USERS_LOADING_WORKERS` is greater than 1, the CSV file is parsed by
+        that many processes.
+
+        If `USERS_SNAPSHOT_ENABLED`, the users are loaded from the snapshot
+        of the CSV file when it is up to date, and the snapshot is rewritten
+        while the CSV file is parsed.
+
+        If `USERS_CHANGE_LOG_ENABLED`, the writes logged in the change log of
+        the CSV file and not compacted into it yet are replayed on the new
+        dataset: first before its sort orders are built, then, under the write
+        lock, the writes logged during the reload, right before the swap.
+
+        If `USERS_SHARED_DIR` is set, the users are published to the shared
+        dataset instead (see `_refresh_shared_users_data`).
+
+        This method blocks until the dataset is reloaded: use `request_refresh`
+        to reload it in the background.
+
+        The duration, throughput and rejected rows of the load are recorded
+        in `metrics_service`.
+
+        Args:
+            file_path (str | None): Optional path to the CSV file. Defaults to `csv_path`.
+        """
+        file_path = file_path or self.csv_path
+        started_at = time.perf_counter()
+        nb_rejected_rows = skipped_rows_log.count
+        if USERS_SHARED_DIR is not None:
+            nb_users = self._refresh_shared_users_data(file_path)
+        else:
+            change_log = self._get_change_log(file_path)
+            with change_log.compaction_lock if change_log is not None else nullcontext():
+                source_key = (
+                    UserLoader.get_snapshot_key(file_path) if USERS_SNAPSHOT_ENABLED else None)
+                dataset = UserDataset()
+                for users_chunk in UserService._load_users_by_chunks(file_path, source_key):
+                    dataset.add_users(users_chunk)
+                changes = change_log.read_changes() if change_log is not None else []
+                UserChangeLog.apply_changes(dataset, changes)
+                dataset.build_sort_orders()
+                if USERS_SEARCH_INDEX_ENABLED:
+                    dataset.get_search_index()
+                with self._write_lock:
+                    if change_log is not None:
+                        UserChangeLog.apply_changes(
+                            dataset, change_log.read_changes()[len(changes):])
+                    self._change_log = change_log
+                    self._swap_dataset(dataset)
+            nb_users = len(dataset)
+        metrics_service.observe_load(
+            duration=time.perf_counter() - started_at,
+            nb_users=nb_users,
+            nb_rejected_rows=skipped_rows_log.count - nb_rejected_rows,
+            dataset_size=len(self._dataset))
+    def _get_change_log(self, file_path : str) -> UserChangeLog | None:
+        """_Returns the change log of a CSV file, reusing the current one if it is the same file._
+
+        Returns:
+            UserChangeLog | None: The change log, or None if `USERS_CHANGE_LOG_ENABLED` is off.
+        """
+        if not USERS_CHANGE_LOG_ENABLED:
+            return None
+        if self._change_log is not None and self._change_log.csv_path == file_path:
+            return self._change_log
+        return UserChangeLog(file_path)
+    def _refresh_shared_users_data(self, file_path : str) -> int:
+        """_Publishes the users to the shared dataset, and attaches this process to it._
+
+        Under the publication lock, the users are loaded and published as a new
+        generation, unless the current generation was already loaded from the
+        same CSV content by another process, e.g. another worker starting up.
+
+        Args:
+            file_path (str): Path to the CSV file.
+
+        Returns:
+            int: The number of users loaded by this process, 0 if it attached to
+            a generation published by another process.
+        """
+        nb_users = 0
+        with SharedUserDataset.lock(USERS_SHARED_DIR):
+            source_key = UserLoader.get_snapshot_key(file_path)
+            generation = SharedUserDataset.get_current_generation(USERS_SHARED_DIR)
+            if (generation is None or SharedUserDataset.get_source_key(
+                    USERS_SHARED_DIR, generation) != source_key):
+                users_data = [
+                    user
+                    for users_chunk in UserService._load_users_by_chunks(file_path, source_key)
+                    for user in users_chunk]
+                generation = SharedUserDataset.publish(
+                    users_data, USERS_SHARED_DIR, source_key, USERS_SEARCH_INDEX_ENABLED)
+                nb_users = len(users_data)
+            self._swap_dataset(SharedUserDataset.attach(USERS_SHARED_DIR, generation))
+        self._shared_dataset_checked_at = time.monotonic()
+        return nb_users
+    @staticmethod
+    def _load_users_by_chunks(
+        file_path : str,
+        source_key : tuple[int, int, str] | None) -> Iterator[list[User | UserRecord]]:
+        """_Loads the users from the snapshot or from the CSV file, in chunks._
+
+        When the CSV file is parsed, each chunk is written to the new snapshot
+        before being yielded, and the snapshot is committed once all of them
+        were consumed.
+
+        Args:
+            file_path (str): Path to the CSV file.
+            source_key (tuple | None): Key of the CSV content, computed before loading it.
+                If None, the snapshot is neither read nor written.
+
+        Yields:
+            list[User | UserRecord]: The next chunk of validated users.
+        """
+        if source_key is not None:
+            snapshot_chunks = UserLoader.load_users_from_snapshot(source_key, file_path)
+            if snapshot_chunks is not None:
+                yield from snapshot_chunks
+                return
+        if USERS_LOADING_WORKERS > 1:
+            users_chunks = UserLoader.load_users_in_parallel(
+                file_path, max_workers=USERS_LOADING_WORKERS, fast_validation=True)
+        else:
+            users_chunks = UserLoader.load_users_by_chunks(file_path, fast_validation=True)
+        if source_key is None:
+            yield from users_chunks
+            return
+        snapshot_writer = UserSnapshotWriter(source_key, file_path)
+        try:
+            for users_chunk in users_chunks:
+                snapshot_writer.write(users_chunk)
+                yield users_chunk
+            snapshot_writer.commit()
+        finally:
+            snapshot_writer.abort()
+    def request_refresh(self, file_path : str | None = None) -> int:
+        """_Requests a reload of the users in a background thread._
+
+        Concurrent requests are coalesced: while a refresh is running, all the new
+        requests share a single pending refresh, started when the running one ends,
+        which reloads the file of the latest of them.
+        The returned id can be polled with `get_refresh_status`, or waited for
+        with `wait_for_refresh`.
+
+        Args:
+            file_path (str | None): Optional path to the CSV file. Defaults to `csv_path`.
+
+        Returns:
+            int: The id of the refresh that will include this request.
+
+        Example:
+            >>> refresh_id = user_service.request_refresh()
+            >>> user_service.get_refresh_status(refresh_id)
+            'running'
+        """
+        with self._refresh_lock:
+            if self._pending_refresh_id is None:
+                self._last_refresh_id += 1
+                self._pending_refresh_id = self._last_refresh_id
+            self._pending_refresh_file_path = file_path
+            refresh_id = self._pending_refresh_id
+            if self._running_refresh_id is None:
+                self._start_pending_refresh()
+        return refresh_id
+    def _start_pending_refresh(self) -> None:
+        """_Starts the pending refresh in a background thread (refresh lock held)._"""
+        self._running_refresh_id = self._pending_refresh_id
+        self._pending_refresh_id = None
+        threading.Thread(
+            target=self._run_refresh,
+            args=(self._running_refresh_id, self._pending_refresh_file_path),
+            name=f"users-refresh-{self._running_refresh_id}",
+            daemon=True).start()
+    def _run_refresh(self, refresh_id : int, file_path : str | None) -> None:
+        """_Runs a refresh, records its outcome and starts the pending one, if any._
+
+        Args:
+            refresh_id (int): The id of the refresh.
+            file_path (str | None): Path to the CSV file, None for `csv_path`.
         """
-        self.users = UserLoader.load_users_from_file()
-    def get_users(self) -> list[User]:
+        try:
+            self.refresh_users_data(file_path)
+            logger_service.info("Users refresh %s done", refresh_id)
+        except (OSError, ValueError, RuntimeError) as e:
+            logger_service.error("Users refresh %s failed: %s", refresh_id, e)
+            with self._refresh_lock:
+                self._refresh_failures[refresh_id] = str(e)
+                if len(self._refresh_failures) > REFRESH_FAILURES_KEPT:
+                    del self._refresh_failures[min(self._refresh_failures)]
+        with self._refresh_lock:
+            self._completed_refresh_id = refresh_id
+            self._running_refresh_id = None
+            self._refresh_done.notify_all()
+            if self._pending_refresh_id is not None:
+                self._start_pending_refresh()
+    def get_refresh_status(self, refresh_id : int) -> str | None:
+        """_Returns the status of a refresh requested with `request_refresh`._
+
+        Args:
+            refresh_id (int): The id of the refresh.
+
+        Returns:
+            str | None: "pending", "running", "done" or "failed",
+            or None if the id is unknown.
+        """
+        with self._refresh_lock:
+            if refresh_id <= 0 or refresh_id > self._last_refresh_id:
+                return None
+            if refresh_id == self._pending_refresh_id:
+                return "pending"
+            if refresh_id == self._running_refresh_id:
+                return "running"
+            if refresh_id in self._refresh_failures:
+                return "failed"
+            return "done"
+    def wait_for_refresh(self, refresh_id : int, timeout : float | None = None) -> str | None:
+        """_Waits for a refresh requested with `request_refresh` to end._
+
+        Args:
+            refresh_id (int): The id of the refresh.
+            timeout (float | None): Maximum number of seconds to wait. If None, waits until it ends.
+
+        Returns:
+            str | None: The status of the refresh (see `get_refresh_status`).
+        """
+        with self._refresh_done:
+            self._refresh_done.wait_for(
+                lambda: not 0 < refresh_id <= self._last_refresh_id
+                or refresh_id <= self._completed_refresh_id, timeout)
+        return self.get_refresh_status(refresh_id)
+    def get_refresh_error(self, refresh_id : int) -> str | None:
+        """_Returns the error of a failed refresh, if it is still recorded._
+
+        Args:
+            refresh_id (int): The id of the refresh.
+
+        Returns:
+            str | None: The error message, or None if the refresh did not fail.
+        """
+        with self._refresh_lock:
+            return self._refresh_failures.get(refresh_id)
+    def _get_dataset(self) -> UserDataset | SharedUserDataset:
+        """_Returns the current dataset, swapping to the latest shared generation if needed._
+
+        With the shared dataset, the latest generation is checked at most every
+        `SHARED_DATASET_POLL_INTERVAL` seconds.
+
+        Returns:
+            UserDataset | SharedUserDataset: The current dataset.
+        """
+        dataset = self._dataset
+        if not isinstance(dataset, SharedUserDataset):
+            return dataset
+        now = time.monotonic()
+        if now - self._shared_dataset_checked_at < SHARED_DATASET_POLL_INTERVAL:
+            return dataset
+        self._shared_dataset_checked_at = now
+        generation = SharedUserDataset.get_current_generation(USERS_SHARED_DIR)
+        if generation is not None and generation != dataset.generation:
+            try:
+                self._swap_dataset(SharedUserDataset.attach(USERS_SHARED_DIR, generation))
+            except OSError as e:
+                logger_service.warning("Shared users generation %s not attached: %s", generation, e)
+        return self._dataset
+    def get_generation(self) -> int:
+        """_Returns the generation of the current dataset._
+
+        With the shared dataset, the latest published generation is attached
+        first if needed, so the generation matches the dataset of the next reads.
+
+        Returns:
+            int: The generation, incremented each time the users change.
+        """
+        self._get_dataset()
+        return self.generation
+    def get_dataset_generation(self) -> str:
+        """_Returns the name of the current dataset, which the key cursors of the pages refer to._
+
+        Unlike `get_generation`, it does not change with the writes applied in
+        place, only when the dataset is replaced (a reload, or a new shared
+        generation), whose users get new sequences.
+
+        Returns:
+            str: The name of the dataset, the generation of a shared dataset.
+        """
+        return self._get_dataset().generation
+    def get_users(self) -> Sequence[UserRecord]:
         """_Retrieves the current in-memory list of users._
 
         Returns:
-            list[User]: A list of User model instances currently loaded in memory.
+            Sequence[UserRecord]: The records of the users currently loaded in memory,
+            a lazy view from the shared dataset.
         """
         return self.users
-    def get_adult_users(self):
+    def get_columnar_store(self) -> ColumnarUserStore:
+        """_Returns the columnar (NumPy-backed) store of the current users._
+
+        The store is built on the first call and reused until the users change.
+
+        Returns:
+            ColumnarUserStore: The columnar store of the users.
+
+        Raises:
+            RuntimeError: If NumPy is not installed.
+
+        Example:
+            >>> store = user_service.get_columnar_store()
+            >>> store.get_average_age_of(store.get_adult_users_of())
+        """
+        return self._get_dataset().get_columnar_store()
+    def get_encoded_users(self, users_data : list[User | UserRecord]) -> list[bytes]:
+        """_Returns the JSON encoding of users, pre-encoded when the users were loaded._
+
+        Args:
+            users_data (list[User | UserRecord]): The users, as returned by this service.
+
+        Returns:
+            list[bytes]: The JSON encoding of each user, in order.
+        """
+        return self._get_dataset().get_encoded_users(users_data)
+    def iter_encoded_users(self, users_data : Iterable[User | UserRecord]) -> Iterator[bytes]:
+        """_Returns an iterator over the JSON encoding of users, encoded as they are consumed._
+
+        Args:
+            users_data (Iterable[User | UserRecord]): The users, as returned by this service.
+
+        Returns:
+            Iterator[bytes]: The JSON encoding of each user, in order.
+
+        Example:
+            >>> JSONService.stream_ndjson(user_service.iter_encoded_users(users))
+        """
+        return self._get_dataset().iter_encoded_users(users_data)
+    def encode_users(self, users_data : list[User | UserRecord]) -> bytes:
+        """_Returns a JSON array of users, concatenating their pre-encoded JSON._
+
+        Args:
+            users_data (list[User | UserRecord]): The users, as returned by this service.
+
+        Returns:
+            bytes: The JSON array of the users.
+
+        Example:
+            >>> JSONService.response(encoded_data=user_service.encode_users(users))
+        """
+        return JSONService.encode_array(self.get_encoded_users(users_data))
+    def get_adult_users(self) -> Sequence[UserRecord]:
         """_Return the list of users who are adults (age >= 18)._
 
-        This method filters the current in-memory 
-        list of users and returns only those whose age is 18 or older. 
-        
-        It does not modify the internal users list, but returns a new list.
+        This method returns the adult view precomputed when the users
+        were loaded, without copying it. The returned list must not be modified.
+        From the shared dataset, it is a lazy view which builds only the users read:
+        use `get_adult_stats().count` to count them.
 
         Returns:
-            list[User]: A list of User instances representing adults.
+            Sequence[UserRecord]: The records of the adult users.
 
         Example:
             >>> adult_users = user_service.get_adult_users()
             >>> for user in adult_users:
             ...     print(user.name, user.age)
         """
-        return UserService.get_adult_users_of(self.users)
+        return self._get_dataset().get_adult_users()
+    def get_minor_users(self) -> Sequence[UserRecord]:
+        """_Return the list of users who are minors (age < 18)._
+
+        The returned list is the precomputed view and must not be modified.
+
+        Returns:
+            Sequence[UserRecord]: The records of the minor users.
+        """
+        return self._get_dataset().get_minor_users()
+    def get_adult_users_of_team(self, team : str) -> Sequence[UserRecord]:
+        """_Return the adult users of a team, using the team index._
+
+        The returned list is the precomputed view and must not be modified.
+
+        Args:
+            team (str): The team name to filter by.
+
+        Returns:
+            Sequence[UserRecord]: The adult users of the team, empty if the team is unknown.
+
+        Example:
+            >>> backend_users = user_service.get_adult_users_of_team("Backend")
+        """
+        return self._get_dataset().get_adult_users_of_team(team)
+    def get_adult_stats(self, team : str | None = None) -> UserStats:
+        """_Return the precomputed stats of the adult users, optionally of a team._
+
+        Args:
+            team (str | None): Optional team name. If None, the stats cover all adult users.
+
+        Returns:
+            UserStats: The aggregates of the adult users, empty if the team is unknown.
+
+        Example:
+            >>> stats = user_service.get_adult_stats("Backend")
+            >>> print(stats.count, stats.average_age)
+        """
+        return self._get_dataset().get_adult_stats(team)
+    def get_adult_stats_by_team(self, teams : list[str] | None = None) -> dict[str, UserStats]:
+        """_Return the precomputed stats of the adult users of many teams at once._
+
+        The stats of every team are maintained with the dataset, so the stats
+        of any number of teams are read without scanning the users.
+
+        Args:
+            teams (list[str] | None): Optional team names. If None, the stats of
+                all the teams with adult users are returned.
+
+        Returns:
+            dict[str, UserStats]: The stats of each team, in the order of the given
+            teams (empty for an unknown team), or in the order of the data source.
+
+        Example:
+            >>> for team, stats in user_service.get_adult_stats_by_team(["Backend", "Ops"]).items():
+            ...     print(team, stats.count, stats.average_age)
+        """
+        adult_stats_by_team = self._get_dataset().get_adult_stats_by_team()
+        if teams is None:
+            return dict(adult_stats_by_team)
+        return {team: adult_stats_by_team.get(team) or UserStats() for team in teams}
+    def get_sorted_adult_users(self, sort : str, team : str | None = None) -> SortedUsers:
+        """_Return the adult users in a sort order, optionally of a team._
+
+        The sort orders are built once per dataset and kept up to date, so a sorted
+        page is a slice instead of a sort per request.
+
+        Args:
+            sort (str): The sort order: "age", "start_date" or "name", prefixed
+                by "-" for the descending order.
+            team (str | None): Optional team name to filter by.
+
+        Returns:
+            SortedUsers: The adult users in the sort order, empty if the team is unknown.
+
+        Raises:
+            ValueError: If the sort order is invalid.
+
+        Example:
+            >>> oldest_backend_users = user_service.get_sorted_adult_users("-age", "Backend")[:10]
+        """
+        return self._get_dataset().get_sorted_adult_users(sort, team)
+    def filter_adult_users(self, user_filter : UserFilter, sort : str | None = None) -> SortedUsers:
+        """_Return the adult users matching a filter, optionally in a sort order._
+
+        The most selective index of the filter is used first (the team index,
+        or a range of the age, start date or name sort orders), and the other
+        criteria are checked on its candidates only.
+
+        Args:
+            user_filter (UserFilter): The filter.
+            sort (str | None): Optional sort order. If None, the users are in
+                their original order.
+
+        Returns:
+            SortedUsers: The matching adult users.
+
+        Raises:
+            ValueError: If the sort order is invalid.
+
+        Example:
+            >>> user_filter = UserFilter(teams=["Backend", "Ops"], min_age=40)
+            >>> user_service.filter_adult_users(user_filter, sort="-age")[:10]
+        """
+        return self._get_dataset().filter_adult_users(user_filter, sort)
+    def get_user_by_email(self, email : str) -> UserRecord | None:
+        """_Return the user of an email, using the email index built at load time._
+
+        Args:
+            email (str): The email, case-insensitive.
+
+        Returns:
+            UserRecord | None: The user, or None if the email is unknown. If the
+            email was found more than once, the first user is returned.
+
+        Example:
+            >>> user_service.get_user_by_email("alice@example.com")
+        """
+        return self._get_dataset().get_user_by_email(email)
+    def search_adult_users(self, query : str, max_results : int) -> SortedUsers:
+        """_Search the adult users by name or email, for type-ahead._
+
+        The query matches the start of a word of the name, the start of the
+        email, or, from 3 characters, a substring of them (case-insensitive).
+        The exact matches come first, then the prefix matches, then the
+        substring matches.
+
+        Args:
+            query (str): The query.
+            max_results (int): Maximum number of results: the search stops
+                once they are found.
+
+        Returns:
+            SortedUsers: The matching adult users, ranked.
+
+        Example:
+            >>> user_service.search_adult_users("ali", max_results=10)[:]
+        """
+        return self._get_dataset().search_adult_users(query, max_results)
+    def get_oldest_adult_users(self, n : int, team : str | None = None) -> list[UserRecord]:
+        """_Return the N oldest adult users, optionally of a team._
+
+        Up to `top_n` users are read from the stats, beyond that from the
+        "-age" sort order. Users of the same age keep their original order.
+
+        Args:
+            n (int): The number of oldest users to return.
+            team (str | None): Optional team name to filter by.
+
+        Returns:
+            list[UserRecord]: The N oldest adult users, sorted by descending age.
+        """
+        adult_stats = self.get_adult_stats(team)
+        if n <= adult_stats.top_n:
+            return adult_stats.get_oldest_users(n)
+        return self.get_sorted_adult_users("-age", team)[:n]
+    @staticmethod
+    def to_users(users_data : list[User | UserRecord]) -> list[User]:
+        """_Converts the records of users to `User` models, at the API boundary._
+
+        Args:
+            users_data (list[User | UserRecord]): The users, as returned by this service.
+
+        Returns:
+            list[User]: The `User` models of the users, in order.
+        """
+        return [
+            user.to_user() if isinstance(user, UserRecord) else user for user in users_data]
     @staticmethod
     def get_adult_users_of(users_data : list[User]):
         """Return the list of users who are adults (age >= 18).
@@ -86,7 +919,7 @@ class UserService:
             >>> for user in adult_users:
             ...     print(user.name, user.age)
         """
-        return [user for user in users_data if user.age >= 18]
+        return [user for user in users_data if user.age >= ADULT_AGE]
     @staticmethod
     def get_users_of_team_of(users_data : list[User], team) -> list[User]:
         """_Filters a list of users by team._
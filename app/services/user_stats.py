@@ -0,0 +1,209 @@
+"""_user_stats.py_
+
+This module provides the UserStats class, which maintains the aggregates
+exposed by the /stats endpoint (count, sum of ages and top N oldest users)
+for a group of users. The aggregates are updated incrementally, so reading
+them costs O(1) instead of a full scan of the group.
+"""
+# pylint: disable=too-many-instance-attributes
+
+from bisect import insort
+from collections.abc import Callable
+from app.models.user import User
+from app.services.block_list import BlockList
+
+STATS_TOP_N = 3
+
+class UserStats:
+    """_Incremental aggregates over a group of users._
+
+    The top N oldest users are kept in a bounded list sorted by descending age.
+    Users of the same age are ordered by insertion, like `heapq.nlargest`
+    over the group in its original order, or by the sequences given by
+    `get_sequence` when the users can be inserted back at their original place.
+    With `get_sequence`, the users are also kept by age, in increasing sequence,
+    so the bounded list is refilled from the stats themselves when one of the
+    oldest users is removed.
+
+    Attributes:
+        top_n (int): Maximum number of oldest users kept.
+        get_sequence (Callable[[User], int] | None): Returns the sequence of a user,
+            used to break ties on age instead of the insertion rank.
+        count (int): Number of users in the group.
+        age_sum (int): Sum of the ages of the users in the group.
+
+    Example:
+        >>> stats = UserStats.from_users(users)
+        >>> stats.count, stats.average_age, stats.get_oldest_users(3)
+    """
+    def __init__(
+        self,
+        top_n : int = STATS_TOP_N,
+        get_sequence : Callable[[User], int] | None = None):
+        """_Initializes empty aggregates._
+
+        Args:
+            top_n (int): Maximum number of oldest users kept. Defaults to `STATS_TOP_N`.
+            get_sequence (Callable[[User], int] | None): Optional sequence of the users.
+                Defaults to the insertion rank.
+        """
+        self.top_n = top_n
+        self.get_sequence = get_sequence
+        self.count = 0
+        self.age_sum = 0
+        self._oldest : list[tuple[int, int, User]] = []
+        self._next_sequence = 0
+        self._users_by_age : dict[int, BlockList] | None = (
+            None if get_sequence is None else {})
+        # Highest sequence added so far: a user with a higher one is appended to its age
+        self._max_sequence = -1
+    @staticmethod
+    def from_users(users_data : list[User], top_n : int = STATS_TOP_N) -> "UserStats":
+        """_Builds the aggregates of a list of users._
+
+        Args:
+            users_data (list[User]): The users of the group, in insertion order.
+            top_n (int): Maximum number of oldest users kept.
+
+        Returns:
+            UserStats: The aggregates of the group.
+        """
+        stats = UserStats(top_n)
+        for user in users_data:
+            stats.add(user)
+        return stats
+    @staticmethod
+    def from_aggregates(
+        count : int,
+        age_sum : int,
+        oldest_users : list[User],
+        top_n : int = STATS_TOP_N) -> "UserStats":
+        """_Builds the aggregates of a group from precomputed values._
+
+        Args:
+            count (int): Number of users in the group.
+            age_sum (int): Sum of the ages of the users in the group.
+            oldest_users (list[User]): The oldest users of the group, sorted by descending age.
+            top_n (int): Maximum number of oldest users kept.
+
+        Returns:
+            UserStats: The aggregates of the group.
+        """
+        stats = UserStats.from_users(oldest_users[:top_n], top_n)
+        stats.count = count
+        stats.age_sum = age_sum
+        return stats
+    @property
+    def average_age(self) -> float:
+        """_Average age of the group, rounded to 1 decimal, 0.0 if the group is empty._"""
+        if self.count == 0:
+            return 0.0
+        return round(self.age_sum / self.count, 1)
+    def get_oldest_users(self, n : int) -> list[User]:
+        """_Returns the N oldest users of the group, sorted by descending age._
+
+        Args:
+            n (int): The number of oldest users to return, at most `top_n`.
+
+        Returns:
+            list[User]: The N oldest users.
+        """
+        return [user for _, _, user in self._oldest[:n]]
+    def add(self, user : User) -> None:
+        """_Adds a user to the aggregates._
+
+        Args:
+            user (User): The user joining the group.
+        """
+        self.count += 1
+        self.age_sum += user.age
+        sequence = self._get_sequence(user, self._next_sequence)
+        self._insert_oldest(user, sequence)
+        self._next_sequence += 1
+        if self._users_by_age is not None:
+            users_of_age = self._users_by_age.get(user.age)
+            if users_of_age is None:
+                users_of_age = self._users_by_age[user.age] = BlockList()
+            if sequence > self._max_sequence:
+                users_of_age.append(user)
+                self._max_sequence = sequence
+            else:
+                users_of_age.insert_sorted(
+                    user, lambda other_user: self.get_sequence(other_user) < sequence)
+    def remove(self, user : User, users_data : list[User] | None = None) -> None:
+        """_Removes a user from the aggregates._
+
+        If the user was one of the oldest users, the bounded list is refilled
+        from the remaining users of the group: those kept by age with
+        `get_sequence`, `users_data` otherwise.
+
+        Args:
+            user (User): The user leaving the group.
+            users_data (list[User] | None): The remaining users of the group, in
+                insertion order. Only read without `get_sequence`.
+
+        Raises:
+            ValueError: With `get_sequence`, if the user is not in the group.
+        """
+        if self._users_by_age is not None:
+            self._remove_by_age(user)
+        self.count -= 1
+        self.age_sum -= user.age
+        for i_oldest, (_, _, oldest_user) in enumerate(self._oldest):
+            if oldest_user is user:
+                del self._oldest[i_oldest]
+                if len(self._oldest) < min(self.top_n, self.count):
+                    if self._users_by_age is not None:
+                        self._refill_oldest_by_age()
+                    else:
+                        self._rebuild_oldest(users_data)
+                return
+    def _remove_by_age(self, user : User) -> None:
+        """_Removes a user from the users kept by age, found by bisection on its sequence._"""
+        sequence = self.get_sequence(user)
+        users_of_age = self._users_by_age.get(user.age)
+        if users_of_age is None or not users_of_age.remove_sorted(
+                user, lambda other_user: self.get_sequence(other_user) < sequence):
+            raise ValueError(f"User not in stats: {user.email}")
+        if not users_of_age:
+            del self._users_by_age[user.age]
+    def _refill_oldest_by_age(self) -> None:
+        """_Refills the bounded list of the oldest users from the users kept by age._
+
+        The ages are read from the oldest, and the users of an age in increasing
+        sequence, so only the users of the list and of its last age are read.
+        """
+        self._oldest = []
+        for age in sorted(self._users_by_age, reverse=True):
+            for user in self._users_by_age[age]:
+                if len(self._oldest) == self.top_n:
+                    return
+                self._oldest.append((-age, self.get_sequence(user), user))
+    def _get_sequence(self, user : User, rank : int) -> int:
+        """_Returns the sequence of a user, or its insertion rank without `get_sequence`._"""
+        if self.get_sequence is None:
+            return rank
+        return self.get_sequence(user)
+    def _insert_oldest(self, user : User, sequence : int) -> None:
+        """_Inserts a user in the bounded list of the oldest users, if old enough._
+
+        Args:
+            user (User): The user to insert.
+            sequence (int): Insertion rank of the user, used to break ties on age.
+        """
+        entry = (-user.age, sequence, user)
+        if len(self._oldest) == self.top_n:
+            if entry[:2] >= self._oldest[-1][:2]:
+                return
+            self._oldest.pop()
+        insort(self._oldest, entry, key=lambda oldest_entry: oldest_entry[:2])
+    def _rebuild_oldest(self, users_data : list[User]) -> None:
+        """_Recomputes the bounded list of the oldest users from the whole group._
+
+        Args:
+            users_data (list[User]): The users of the group, in insertion order.
+        """
+        self._oldest = []
+        for rank, user in enumerate(users_data):
+            self._insert_oldest(user, self._get_sequence(user, rank))
+        self._next_sequence = max(self._next_sequence, len(users_data))
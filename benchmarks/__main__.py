@@ -0,0 +1,83 @@
+"""_Benchmark suite of the API._
+
+Generates a synthetic users CSV file, runs the loading benchmarks, the
+microbenchmarks of the services and the HTTP load driver, then stores the
+results as JSON and compares them with a baseline run, if given.
+
+Usage:
+    python -m benchmarks --rows 100000 --output run.json
+    python -m benchmarks --rows 100000 --output run.json --baseline baseline.json
+
+The exit code is 1 if a benchmark regressed by more than the tolerance.
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+from benchmarks.bench_http import bench_http, DEFAULT_REQUESTS, DEFAULT_CONCURRENCY
+from benchmarks.bench_user_loader import bench_load
+from benchmarks.bench_user_service import bench_user_service, DEFAULT_REPEATS
+from benchmarks.data_generator import add_data_arguments, write_users_csv
+from benchmarks.results import (
+    make_result, save_results, load_results, compare_results, DEFAULT_TOLERANCE)
+
+def run_suite(
+    nb_rows: int,
+    team_skew: float = 0.0,
+    repeats: int = DEFAULT_REPEATS,
+    nb_requests: int = DEFAULT_REQUESTS,
+    concurrency: int = DEFAULT_CONCURRENCY) -> dict[str, dict]:
+    """_Runs all the benchmarks on a synthetic users CSV file._
+
+    Args:
+        nb_rows (int): Number of rows of the CSV file.
+        team_skew (float): Skew of the team sizes.
+        repeats (int): Number of calls of each microbenchmark.
+        nb_requests (int): Number of requests per endpoint.
+        concurrency (int): Number of concurrent HTTP clients.
+
+    Returns:
+        dict[str, dict]: The entry of each benchmark, by name.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "users.csv")
+        write_users_csv(file_path, nb_rows, team_skew=team_skew)
+        for fast_validation in (False, True):
+            nb_users, elapsed = bench_load(file_path, fast_validation)
+            name = f"loader.load_users_by_chunks(fast_validation={fast_validation})"
+            results[name] = make_result(
+                nb_users / elapsed, "rows/s", higher_is_better=True, elapsed=elapsed)
+        results.update(bench_user_service(file_path, repeats))
+        results.update(asyncio.run(bench_http(
+            file_path, nb_requests=nb_requests, concurrency=concurrency)))
+    return results
+
+def main() -> None:
+    """_Runs the suite, stores the results and compares them with the baseline._"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_data_arguments(parser)
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", default=None)
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+    results = run_suite(args.rows, args.team_skew, args.repeats, args.requests, args.concurrency)
+    save_results(args.output, results)
+    for name, result in results.items():
+        print(f"{name}: {result['value']:.4g} {result['unit']}")
+    print(f"Results written to {args.output}")
+    if args.baseline:
+        regressions = compare_results(results, load_results(args.baseline), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regression against {args.baseline}")
+
+if __name__ == "__main__":
+    main()
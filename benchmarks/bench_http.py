@@ -0,0 +1,120 @@
+"""_bench_http.py_
+
+In-process HTTP load driver of the API: concurrent clients send requests to
+`app.main:app` through the ASGI transport of httpx (no network, no server),
+and the throughput and p50/p95/p99 latencies of each endpoint are reported.
+
+Usage:
+    python -m benchmarks.bench_http --rows 100000 --requests 2000 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+import httpx
+from app.main import app
+from app.services.user_service import user_service
+from benchmarks.data_generator import add_data_arguments, write_users_csv
+from benchmarks.results import make_result
+
+DEFAULT_ENDPOINTS = [
+    "/users/", "/users/?team=Backend", "/users/?limit=100", "/stats/", "/stats/?team=Ops"]
+DEFAULT_ROWS = 10_000
+DEFAULT_REQUESTS = 1000
+DEFAULT_CONCURRENCY = 16
+
+def get_percentile(sorted_values: list[float], percentile: float) -> float:
+    """_Returns a percentile of sorted values, with the nearest-rank method._
+
+    Args:
+        sorted_values (list[float]): The values, in increasing order.
+        percentile (float): The percentile, between 0 and 100.
+
+    Returns:
+        float: The value of the percentile.
+    """
+    rank = max(1, round(percentile / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+async def drive_endpoint(
+    client: httpx.AsyncClient,
+    url: str,
+    nb_requests: int,
+    concurrency: int) -> dict:
+    """_Sends requests to an endpoint from concurrent clients, and measures them._
+
+    Args:
+        client (httpx.AsyncClient): The client of the application.
+        url (str): The URL of the endpoint.
+        nb_requests (int): Total number of requests.
+        concurrency (int): Number of concurrent clients.
+
+    Returns:
+        dict: The entry of the benchmark, with the throughput as value,
+        and the latency percentiles in the details.
+    """
+    latencies: list[float] = []
+    remaining = iter(range(nb_requests))
+    async def run_client():
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await client.get(url)
+            latencies.append(time.perf_counter() - start)
+            response.raise_for_status()
+    start = time.perf_counter()
+    await asyncio.gather(*(run_client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return make_result(
+        len(latencies) / elapsed, "req/s", higher_is_better=True,
+        p50=get_percentile(latencies, 50),
+        p95=get_percentile(latencies, 95),
+        p99=get_percentile(latencies, 99),
+        mean=statistics.fmean(latencies),
+        requests=len(latencies))
+
+async def bench_http(
+    file_path: str,
+    endpoints: list[str] | None = None,
+    nb_requests: int = DEFAULT_REQUESTS,
+    concurrency: int = DEFAULT_CONCURRENCY) -> dict[str, dict]:
+    """_Loads the users of a CSV file in the application, then drives each endpoint._
+
+    Args:
+        file_path (str): Path of the CSV file.
+        endpoints (list[str] | None): URLs of the endpoints. Defaults to `DEFAULT_ENDPOINTS`.
+        nb_requests (int): Number of requests per endpoint.
+        concurrency (int): Number of concurrent clients.
+
+    Returns:
+        dict[str, dict]: The entry of each endpoint, by name.
+    """
+    user_service.refresh_users_data(file_path)
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for url in endpoints or DEFAULT_ENDPOINTS:
+            results[f"http.GET {url}"] = await drive_endpoint(client, url, nb_requests, concurrency)
+    return results
+
+def main() -> None:
+    """_Runs the load driver and prints the throughput and latencies of each endpoint._"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_data_arguments(parser, default_rows=DEFAULT_ROWS)
+    parser.add_argument("--requests", type=int, default=DEFAULT_REQUESTS)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "users.csv")
+        write_users_csv(file_path, args.rows, team_skew=args.team_skew)
+        results = asyncio.run(bench_http(
+            file_path, nb_requests=args.requests, concurrency=args.concurrency))
+    for name, result in results.items():
+        print(f"{name}: {result['value']:,.0f} req/s, p50 {result['p50'] * 1000:.2f} ms, "
+              f"p95 {result['p95'] * 1000:.2f} ms, p99 {result['p99'] * 1000:.2f} ms")
+
+if __name__ == "__main__":
+    main()
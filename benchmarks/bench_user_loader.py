@@ -0,0 +1,58 @@
+"""_bench_user_loader.py_
+
+Benchmark of the UserLoader, comparing the full Pydantic validation path
+with the fast validation path, and the parallel loading, in rows per second.
+
+Usage:
+    python -m benchmarks.bench_user_loader --rows 100000 --workers 4
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from app.services.user_loader import UserLoader
+from benchmarks.data_generator import add_data_arguments, write_users_csv
+
+def bench_load(file_path: str, fast_validation: bool, workers: int = 1) -> tuple[int, float]:
+    """_Loads the users of a CSV file and measures the elapsed time._
+
+    Args:
+        file_path (str): Path of the CSV file to load.
+        fast_validation (bool): Whether to use the fast validation path.
+        workers (int): Number of loading processes. 1 loads in the current process.
+
+    Returns:
+        tuple[int, float]: Number of users loaded and elapsed time in seconds.
+    """
+    start = time.perf_counter()
+    if workers > 1:
+        users_chunks = UserLoader.load_users_in_parallel(
+            file_path, max_workers=workers, fast_validation=fast_validation)
+    else:
+        users_chunks = UserLoader.load_users_by_chunks(file_path, fast_validation=fast_validation)
+    nb_users = 0
+    for users_chunk in users_chunks:
+        nb_users += len(users_chunk)
+    return nb_users, time.perf_counter() - start
+
+def main() -> None:
+    """_Runs the benchmark and prints the throughput of each validation path._"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_data_arguments(parser)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "users.csv")
+        write_users_csv(file_path, args.rows, team_skew=args.team_skew)
+        for fast_validation in (False, True):
+            nb_users, elapsed = bench_load(file_path, fast_validation)
+            print(f"fast_validation={fast_validation}: {nb_users} users in {elapsed:.2f}s "
+                  f"({nb_users / elapsed:,.0f} rows/s)")
+        if args.workers > 1:
+            nb_users, elapsed = bench_load(file_path, True, args.workers)
+            print(f"fast_validation=True, workers={args.workers}: {nb_users} users in "
+                  f"{elapsed:.2f}s ({nb_users / elapsed:,.0f} rows/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""_bench_user_service.py_
+
+Microbenchmarks of the static methods of UserService, and of
+UserLoader.load_users_from_file, on a synthetic users CSV file.
+
+Usage:
+    python -m benchmarks.bench_user_service --rows 100000 --team-skew 1.0
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from collections.abc import Callable
+from app.services.user_loader import UserLoader
+from app.services.user_service import UserService
+from benchmarks.data_generator import add_data_arguments, write_users_csv
+from benchmarks.results import make_result
+
+DEFAULT_REPEATS = 5
+
+def time_call(function: Callable[[], object], repeats: int = DEFAULT_REPEATS) -> dict:
+    """_Calls a function several times and measures the elapsed times._
+
+    Args:
+        function (Callable[[], object]): The function to measure.
+        repeats (int): Number of calls.
+
+    Returns:
+        dict: The entry of the benchmark, with the best time as value,
+        and the median time in the details.
+    """
+    elapsed_times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        elapsed_times.append(time.perf_counter() - start)
+    return make_result(
+        min(elapsed_times), "s", higher_is_better=False,
+        median=statistics.median(elapsed_times), repeats=repeats)
+
+def bench_user_service(file_path: str, repeats: int = DEFAULT_REPEATS) -> dict[str, dict]:
+    """_Runs the microbenchmarks on the users of a CSV file._
+
+    Args:
+        file_path (str): Path of the CSV file.
+        repeats (int): Number of calls of each method.
+
+    Returns:
+        dict[str, dict]: The entry of each benchmark, by name.
+    """
+    results = {
+        "loader.load_users_from_file": time_call(
+            lambda: UserLoader.load_users_from_file(file_path), max(1, repeats // 2)),
+    }
+    users = UserLoader.load_users_from_file(file_path)
+    adult_users = UserService.get_adult_users_of(users)
+    team = users[0].team if users else ""
+    methods = {
+        "service.get_adult_users_of": lambda: UserService.get_adult_users_of(users),
+        "service.get_users_of_team_of": lambda: UserService.get_users_of_team_of(adult_users, team),
+        "service.get_average_age_of": lambda: UserService.get_average_age_of(adult_users),
+        "service.get_n_oldest_users": lambda: UserService.get_n_oldest_users(adult_users, 3),
+    }
+    for name, method in methods.items():
+        results[name] = time_call(method, repeats)
+    return results
+
+def main() -> None:
+    """_Runs the microbenchmarks and prints the best time of each one._"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_data_arguments(parser)
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        file_path = os.path.join(tmp_dir, "users.csv")
+        write_users_csv(file_path, args.rows, team_skew=args.team_skew)
+        for name, result in bench_user_service(file_path, args.repeats).items():
+            print(f"{name}: {result['value'] * 1000:.2f} ms "
+                  f"(median {result['median'] * 1000:.2f} ms)")
+
+if __name__ == "__main__":
+    main()
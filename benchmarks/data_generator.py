@@ -0,0 +1,87 @@
+"""_data_generator.py_
+
+Synthetic data generator of the benchmarks, writing users CSV files of any
+size (1k to 10M rows) with a configurable skew of the team sizes.
+
+Usage:
+    python -m benchmarks.data_generator --rows 1000000 --team-skew 1.5 --output users.csv
+"""
+
+import argparse
+import random
+from app.services.user_loader import USER_CSV_FIELDS
+
+DEFAULT_ROWS = 100_000
+DEFAULT_TEAMS = ["Backend", "Frontend", "Data", "Ops", "Design"]
+WRITE_BATCH_SIZE = 10_000
+
+def get_team_weights(nb_teams: int, team_skew: float) -> list[float]:
+    """_Returns the relative sizes of the teams, following a Zipf law._
+
+    Args:
+        nb_teams (int): Number of teams.
+        team_skew (float): Exponent of the Zipf law. 0 gives teams of the same size,
+            higher values give a larger first team.
+
+    Returns:
+        list[float]: The weight of each team.
+
+    Example:
+        >>> get_team_weights(3, 1.0)
+        [1.0, 0.5, 0.3333333333333333]
+    """
+    return [1 / (i_team + 1) ** team_skew for i_team in range(nb_teams)]
+
+def write_users_csv(
+    file_path: str,
+    nb_rows: int,
+    seed: int = 0,
+    teams: list[str] | None = None,
+    team_skew: float = 0.0) -> None:
+    """_Writes a synthetic users CSV file._
+
+    Args:
+        file_path (str): Path of the CSV file to write.
+        nb_rows (int): Number of user rows to write.
+        seed (int): Seed of the random generator.
+        teams (list[str] | None): Names of the teams. Defaults to `DEFAULT_TEAMS`.
+        team_skew (float): Skew of the team sizes (see `get_team_weights`).
+            Defaults to 0.0, teams of the same size.
+    """
+    rng = random.Random(seed)
+    teams = teams or DEFAULT_TEAMS
+    team_weights = get_team_weights(len(teams), team_skew)
+    with open(file_path, "w", newline="", encoding="utf-8") as csvfile:
+        csvfile.write(",".join(USER_CSV_FIELDS) + "\n")
+        for batch_start in range(0, nb_rows, WRITE_BATCH_SIZE):
+            batch_size = min(WRITE_BATCH_SIZE, nb_rows - batch_start)
+            batch_teams = rng.choices(teams, weights=team_weights, k=batch_size)
+            csvfile.writelines(
+                f"User {i_row},user{i_row}@example.com,{rng.randint(16, 65)},"
+                f"{team},20{rng.randint(10, 25)}-0{rng.randint(1, 9)}-1{rng.randint(0, 9)}\n"
+                for i_row, team in enumerate(batch_teams, start=batch_start))
+
+def add_data_arguments(parser: argparse.ArgumentParser, default_rows: int = DEFAULT_ROWS) -> None:
+    """_Adds the options of the synthetic users CSV file to a command line parser._
+
+    The options are `--rows` and `--team-skew`, shared by all the benchmarks.
+
+    Args:
+        parser (argparse.ArgumentParser): The parser of a benchmark.
+        default_rows (int): Default number of rows. Defaults to `DEFAULT_ROWS`.
+    """
+    parser.add_argument("--rows", type=int, default=default_rows)
+    parser.add_argument("--team-skew", type=float, default=0.0)
+
+def main() -> None:
+    """_Writes a synthetic users CSV file from the command line arguments._"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    add_data_arguments(parser)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="users.csv")
+    args = parser.parse_args()
+    write_users_csv(args.output, args.rows, args.seed, team_skew=args.team_skew)
+    print(f"{args.rows} users written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""_results.py_
+
+Storage of the benchmark results as JSON files, and comparison of a run
+with a baseline run to detect performance regressions.
+
+A results file contains the metadata of the run (date, Python version,
+platform, git commit) and one entry per benchmark:
+    {"value": 1234.5, "unit": "rows/s", "higher_is_better": true}
+"""
+
+import json
+import platform
+import subprocess
+import time
+
+DEFAULT_TOLERANCE = 0.10
+
+def get_run_metadata() -> dict:
+    """_Returns the metadata of the current benchmark run._
+
+    Returns:
+        dict: The date, Python version, platform and git commit of the run.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True,
+            timeout=10).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "commit": commit,
+    }
+
+def make_result(value: float, unit: str, higher_is_better: bool, **details) -> dict:
+    """_Builds the entry of a benchmark._
+
+    Args:
+        value (float): The measured value compared between runs.
+        unit (str): Unit of the value, e.g. "s" or "req/s".
+        higher_is_better (bool): Whether a higher value is an improvement.
+        **details: Other measures of the benchmark, stored but not compared.
+
+    Returns:
+        dict: The entry of the benchmark.
+    """
+    return {"value": value, "unit": unit, "higher_is_better": higher_is_better, **details}
+
+def save_results(file_path: str, results: dict[str, dict]) -> None:
+    """_Writes the results of a run to a JSON file, with the metadata of the run._
+
+    Args:
+        file_path (str): Path of the JSON file.
+        results (dict[str, dict]): The entry of each benchmark, by name.
+    """
+    with open(file_path, "w", encoding="utf-8") as results_file:
+        json.dump({"metadata": get_run_metadata(), "results": results}, results_file, indent=2)
+
+def load_results(file_path: str) -> dict[str, dict]:
+    """_Reads the results of a run from a JSON file._
+
+    Args:
+        file_path (str): Path of the JSON file.
+
+    Returns:
+        dict[str, dict]: The entry of each benchmark, by name.
+    """
+    with open(file_path, encoding="utf-8") as results_file:
+        return json.load(results_file)["results"]
+
+def compare_results(
+    results: dict[str, dict],
+    baseline: dict[str, dict],
+    tolerance: float = DEFAULT_TOLERANCE) -> list[str]:
+    """_Compares the results of a run with a baseline run._
+
+    Args:
+        results (dict[str, dict]): The entries of the run.
+        baseline (dict[str, dict]): The entries of the baseline run.
+        tolerance (float): Relative change below which a difference is noise.
+
+    Returns:
+        list[str]: The benchmarks slower than the baseline by more than the tolerance.
+
+    Example:
+        >>> compare_results(load_results("run.json"), load_results("baseline.json"))
+        ['service.get_n_oldest_users: 0.0123 s vs 0.0101 s (-21.8%)']
+    """
+    regressions = []
+    for name, result in results.items():
+        baseline_result = baseline.get(name)
+        if baseline_result is None or not baseline_result["value"]:
+            continue
+        change = (result["value"] - baseline_result["value"]) / baseline_result["value"]
+        improvement = change if result["higher_is_better"] else -change
+        if improvement < -tolerance:
+            regressions.append(
+                f"{name}: {result['value']:.4g} {result['unit']} vs "
+                f"{baseline_result['value']:.4g} {baseline_result['unit']} ({improvement:+.1%})")
+    return regressions
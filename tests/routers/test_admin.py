@@ -0,0 +1,38 @@
+import pstats
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.routers import admin
+from app.services.profiling_service import profiling_service
+
+client = TestClient(app)
+ADMIN_HEADERS = {"X-Admin-Token": "secret"}
+
+@pytest.fixture(autouse=True)
+def admin_token(monkeypatch):
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", "secret")
+
+@pytest.fixture
+def profiling_enabled(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling_service, "enabled", True)
+    monkeypatch.setattr(profiling_service, "profiles_dir", str(tmp_path))
+
+def test_profiles_disabled():
+    assert client.get("/admin/profiles", headers=ADMIN_HEADERS).json()["status"] == 404
+
+def test_profiles_require_the_admin_token(profiling_enabled, monkeypatch):
+    assert client.get("/admin/profiles").json()["status"] == 401
+    assert client.get("/admin/profiles", headers={"X-Admin-Token": "wrong"}).json()["status"] == 401
+    assert client.get("/admin/profiles/unknown").json()["status"] == 401
+    monkeypatch.setattr(admin, "ADMIN_TOKEN", None)
+    assert client.get("/admin/profiles", headers=ADMIN_HEADERS).json()["status"] == 403
+
+def test_profile_request_with_header_then_download(profiling_enabled, tmp_path):
+    client.get("/stats/", headers={"X-Profile": "1"})
+    profiles = client.get("/admin/profiles", headers=ADMIN_HEADERS).json()["data"]
+    assert [profile["path"] for profile in profiles] == ["/stats/"]
+    response = client.get(f"/admin/profiles/{profiles[0]['name']}", headers=ADMIN_HEADERS)
+    assert response.status_code == 200
+    (tmp_path / "downloaded.prof").write_bytes(response.content)
+    pstats.Stats(str(tmp_path / "downloaded.prof"))
+    assert client.get("/admin/profiles/unknown", headers=ADMIN_HEADERS).json()["status"] == 404
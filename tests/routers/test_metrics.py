@@ -0,0 +1,12 @@
+from fastapi.testclient import TestClient
+from app.main import app
+
+client = TestClient(app)
+
+def test_metrics_record_requests_by_route_template():
+    client.get("/users/refresh/999999")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert 'route="/users/refresh/{refresh_id}",status="200"' in response.text
+    assert "# TYPE http_request_duration_seconds histogram" in response.text
@@ -0,0 +1,52 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models.user import User
+from app.services.user_service import user_service
+
+client = TestClient(app)
+
+@pytest.fixture(autouse=True)
+def setup_users():
+    user_service.users = [
+        User(name="Alice", email="alice@example.com", age=30, team="Backend", start_date="2024-01-01"),
+        User(name="Bob", email="bob@example.com", age=25, team="Frontend", start_date="2024-02-01"),
+        User(name="Charlie", email="charlie@example.com", age=35, team="Backend", start_date="2024-03-01"),
+        User(name="Diane", email="diane@example.com", age=40, team="Frontend", start_date="2024-04-01"),
+    ]
+    yield
+    user_service.users = []
+
+def test_get_stats():
+    data = client.get("/stats/").json()["data"]
+    assert data["totalUsers"] == 4
+    assert data["averageAgeOfUsers"] == 32.5
+    assert [u["name"] for u in data["oldestUsers"]] == ["Diane", "Charlie", "Alice"]
+
+def test_get_stats_top_n():
+    data = client.get("/stats/", params={"top_n": 4}).json()["data"]
+    assert [u["name"] for u in data["oldestUsers"]] == ["Diane", "Charlie", "Alice", "Bob"]
+    data = client.get("/stats/", params={"top_n": 1, "team": "Backend"}).json()["data"]
+    assert [u["name"] for u in data["oldestUsers"]] == ["Charlie"]
+    assert client.get("/stats/", params={"top_n": 0}).status_code == 422
+
+def test_get_stats_group_by_team():
+    data = client.get("/stats/", params={"group_by": "team", "top_n": 1}).json()["data"]
+    assert data["totalUsers"] == 4
+    assert data["teams"] == {
+        "Backend": {"countedUsers": 2, "averageAgeOfUsers": 32.5, "oldestUsers": [
+            {"name": "Charlie", "email": "charlie@example.com", "age": 35,
+             "team": "Backend", "start_date": "2024-03-01"}]},
+        "Frontend": {"countedUsers": 2, "averageAgeOfUsers": 32.5, "oldestUsers": [
+            {"name": "Diane", "email": "diane@example.com", "age": 40,
+             "team": "Frontend", "start_date": "2024-04-01"}]},
+    }
+    assert client.get("/stats/", params={"group_by": "age"}).json()["status"] == 400
+
+def test_get_stats_batch():
+    response = client.post("/stats/batch", json={"teams": ["Frontend", "Unknown"]}, params={"top_n": 5})
+    data = response.json()["data"]
+    assert list(data["teams"]) == ["Frontend", "Unknown"]
+    assert [u["name"] for u in data["teams"]["Frontend"]["oldestUsers"]] == ["Diane", "Bob"]
+    assert data["teams"]["Unknown"] == {"countedUsers": 0, "averageAgeOfUsers": 0.0, "oldestUsers": []}
+    assert client.post("/stats/batch", json={"teams": []}).status_code == 422
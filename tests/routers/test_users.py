@@ -1,6 +1,9 @@
+import json
+import time
 import pytest
 from fastapi.testclient import TestClient
 from app.main import app
+from app.routers import users as users_router
 from app.models.user import User
 from app.services.user_service import user_service
 
@@ -31,6 +34,135 @@ def test_read_users_filtered_team():
     assert len(data["data"]) == 2
     assert all(u["team"] == "Backend" for u in data["data"])
 
+def test_read_users_paginated():
+    response = client.get("/users/", params={"limit": 2})
+    data = response.json()["data"]
+    assert [u["name"] for u in data["users"]] == ["Alice", "Bob"]
+    response = client.get("/users/", params={"limit": 2, "cursor": data["nextCursor"]})
+    data = response.json()["data"]
+    assert [u["name"] for u in data["users"]] == ["Charlie"]
+    assert data["nextCursor"] is None
+
+def test_read_users_invalid_cursor():
+    response = client.get("/users/", params={"cursor": "not-a-cursor"})
+    assert response.json()["status"] == 400
+
+def test_read_users_pages_not_shifted_by_writes():
+    response = client.get("/users/", params={"sort": "-age", "limit": 2})
+    data = response.json()["data"]
+    assert [u["name"] for u in data["users"]] == ["Charlie", "Alice"]
+    # A user added before the cursor, and the last user of the page removed
+    user_service.create_user(
+        User(name="Dave", email="dave@example.com", age=40, team="Backend", start_date="2024-04-01"))
+    user_service.delete_user("alice@example.com")
+    response = client.get("/users/", params={"sort": "-age", "limit": 2, "cursor": data["nextCursor"]})
+    data = response.json()["data"]
+    assert [u["name"] for u in data["users"]] == ["Bob"]
+    assert data["nextCursor"] is None
+
+def test_read_users_cursor_rejected_after_reload():
+    response = client.get("/users/", params={"limit": 2})
+    cursor = response.json()["data"]["nextCursor"]
+    user_service.users = list(user_service.users)
+    response = client.get("/users/", params={"limit": 2, "cursor": cursor})
+    assert response.json()["status"] == 400
+    assert response.json()["message"] == "Invalid Cursor"
+
+def test_read_users_sorted():
+    response = client.get("/users/", params={"sort": "-age", "limit": 2})
+    data = response.json()["data"]
+    assert [u["name"] for u in data["users"]] == ["Charlie", "Alice"]
+    response = client.get("/users/", params={"sort": "-age", "limit": 2, "cursor": data["nextCursor"]})
+    assert [u["name"] for u in response.json()["data"]["users"]] == ["Bob"]
+    response = client.get("/users/", params={"sort": "name", "team": "Backend"})
+    assert [u["name"] for u in response.json()["data"]] == ["Alice", "Charlie"]
+
+def test_read_users_invalid_sort():
+    response = client.get("/users/", params={"sort": "email"})
+    assert response.json()["status"] == 400
+    assert response.json()["message"] == "Invalid Sort"
+
+def test_read_users_filtered():
+    response = client.get("/users/", params={"teams": ["Frontend", "Backend"], "min_age": 26})
+    assert [u["name"] for u in response.json()["data"]] == ["Alice", "Charlie"]
+    response = client.get("/users/", params={
+        "start_date_from": "2024-01-15", "name_prefix": "C", "sort": "-age", "limit": 1})
+    assert [u["name"] for u in response.json()["data"]["users"]] == ["Charlie"]
+    response = client.get("/users/", params={"team": "Backend", "email_prefix": "alice@"})
+    assert [u["name"] for u in response.json()["data"]] == ["Alice"]
+    assert client.get("/users/", params={"start_date_from": "not-a-date"}).status_code == 422
+
+def test_search_users():
+    response = client.get("/users/search", params={"q": "CHAR"})
+    data = response.json()
+    assert data["message"] == "Searching Users Data"
+    assert [u["name"] for u in data["data"]["users"]] == ["Charlie"]
+    response = client.get("/users/search", params={"q": "example.com", "limit": 2})
+    data = response.json()["data"]
+    assert [u["name"] for u in data["users"]] == ["Alice", "Bob"]
+    response = client.get("/users/search", params={"q": "example.com", "limit": 2, "cursor": data["nextCursor"]})
+    data = response.json()["data"]
+    assert [u["name"] for u in data["users"]] == ["Charlie"]
+    assert data["nextCursor"] is None
+    assert client.get("/users/search", params={"q": ""}).status_code == 422
+
+def test_read_user_by_email():
+    response = client.get("/users/BOB@example.com")
+    data = response.json()
+    assert data["message"] == "Getting User Data"
+    assert data["data"]["name"] == "Bob"
+    response = client.get("/users/nobody@example.com")
+    assert response.json()["status"] == 404
+
+def test_lookup_users():
+    response = client.post("/users/lookup", json={"emails": ["charlie@example.com", "nobody@example.com", "alice@example.com"]})
+    data = response.json()["data"]
+    assert [u["name"] for u in data["users"]] == ["Charlie", "Alice"]
+    assert data["notFound"] == ["nobody@example.com"]
+    assert client.post("/users/lookup", json={"emails": []}).status_code == 422
+
+def test_read_users_stream_ndjson():
+    response = client.get("/users/", params={"team": "Backend", "stream": True})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [u["name"] for u in lines] == ["Alice", "Charlie"]
+
+def test_read_users_stream_encodes_users_lazily(monkeypatch):
+    def get_encoded_users(users_data):
+        raise AssertionError("the stream must not encode all the users upfront")
+    monkeypatch.setattr(user_service, "get_encoded_users", get_encoded_users)
+    response = client.get("/users/", params={"stream": True, "limit": 2})
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [u["name"] for u in lines] == ["Alice", "Bob"]
+
+def test_read_users_stream_not_shifted_by_writes(monkeypatch):
+    monkeypatch.setattr(users_router, "NDJSON_BATCH_SIZE", 2)
+    iter_encoded_users = user_service.iter_encoded_users
+    batches = []
+    def iter_encoded_users_with_write(users_data):
+        batches.append([u.name for u in users_data])
+        if len(batches) == 1:
+            # The first user is removed while its batch is being sent
+            user_service.delete_user("alice@example.com")
+        return iter_encoded_users(users_data)
+    monkeypatch.setattr(user_service, "iter_encoded_users", iter_encoded_users_with_write)
+    response = client.get("/users/", params={"stream": True})
+    assert [json.loads(line)["name"] for line in response.text.splitlines()] == ["Alice", "Bob", "Charlie"]
+    assert batches == [["Alice", "Bob"], ["Charlie"]]
+
+def test_read_users_etag_and_not_modified():
+    response = client.get("/users/", params={"team": "Backend"})
+    etag = response.headers["etag"]
+    response = client.get("/users/", params={"team": "Backend"}, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    user_service.add_user(
+        User(name="Dave", email="dave@example.com", age=40, team="Backend", start_date="2024-04-01"))
+    response = client.get("/users/", params={"team": "Backend"}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert len(response.json()["data"]) == 3
+
 def test_read_users_no_users():
     user_service.users = []
     response = client.get("/users/")
@@ -38,9 +170,44 @@ def test_read_users_no_users():
     assert data["status"] == 422
     assert data["message"] == "No Users Data Available"
 
-def test_refresh_users_route():
+def test_refresh_users_route(tmp_path, monkeypatch):
+    csv_path = tmp_path / "users.csv"
+    csv_path.write_text("name,email,age,team,start_date\nAlice,alice@example.com,30,Backend,2024-01-01\n",
+                        encoding="utf-8")
+    monkeypatch.setattr(user_service, "csv_path", str(csv_path))
     response = client.get("/users/refresh")
     assert response.status_code == 200
     data = response.json()
     assert data["status"] == 200
     assert data["message"] == "Refreshing Users Data"
+    refresh_id = data["data"]["refreshId"]
+    for _ in range(100):
+        state = client.get(f"/users/refresh/{refresh_id}").json()["data"]["state"]
+        if state in ("done", "failed"):
+            break
+        time.sleep(0.05)
+    assert state == "done"
+    assert [user.name for user in user_service.get_users()] == ["Alice"]
+
+def test_refresh_status_unknown():
+    response = client.get("/users/refresh/999999")
+    assert response.json()["status"] == 404
+
+def test_create_update_and_delete_user():
+    eve = {"name": "Eve", "email": "eve@example.com", "age": 40, "team": "Ops", "start_date": "2024-05-01"}
+    response = client.post("/users/", json=eve)
+    assert response.json()["status"] == 201
+    assert response.json()["data"] == eve
+    assert client.post("/users/", json=eve).json()["message"] == "User Already Exists"
+    assert client.post("/users/", json={**eve, "age": "old"}).status_code == 422
+    bob = {"name": "Bob", "email": "bob@example.com", "age": 45, "team": "Ops", "start_date": "2024-02-01"}
+    assert client.put("/users/alice@example.com", json=bob).json()["status"] == 400
+    response = client.put("/users/BOB@example.com", json=bob)
+    assert (response.json()["status"], response.json()["message"]) == (200, "User Updated")
+    response = client.get("/users/", params={"sort": "-age"})
+    assert [u["name"] for u in response.json()["data"]] == ["Bob", "Eve", "Charlie", "Alice"]
+    assert [u["name"] for u in client.get("/users/").json()["data"]] == ["Alice", "Bob", "Charlie", "Eve"]
+    assert client.get("/stats/").json()["data"]["countedUsers"] == 4
+    assert client.delete("/users/Alice@example.com").json()["message"] == "User Deleted"
+    assert client.delete("/users/alice@example.com").json()["status"] == 404
+    assert client.get("/users/alice@example.com").json()["status"] == 404
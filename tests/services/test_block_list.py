@@ -0,0 +1,29 @@
+from bisect import bisect_left
+from app.services.block_list import BlockList
+
+def test_sorted_inserts_and_removes_keep_blocks_bounded():
+    values = list(range(0, 200, 2))
+    block_list = BlockList(values, block_size=4)
+    for value in (1, 199, -1, 101, 57):
+        block_list.insert_sorted(value, lambda other, value=value: other < value)
+        values.insert(bisect_left(values, value), value)
+    for value in (0, 56, 57, 198, 100):
+        assert block_list.remove_sorted(value, lambda other, value=value: other < value)
+        values.remove(value)
+    assert not block_list.remove_sorted(3, lambda other: other < 3)
+    assert block_list == values and list(reversed(block_list)) == values[::-1]
+    assert all(0 < len(block) <= 8 for block in block_list._blocks)
+
+def test_positional_reads():
+    values = list(range(50))
+    block_list = BlockList(values, block_size=4)
+    block_list.insert_sorted(10.5, lambda other: other < 10.5)
+    values.insert(11, 10.5)
+    assert len(block_list) == 51
+    assert [block_list[i] for i in (0, 11, 30, -1, -51)] == [values[i] for i in (0, 11, 30, -1, -51)]
+    assert block_list[7:23] == values[7:23] and block_list[::5] == values[::5]
+    assert list(block_list.iter_range(9, 14)) == values[9:14]
+    assert block_list.bisect(lambda other: other < 20) == 21
+    assert block_list.pop(11) == 10.5 and block_list.pop() == 49
+    block_list.append(49)
+    assert block_list == values[:11] + values[12:]
@@ -0,0 +1,51 @@
+import heapq
+import pytest
+from app.models.user import User
+
+np = pytest.importorskip("numpy")
+
+from app.services.columnar_user_store import ColumnarUserStore, StringColumn
+from app.services.user_service import UserService
+
+USERS = [
+    User(name="Alice", email="alice@example.com", age=30, team="Backend", start_date="2024-01-01"),
+    User(name="Bob", email="bob@example.com", age=17, team="Frontend", start_date="2024-02-01"),
+    User(name="Charlie", email="charlie@example.com", age=35, team="Backend", start_date="2024-03-01"),
+    User(name="Diane", email="diane@example.com", age=30, team="Frontend", start_date="2024-04-01"),
+    User(name="Eve", email="eve@example.com", age=30, team="Backend", start_date="2024-05-01"),
+]
+
+@pytest.fixture
+def store():
+    return ColumnarUserStore.from_users(USERS)
+
+def test_filters_match_user_service(store):
+    adults = store.get_adult_users_of()
+    expected = UserService.get_adult_users_of(USERS)
+    assert store.to_users(adults) == expected
+    backend = store.get_users_of_team_of(adults, "Backend")
+    assert store.to_users(backend) == UserService.get_users_of_team_of(expected, "Backend")
+    assert len(store.get_users_of_team_of(adults, "Unknown")) == 0
+
+def test_aggregates_match_user_service(store):
+    adults = store.get_adult_users_of()
+    expected = UserService.get_adult_users_of(USERS)
+    assert store.get_average_age_of(adults) == UserService.get_average_age_of(expected)
+    for n in range(1, 6):
+        oldest = store.to_users(store.get_n_oldest_users(adults, n))
+        assert oldest == heapq.nlargest(n, expected, key=lambda u: u.age)
+
+def test_aggregates_by_team(store):
+    adults = store.get_adult_users_of()
+    assert store.get_count_by_team_of(adults) == {"Backend": 3, "Frontend": 1}
+    assert store.get_average_age_by_team_of(adults) == {"Backend": 31.7, "Frontend": 30.0}
+
+def test_string_column_codes_compare_like_values():
+    values = ["Zoë", "Alice", "Éva", "Al", "Alice"]
+    column = StringColumn.from_strings(values)
+    rows = np.arange(len(values))
+    assert column.get_values(rows) == values
+    assert [values[row] for row in np.argsort(column.codes, kind="stable")] == sorted(values)
+    assert column.get_values(rows[column.get_prefix_mask(rows, "Al")]) == ["Alice", "Al", "Alice"]
+    assert not column.get_prefix_mask(rows, "B").any()
+    assert column.get_lower_code("Alice") == 1 and column.get_upper_code("Alice") == 2
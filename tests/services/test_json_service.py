@@ -33,3 +33,28 @@ def test_format_with_only_data():
     assert response["status"] == 200
     assert response["message"] == "success"
     assert response["data"] == data
+
+def test_encode_matches_format():
+    data = {"user": "Alice", "ages": [30, 31]}
+    encoded = JSONService.encode(data=data, status=201, message="Created")
+    assert isinstance(encoded, bytes)
+    assert json.loads(encoded) == JSONService.format(data=data, status=201, message="Created")
+    assert json.loads(JSONService.encode()) == JSONService.format()
+
+def test_encode_with_pre_encoded_data():
+    encoded_data = JSONService.encode_array([b'{"name":"Alice"}', b'{"name":"Bob"}'])
+    encoded = JSONService.encode(encoded_data=encoded_data, message="Getting Users Data")
+    assert json.loads(encoded) == {
+        "status": 200,
+        "message": "Getting Users Data",
+        "data": [{"name": "Alice"}, {"name": "Bob"}],
+    }
+
+def test_encode_object_and_empty_array():
+    encoded = JSONService.encode_object(
+        {"users": JSONService.encode_array([]), "nextCursor": b"null"})
+    assert json.loads(encoded) == {"users": [], "nextCursor": None}
+
+def test_serialize_keeps_json_dumps_output():
+    data = {"name": "Alice", "ages": [30, 31]}
+    assert JSONService.serialize(data) == json.dumps(data)
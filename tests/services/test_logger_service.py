@@ -1,6 +1,8 @@
 import logging
+import queue
+import pytest
 from logging.handlers import RotatingFileHandler
-from app.services.logger_service import LoggerService
+from app.services.logger_service import LoggerService, BoundedQueueHandler, SampledLogger
 
 def test_get_logger_returns_logger():
     logger = LoggerService.get_logger()
@@ -31,4 +33,50 @@ def test_logger_can_log_messages(caplog):
 
     assert "Test info message" in caplog.text
     assert "Test warning message" in caplog.text
-    
\ No newline at end of file
+    
+def test_queue_logger_writes_in_background_and_flushes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    logger = LoggerService.get_logger("app-queue-test", queue_enabled=True)
+    assert [type(handler) for handler in logger.handlers] == [BoundedQueueHandler]
+    logger.info("Queued message")
+    LoggerService.shutdown("app-queue-test")
+    assert "Queued message" in (tmp_path / "app.log").read_text()
+    assert [type(handler) for handler in logger.handlers] == [RotatingFileHandler]
+    for handler in logger.handlers:
+        logger.removeHandler(handler)
+        handler.close()
+
+def test_bounded_queue_handler_drops_records_when_full():
+    handler = BoundedQueueHandler(queue.Queue(maxsize=1), overflow="drop")
+    record = logging.LogRecord("app", logging.INFO, __file__, 1, "message", None, None)
+    handler.emit(record)
+    handler.emit(record)
+    assert handler.queue.qsize() == 1
+    assert handler.dropped_records == 1
+
+def test_bounded_queue_handler_rejects_unknown_policy():
+    with pytest.raises(ValueError):
+        BoundedQueueHandler(queue.Queue(), overflow="unknown")
+
+def test_sampled_logger_logs_first_records_then_samples(caplog):
+    sampled_logger = SampledLogger("test.sampled", first_n=2, sample_every=3)
+    with caplog.at_level(logging.INFO):
+        logged = [sampled_logger.info("Record %s", i) for i in range(1, 9)]
+    assert logged == [True, True, False, False, True, False, False, True]
+    assert [record.args[0] for record in caplog.records if record.name == "app"] == [1, 2, 5, 8]
+    assert sampled_logger.get_counters() == {"count": 8, "logged": 4, "suppressed": 4}
+    sampled_logger.start_window()
+    assert sampled_logger.info("Record %s", 9)
+    assert (sampled_logger.window_count, sampled_logger.window_logged) == (1, 1)
+    assert sampled_logger.count == 9
+
+def test_sampled_logger_rate_limit():
+    sampled_logger = SampledLogger("test.rate_limited", first_n=0, sample_every=1, max_per_second=2)
+    logged = [sampled_logger.warning("Record") for _ in range(5)]
+    assert logged == [True, True, False, False, False]
+
+def test_sampled_loggers_are_shared_and_counted():
+    sampled_logger = LoggerService.get_sampled_logger("test.shared")
+    assert LoggerService.get_sampled_logger("test.shared") is sampled_logger
+    sampled_logger.info("Record")
+    assert LoggerService.get_counters()["test.shared"]["count"] == 1
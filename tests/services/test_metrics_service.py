@@ -0,0 +1,26 @@
+from app.services.metrics_service import MetricsService, Histogram
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram((0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value)
+    assert histogram.render("latency", 'route="/"') == [
+        'latency_bucket{route="/",le="0.1"} 2',
+        'latency_bucket{route="/",le="1"} 3',
+        'latency_bucket{route="/",le="+Inf"} 4',
+        'latency_sum{route="/"} 2.65',
+        'latency_count{route="/"} 4',
+    ]
+
+def test_render_requests_and_loads():
+    metrics = MetricsService()
+    metrics.observe_request("GET", "/users/", 200, 0.002, 512)
+    metrics.observe_request("GET", "/users/", 200, 0.004, 256)
+    metrics.observe_load(duration=2.0, nb_users=90, nb_rejected_rows=10, dataset_size=90)
+    rendered = metrics.render()
+    assert 'http_requests_total{method="GET",route="/users/",status="200"} 2' in rendered
+    assert 'http_response_size_bytes_sum{method="GET",route="/users/",status="200"} 768' in rendered
+    assert "users_loads_total 1" in rendered
+    assert "users_last_load_rows_per_second 50" in rendered
+    assert "users_last_load_rejected_rows 10" in rendered
+    assert "users_last_load_dataset_size 90" in rendered
@@ -0,0 +1,27 @@
+import pstats
+from app.services.json_service import JSONService
+from app.services.profiling_service import ProfilingService
+
+def test_should_profile_with_header_or_sample():
+    assert not ProfilingService(enabled=False).should_profile("1")
+    profiling = ProfilingService(enabled=True, sample_rate=0.0)
+    assert profiling.should_profile("1")
+    assert not profiling.should_profile("0")
+    assert not profiling.should_profile(None)
+    assert ProfilingService(enabled=True, sample_rate=1.0).should_profile(None)
+
+def test_profiles_written_to_bounded_ring(tmp_path):
+    profiling = ProfilingService(enabled=True, profiles_dir=str(tmp_path), max_profiles=2)
+    names = []
+    for _ in range(3):
+        profiler = profiling.try_start()
+        assert profiling.try_start() is None
+        JSONService.encode(data=[{"name": "Alice"}] * 100)
+        profiling.stop(profiler)
+        names.append(profiling.save(profiler, "GET", "/stats/", 0.01))
+    summaries = profiling.list_profiles()
+    assert [summary["name"] for summary in summaries] == names[:0:-1]
+    assert summaries[0]["path"] == "/stats/"
+    assert summaries[0]["time_by_group"]["total"] >= summaries[0]["time_by_group"]["JSONService"]
+    assert profiling.get_profile_path(names[0]) is None
+    pstats.Stats(profiling.get_profile_path(names[-1]))
@@ -0,0 +1,40 @@
+from app.services.response_cache import ResponseCache
+
+def test_get_returns_cached_response_of_same_generation():
+    cache = ResponseCache()
+    content, etag = cache.put(("/users/", None), 1, b'{"status":200}')
+    assert cache.get(("/users/", None), 1) == (content, etag)
+    assert cache.get(("/users/", None), 2) is None
+    assert cache.get(("/users/", "Backend"), 1) is None
+
+def test_newer_generation_clears_cache():
+    cache = ResponseCache()
+    cache.put("a", 1, b"1")
+    cache.put("b", 2, b"2")
+    assert len(cache) == 1
+    assert cache.get("a", 1) is None
+    cache.put("c", 1, b"3")
+    assert cache.get("c", 1) is None
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = ResponseCache(max_entries=2, max_bytes=10)
+    cache.put("a", 1, b"aaa")
+    cache.put("b", 1, b"bbb")
+    cache.get("a", 1)
+    cache.put("c", 1, b"ccc")
+    assert cache.get("b", 1) is None
+    assert cache.get("a", 1) is not None
+    cache.put("d", 1, b"dddddddd")
+    assert len(cache) == 1
+    cache.put("e", 1, b"e" * 11)
+    assert cache.get("e", 1) is None
+
+def test_etag_is_strong_and_matches_if_none_match():
+    etag = ResponseCache.get_etag(b"content")
+    assert etag.startswith('"') and etag == ResponseCache.get_etag(b"content")
+    assert etag != ResponseCache.get_etag(b"other")
+    assert ResponseCache.is_not_modified(f'"x", {etag}', etag)
+    assert ResponseCache.is_not_modified(f"W/{etag}", etag)
+    assert ResponseCache.is_not_modified("*", etag)
+    assert not ResponseCache.is_not_modified(None, etag)
+    assert not ResponseCache.is_not_modified('"x"', etag)
@@ -0,0 +1,141 @@
+import pytest
+from app.models.user import User
+
+np = pytest.importorskip("numpy")
+pytest.importorskip("fcntl")
+
+from app.services import user_service as user_service_module
+from app.services.shared_user_dataset import SharedUserDataset
+from app.services.user_service import UserService, user_service
+
+USERS = [
+    User(name="Alice", email="alice@example.com", age=30, team="Backend", start_date="2024-01-01"),
+    User(name="Bob", email="bob@example.com", age=17, team="Frontend", start_date="2024-02-01"),
+    User(name="Charlie", email="charlie@example.com", age=35, team="Backend", start_date="2024-03-01"),
+    User(name="Diane", email="diane@example.com", age=19, team="Frontend", start_date="2024-04-01"),
+]
+
+def test_publish_and_attach(tmp_path):
+    generation = SharedUserDataset.publish(USERS, str(tmp_path), (1, 2, "hash"))
+    assert SharedUserDataset.get_current_generation(str(tmp_path)) == generation
+    dataset = SharedUserDataset.attach(str(tmp_path), generation)
+    assert dataset.source_key == (1, 2, "hash")
+    assert UserService.to_users(dataset.get_users()) == USERS
+    assert UserService.to_users(dataset.get_adult_users()) == UserService.get_adult_users_of(USERS)
+    assert [u.name for u in dataset.get_minor_users()] == ["Bob"]
+    assert [u.name for u in dataset.get_adult_users_of_team("Backend")] == ["Alice", "Charlie"]
+    assert len(dataset.get_adult_users_of_team("Unknown")) == 0
+    assert [u.name for u in dataset.get_adult_users()[1:3]] == ["Charlie", "Diane"]
+    stats = dataset.get_adult_stats("Backend")
+    assert (stats.count, stats.average_age) == (2, 32.5)
+    assert [u.name for u in dataset.get_adult_stats().get_oldest_users(3)] == ["Charlie", "Alice", "Diane"]
+
+def test_user_service_serves_shared_dataset(tmp_path, monkeypatch):
+    shared_dir = tmp_path / "shared"
+    csv_path = tmp_path / "users.csv"
+    csv_path.write_text("name,email,age,team,start_date\n" + "".join(
+        f"{u.name},{u.email},{u.age},{u.team},{u.start_date}\n" for u in USERS), encoding="utf-8")
+    monkeypatch.setattr(user_service_module, "USERS_SHARED_DIR", str(shared_dir))
+    monkeypatch.setattr(user_service, "csv_path", str(csv_path))
+    try:
+        user_service.refresh_users_data()
+        generation = SharedUserDataset.get_current_generation(str(shared_dir))
+        assert generation is not None
+        expected = user_service.get_adult_users()
+        assert len(expected) > 0
+        user_service.refresh_users_data()
+        assert SharedUserDataset.get_current_generation(str(shared_dir)) == generation
+        with pytest.raises(RuntimeError):
+            user_service.add_user(USERS[0])
+        new_generation = SharedUserDataset.publish(USERS, str(shared_dir))
+        user_service._shared_dataset_checked_at = 0.0
+        assert (UserService.to_users(user_service.get_adult_users())
+                == UserService.get_adult_users_of(USERS))
+        assert user_service._dataset.generation == new_generation
+    finally:
+        user_service.users = []
+
+def test_sorted_adult_users_match_in_memory_dataset(tmp_path):
+    generation = SharedUserDataset.publish(USERS, str(tmp_path))
+    dataset = SharedUserDataset.attach(str(tmp_path), generation)
+    user_service.users = USERS
+    try:
+        for sort in ("age", "-age", "start_date", "-start_date", "name", "-name"):
+            for team in (None, "Backend", "Unknown"):
+                assert (UserService.to_users(dataset.get_sorted_adult_users(sort, team)[:])
+                        == UserService.to_users(user_service.get_sorted_adult_users(sort, team)[:]))
+    finally:
+        user_service.users = []
+
+def test_sort_orders_published_with_generation(tmp_path, monkeypatch):
+    generation = SharedUserDataset.publish(USERS, str(tmp_path))
+    dataset = SharedUserDataset.attach(str(tmp_path), generation)
+    def get_sorted_rows(rows, field, descending=False):
+        raise AssertionError("the sort orders must be read from the generation")
+    monkeypatch.setattr(dataset.store, "get_sorted_rows", get_sorted_rows)
+    assert [u.name for u in dataset.get_sorted_adult_users("-age")] == ["Charlie", "Alice", "Diane"]
+    assert [u.name for u in dataset.get_sorted_adult_users("-name", "Backend")] == ["Charlie", "Alice"]
+    assert len(dataset.get_sorted_adult_users("age", "Unknown")) == 0
+
+def test_sorted_adult_users_paginated_by_key(tmp_path):
+    from app.services.pagination_service import PaginationService
+    from app.services.user_dataset import SORT_KEYS
+    users_data = [
+        User(name=f"User {i}", email=f"user{i}@example.com", age=20 + i % 3,
+             team="Backend", start_date="2024-01-01") for i in range(7)]
+    generation = SharedUserDataset.publish(users_data, str(tmp_path))
+    dataset = SharedUserDataset.attach(str(tmp_path), generation)
+    assert [user.seq for user in dataset.get_users()] == list(range(7))
+    for sort in ("age", "-age"):
+        sorted_users = dataset.get_sorted_adult_users(sort)
+        names, cursor = [], None
+        while True:
+            page, cursor = PaginationService.paginate_by_key(
+                sorted_users, generation, 2, cursor, SORT_KEYS["age"], sort == "-age")
+            names += [user.name for user in page]
+            if cursor is None:
+                break
+        assert names == [user.name for user in sorted_users]
+    with pytest.raises(ValueError):
+        PaginationService.paginate_by_key(
+            sorted_users, "other", 2, PaginationService.encode_key_cursor(generation, 20, 0))
+
+def test_filtered_adult_users_match_in_memory_dataset(tmp_path):
+    from app.services.user_filter import UserFilter
+    generation = SharedUserDataset.publish(USERS, str(tmp_path))
+    dataset = SharedUserDataset.attach(str(tmp_path), generation)
+    user_service.users = USERS
+    try:
+        for user_filter in (UserFilter(teams=["Frontend", "Backend"], min_age=20),
+                            UserFilter(start_date_from="2024-02-01", name_prefix="C"),
+                            UserFilter(email_prefix="alice", teams=["Unknown"])):
+            assert (UserService.to_users(dataset.filter_adult_users(user_filter, "-age"))
+                    == UserService.to_users(user_service.filter_adult_users(user_filter, "-age")))
+    finally:
+        user_service.users = []
+
+def test_user_by_email(tmp_path, caplog):
+    duplicate = User(name="Alice Bis", email="ALICE@example.com", age=40, team="Ops", start_date="2024-05-01")
+    with caplog.at_level("WARNING"):
+        generation = SharedUserDataset.publish(USERS + [duplicate], str(tmp_path))
+    assert "user Alice Bis not indexed, Alice kept" in caplog.text
+    dataset = SharedUserDataset.attach(str(tmp_path), generation)
+    assert dataset.get_user_by_email("Alice@Example.com").name == "Alice"
+    assert dataset.get_user_by_email("diane@example.com").name == "Diane"
+    assert dataset.get_user_by_email("aaa@example.com") is None
+    assert dataset.get_user_by_email("zzz@example.com") is None
+
+@pytest.mark.parametrize("search_index", [True, False])
+def test_search_matches_in_memory_dataset(tmp_path, search_index):
+    from app.services.user_dataset import UserDataset
+    users_data = USERS + [
+        User(name=f"Alicia {i}", email=f"alicia{i}@example.com", age=20 + i, team="Ops",
+             start_date="2024-05-01") for i in range(5)]
+    generation = SharedUserDataset.publish(users_data, str(tmp_path), search_index=search_index)
+    dataset = SharedUserDataset.attach(str(tmp_path), generation)
+    # A published index is read from the generation, not built by the process
+    assert (dataset._search_index is not None) == search_index
+    in_memory_dataset = UserDataset(users_data)
+    for query in ("ali", "alicia", "example", "cia 3", "ob", "nobody"):
+        assert ([u.email for u in dataset.search_adult_users(query, 4)]
+                == [u.email for u in in_memory_dataset.search_adult_users(query, 4)])
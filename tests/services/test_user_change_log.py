@@ -0,0 +1,77 @@
+import pytest
+from app.models.user import User
+from app.services.user_change_log import UserChangeLog, UPSERT, DELETE
+from app.services.user_loader import UserLoader
+from app.services.user_service import user_service
+
+CSV_CONTENT = """name,email,age,team,start_date
+Alice,alice@example.com,30,Backend,2024-01-01
+Bob,not-an-email,25,Frontend,2024-02-01
+Charlie,charlie@example.com,35,Backend,2024-03-01
+Diane,diane@example.com,19,Frontend,2024-04-01
+"""
+
+ALICE = User(name="Alice Martin", email="Alice@example.com", age=31, team="Ops", start_date="2024-01-01")
+EVE = User(name="Eve", email="eve@example.com", age=40, team="Ops", start_date="2024-05-01")
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "users.csv"
+    path.write_text(CSV_CONTENT, encoding="utf-8")
+    return str(path)
+
+@pytest.fixture(autouse=True)
+def reset_users():
+    yield
+    user_service.users = []
+
+def test_changes_appended_and_read_back(csv_path):
+    change_log = UserChangeLog(csv_path)
+    change_log.append_upsert(EVE)
+    change_log.append_delete("charlie@example.com")
+    with open(change_log.path, "ab") as change_file:
+        change_file.write(b'{"op": "upsert", "us')
+    assert change_log.read_changes() == [(UPSERT, EVE), (DELETE, "charlie@example.com")]
+    assert UserChangeLog(csv_path).nb_changes == 2
+
+def test_compaction_merges_changes_into_csv(csv_path):
+    change_log = UserChangeLog(csv_path)
+    change_log.append_upsert(ALICE)
+    change_log.append_upsert(EVE)
+    change_log.append_delete("CHARLIE@example.com")
+    assert change_log.compact() == 3
+    with open(csv_path, encoding="utf-8") as csvfile:
+        assert csvfile.read() == """name,email,age,team,start_date
+Alice Martin,Alice@example.com,31,Ops,2024-01-01
+Bob,not-an-email,25,Frontend,2024-02-01
+Diane,diane@example.com,19,Frontend,2024-04-01
+Eve,eve@example.com,40,Ops,2024-05-01
+"""
+    assert change_log.read_changes() == []
+    assert change_log.nb_changes == 0
+    assert change_log.compact() == 0
+
+def test_writes_replayed_on_reload_then_compacted(csv_path):
+    user_service.refresh_users_data(csv_path)
+    assert user_service.upsert_user(ALICE) is False
+    assert user_service.create_user(EVE) is True
+    assert user_service.create_user(EVE) is False
+    assert user_service.delete_user("charlie@example.com") is True
+    assert user_service.delete_user("charlie@example.com") is False
+    expected = [("Alice Martin", 31), ("Diane", 19), ("Eve", 40)]
+    assert [(u.name, u.age) for u in user_service.users] == expected
+    user_service.refresh_users_data(csv_path)
+    assert [(u.name, u.age) for u in user_service.users] == expected
+    assert user_service._change_log.compact() == 3
+    assert [(u.name, u.age) for u in UserLoader.load_users_from_file(csv_path)] == expected
+    user_service.refresh_users_data(csv_path)
+    assert [(u.name, u.age) for u in user_service.users] == expected
+
+def test_compaction_started_in_background(csv_path):
+    user_service.refresh_users_data(csv_path)
+    user_service._change_log.compact_every = 2
+    user_service.upsert_user(EVE)
+    assert user_service._change_log._compaction_thread is None
+    user_service.delete_user("diane@example.com")
+    user_service._change_log._compaction_thread.join()
+    assert [u.name for u in UserLoader.load_users_from_file(csv_path)] == ["Alice", "Charlie", "Eve"]
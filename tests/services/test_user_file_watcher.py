@@ -0,0 +1,78 @@
+import os
+import pytest
+from app.services.user_file_watcher import UserFileWatcher
+from app.services.user_service import user_service
+
+CSV_CONTENT = """name,email,age,team,start_date
+Alice,alice@example.com,30,Backend,2024-01-01
+Bob,bob@example.com,17,Frontend,2024-02-01
+"""
+
+@pytest.fixture
+def watcher(tmp_path):
+    path = tmp_path / "users.csv"
+    path.write_text(CSV_CONTENT, encoding="utf-8")
+    watcher = UserFileWatcher(user_service, str(path), debounce=0)
+    watcher._full_reload()
+    yield watcher
+    user_service.users = []
+
+def write(watcher, content, mode="a"):
+    with open(watcher.file_path, mode, encoding="utf-8") as csvfile:
+        csvfile.write(content)
+    os.utime(watcher.file_path, ns=(0, os.stat(watcher.file_path).st_mtime_ns + 1_000_000))
+
+def test_appended_rows_are_loaded_incrementally(watcher):
+    assert watcher.check() is None
+    write(watcher, "Charlie,charlie@example.com,35,Backend,2024-03-01\nDiane,diane@exa")
+    assert watcher.check() is None
+    assert watcher.check() == "append"
+    assert [u.name for u in user_service.get_adult_users_of_team("Backend")] == ["Alice", "Charlie"]
+    write(watcher, "mple.com,19,Frontend,2024-04-01\n")
+    watcher.check()
+    assert watcher.check() == "append"
+    assert [u.name for u in user_service.get_adult_users()] == ["Alice", "Charlie", "Diane"]
+    assert user_service.get_adult_stats().count == 3
+
+def test_rewritten_file_is_fully_reloaded(watcher):
+    write(watcher, CSV_CONTENT.replace("Alice", "Alicia"), mode="w")
+    watcher.check()
+    assert watcher.check() == "reload"
+    assert [u.name for u in user_service.get_users()] == ["Alicia", "Bob"]
+
+def test_rows_are_counted_like_the_loader(watcher, caplog):
+    write(watcher, CSV_CONTENT.replace("Alice", "Alicia") + '\n"Carol\nSmith",carol@example.com,30,Ops,2024-03-01\n', mode="w")
+    watcher.check()
+    assert watcher.check() == "reload"
+    assert watcher._nb_rows == 3
+    write(watcher, "Dan,not-an-email,40,Ops,2024-04-01\n")
+    watcher.check()
+    with caplog.at_level("WARNING"):
+        assert watcher.check() == "append"
+    assert "Line 4 - Skipping invalid user row" in caplog.text
+
+def test_append_after_a_write_reloads_the_file(watcher):
+    user_service.delete_user("bob@example.com")
+    write(watcher, "Charlie,charlie@example.com,35,Backend,2024-03-01\n")
+    watcher.check()
+    assert watcher.check() == "reload"
+    assert [u.name for u in user_service.get_users()] == ["Alice", "Charlie"]
+
+def test_compaction_of_the_change_log_is_absorbed(watcher):
+    user_service.delete_user("bob@example.com")
+    user_service.get_change_log().compact()
+    watcher.check()
+    assert watcher.check() == "compaction"
+    assert [u.name for u in user_service.get_users()] == ["Alice"]
+    write(watcher, "Charlie,charlie@example.com,35,Backend,2024-03-01\n")
+    watcher.check()
+    assert watcher.check() == "append"
+    assert [u.name for u in user_service.get_users()] == ["Alice", "Charlie"]
+
+def test_compaction_after_an_unlogged_change_reloads_the_file(watcher):
+    user_service.delete_user("bob@example.com")
+    user_service.remove_user(user_service.get_user_by_email("alice@example.com"))
+    user_service.get_change_log().compact()
+    watcher.check()
+    assert watcher.check() == "reload"
+    assert [u.name for u in user_service.get_users()] == ["Alice"]
@@ -0,0 +1,67 @@
+from datetime import date
+import pytest
+from app.models.user import User
+from app.models.users_query import UsersQuery
+from app.services.user_dataset import UserDataset
+from app.services.user_filter import UserFilter
+from app.services.user_service import UserService
+
+USERS = [
+    User(name="Alice", email="alice@example.com", age=30, team="Backend", start_date="2024-01-01"),
+    User(name="Bob", email="bob@corp.com", age=17, team="Frontend", start_date="2024-02-01"),
+    User(name="Charlie", email="charlie@example.com", age=35, team="Backend", start_date="2024-03-01"),
+    User(name="Diane", email="diane@corp.com", age=19, team="Frontend", start_date="2024-04-01"),
+    User(name="Alan", email="alan@corp.com", age=52, team="Ops", start_date="2023-05-01"),
+    User(name="Eve", email="eve@example.com", age=41, team="Ops", start_date="2022-06-01"),
+]
+
+@pytest.fixture
+def dataset():
+    return UserDataset(USERS)
+
+def get_names(users):
+    return [user.name for user in users]
+
+def test_compiled_predicate():
+    matches = UserFilter(teams=["Ops", "Backend"], min_age=31, email_prefix="e").compile()
+    assert [user.name for user in USERS if matches(user)] == ["Eve"]
+    assert UserFilter().is_empty()
+    assert UserFilter(teams=["Ops"]).get_single_team() == "Ops"
+    assert UserFilter(teams=["Ops"], min_age=20).get_single_team() is None
+
+def test_filter_from_query():
+    user_filter = UserFilter.from_query(UsersQuery(
+        team="Ops", teams=["Backend", "Ops"], start_date_from=date(2023, 1, 1),
+        name_prefix="", sort="-age", limit=10))
+    assert user_filter.get_key() == (
+        ("Ops", "Backend"), None, None, "2023-01-01", None, None, None)
+    assert UserFilter.from_query(UsersQuery(sort="age")).is_empty()
+
+def test_filters_match_a_scan(dataset):
+    user_filters = [
+        UserFilter(min_age=30, max_age=41),
+        UserFilter(teams=["Ops", "Frontend"]),
+        UserFilter(start_date_from=date(2023, 1, 1), start_date_to="2024-03-01"),
+        UserFilter(name_prefix="Al"),
+        UserFilter(teams=["Backend", "Unknown"], name_prefix="C", email_prefix="charlie@"),
+        UserFilter(min_age=50, max_age=20),
+    ]
+    adult_users = UserService.get_adult_users_of(USERS)
+    for user_filter in user_filters:
+        matches = user_filter.compile()
+        assert (UserService.to_users(dataset.filter_adult_users(user_filter))
+                == [user for user in adult_users if matches(user)])
+
+def test_most_selective_index_is_used(dataset):
+    assert dataset._plan_candidates(UserFilter(name_prefix="Al", min_age=18))[0] == "name"
+    assert dataset._plan_candidates(UserFilter(teams=["Backend"], min_age=18))[0] == "team"
+    assert dataset._plan_candidates(UserFilter(min_age=50, start_date_to="2024-12-31"))[0] == "age"
+    assert dataset._plan_candidates(UserFilter(email_prefix="a"))[0] == "scan"
+
+def test_filtered_users_sorted(dataset):
+    user_filter = UserFilter(teams=["Backend", "Ops"])
+    assert get_names(dataset.filter_adult_users(user_filter, "-age")) == [
+        "Alan", "Eve", "Charlie", "Alice"]
+    assert get_names(dataset.filter_adult_users(user_filter, "name")[:2]) == ["Alan", "Alice"]
+    with pytest.raises(ValueError):
+        dataset.filter_adult_users(user_filter, "email")
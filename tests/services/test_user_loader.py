@@ -0,0 +1,86 @@
+import pytest
+from app.services.user_loader import UserLoader, UserSnapshotWriter, SNAPSHOT_SUFFIX
+from app.services.logger_service import LOG_SAMPLE_FIRST_N
+
+CSV_CONTENT = """name,email,age,team,start_date
+Alice,alice@example.com,30,Backend,2024-01-01
+Bob,not-an-email,25,Frontend,2024-02-01
+Charlie,charlie@example.com,35,Backend,2024-03-01
+Diane,diane@example.com,,Frontend,2024-04-01
+Eve,eve@example.com,19,Ops,2024-05-01
+"""
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "users.csv"
+    path.write_text(CSV_CONTENT, encoding="utf-8")
+    return str(path)
+
+def test_load_users_from_file_skips_invalid_rows(csv_path):
+    users = UserLoader.load_users_from_file(csv_path)
+    assert [u.name for u in users] == ["Alice", "Charlie", "Eve"]
+
+def test_load_users_by_chunks(csv_path):
+    chunks = list(UserLoader.load_users_by_chunks(csv_path, chunk_size=2))
+    assert [[u.name for u in chunk] for chunk in chunks] == [["Alice", "Charlie"], ["Eve"]]
+
+def test_load_users_by_chunks_invalid_chunk_size(csv_path):
+    with pytest.raises(ValueError):
+        next(UserLoader.load_users_by_chunks(csv_path, chunk_size=0))
+
+def test_load_users_invalid_header(tmp_path):
+    path = tmp_path / "users.csv"
+    path.write_text("name,email\nAlice,alice@example.com\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        UserLoader.load_users_from_file(str(path))
+
+def test_fast_validation_matches_full_validation(tmp_path):
+    path = tmp_path / "users.csv"
+    path.write_text(CSV_CONTENT + """Frank,Frank@EXAMPLE.com,40,Ops,2024-06-01
+Grace,grace@example.test,41,Ops,2024-07-01
+Heidi,heidi@example.com, 42,Ops,01/08/2024
+Ivan,ivan@example.com,-1,Ops,2024-09-01
+""", encoding="utf-8")
+    full = list(UserLoader.load_users_by_chunks(str(path)))
+    fast = list(UserLoader.load_users_by_chunks(str(path), fast_validation=True))
+    assert fast == full
+    assert [u.email for u in fast[0]][-2:] == ["Frank@example.com", "heidi@example.com"]
+
+def test_load_users_in_parallel_keeps_order_and_line_numbers(tmp_path, caplog):
+    path = tmp_path / "users.csv"
+    rows = [f"User {i},user{i}@example.com,{'x' if i % 7 == 0 else 20 + i % 30},Team{i % 3},2024-01-01"
+            for i in range(1, 201)]
+    path.write_text("name,email,age,team,start_date\n" + "\n".join(rows) + "\n", encoding="utf-8")
+    expected = UserLoader.load_users_from_file(str(path))
+    caplog.clear()
+    with caplog.at_level("INFO"):
+        chunks = list(UserLoader.load_users_in_parallel(str(path), max_workers=4, min_range_size=100))
+    assert len(chunks) > 1
+    assert [record.to_user() for chunk in chunks for record in chunk] == expected
+    skipped_lines = [record.args[0] for record in caplog.records if record.levelname == "WARNING"]
+    assert skipped_lines == list(range(7, 201, 7))[:LOG_SAMPLE_FIRST_N]
+    assert "172 valid users, 28 skipped (first 20 shown)" in caplog.text
+
+def test_snapshot_roundtrip_and_invalidation(csv_path):
+    snapshot_key = UserLoader.get_snapshot_key(csv_path)
+    assert UserLoader.load_users_from_snapshot(snapshot_key, csv_path) is None
+    users = UserLoader.load_users_from_file(csv_path)
+    snapshot_writer = UserSnapshotWriter(snapshot_key, csv_path)
+    snapshot_writer.write(users[:2])
+    snapshot_writer.write(users[2:])
+    snapshot_writer.commit()
+    chunks = list(UserLoader.load_users_from_snapshot(snapshot_key, csv_path))
+    assert [[record.to_user() for record in chunk] for chunk in chunks] == [users[:2], users[2:]]
+    with open(csv_path, "a", encoding="utf-8") as csvfile:
+        csvfile.write("Frank,frank@example.com,40,Ops,2024-06-01\n")
+    assert UserLoader.load_users_from_snapshot(UserLoader.get_snapshot_key(csv_path), csv_path) is None
+
+def test_snapshot_aborted_or_unreadable_is_ignored(csv_path):
+    snapshot_key = UserLoader.get_snapshot_key(csv_path)
+    snapshot_writer = UserSnapshotWriter(snapshot_key, csv_path)
+    snapshot_writer.write(UserLoader.load_users_from_file(csv_path))
+    snapshot_writer.abort()
+    assert UserLoader.load_users_from_snapshot(snapshot_key, csv_path) is None
+    with open(csv_path + SNAPSHOT_SUFFIX, "wb") as snapshot_file:
+        snapshot_file.write(b"\x80\x05not json")
+    assert UserLoader.load_users_from_snapshot(snapshot_key, csv_path) is None
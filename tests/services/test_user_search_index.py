@@ -0,0 +1,74 @@
+import random
+import pytest
+from app.models.user import User
+from app.services.user_dataset import UserDataset
+from app.services.user_search_index import UserSearchIndex
+
+NAMES = ["Alice Martin", "Bob Alison", "Charlie Smith", "Ali Khan", "Diane Malik"]
+WORDS = ["Alice", "Alison", "Martin", "Malik", "Ali", "Diane", "Kalinda", "Smith"]
+EMAILS = ["alice@example.com", "bob@corp.com", "csmith@example.com", "ali@corp.com", "diane@corp.com"]
+
+def search(query, max_results=10):
+    return [NAMES[position] for position in UserSearchIndex(NAMES, EMAILS).search(query, max_results)]
+
+def test_exact_then_prefix_then_substring():
+    assert search("ali") == ["Ali Khan", "Alice Martin", "Bob Alison", "Diane Malik"]
+    assert search("ALI", max_results=2) == ["Ali Khan", "Alice Martin"]
+
+def test_prefix_of_last_name_and_email():
+    assert search("sm") == ["Charlie Smith"]
+    assert search("csmith@") == ["Charlie Smith"]
+
+def test_substring_across_words():
+    assert search("e mar") == ["Alice Martin"]
+    assert search("corp.c") == ["Bob Alison", "Ali Khan", "Diane Malik"]
+
+def test_no_match():
+    assert search("zz") == []
+    assert search("xyz") == []
+    assert search("  ") == []
+
+def test_users_added_and_removed_after_build():
+    index = UserSearchIndex(list(NAMES), list(EMAILS))
+    index.add("Alicia Keys", "akeys@example.com", 10)
+    assert index.search("alicia", 10) == [10]
+    assert index.search("keys@", 10) == [10]
+    index.remove(0)
+    assert 0 not in index.search("ali", 10)
+    assert index.search("martin", 10) == []
+    with pytest.raises(ValueError):
+        index.remove(0)
+    with pytest.raises(ValueError):
+        index.add("Bob Bis", "bob@corp.com", 1)
+
+def test_readded_user_keeps_its_rank_and_the_index_its_size():
+    index = UserSearchIndex(list(NAMES), list(EMAILS))
+    size = (len(index._entries), sum(map(len, index._ngram_positions.values())))
+    for _ in range(10):
+        index.remove(0)
+        index.add("Alice Martin", "alice@example.com", 0)
+    assert (len(index._entries), sum(map(len, index._ngram_positions.values()))) == size
+    index.remove(1)
+    index.add("Bob Ali", "bob@corp.com", 1)
+    assert index.search("ali", 10) == [1, 3, 0, 4]
+    assert index.search("corp.c", 10) == [1, 3, 4]
+
+def test_same_results_as_a_rebuilt_index():
+    rng = random.Random(0)
+    dataset = UserDataset([
+        User(name=f"{rng.choice(WORDS)} {rng.choice(WORDS)}", email=f"user{i}@example.com",
+             age=rng.randrange(15, 60), team="Ops", start_date="2024-01-01")
+        for i in range(200)])
+    dataset.get_search_index()
+    for i in range(300):
+        email = f"user{rng.randrange(220)}@example.com"
+        if rng.random() < 0.2:
+            dataset.delete_user(email)
+        else:
+            dataset.upsert_user(User(
+                name=f"{rng.choice(WORDS)} {rng.choice(WORDS)}", email=email,
+                age=rng.randrange(15, 60), team="Ops", start_date="2024-01-01"))
+    rebuilt = UserDataset(list(dataset.users))
+    for query in ["al", "ali", "ice", "mart", "user1", "n m", "example"]:
+        assert [u.email for u in dataset.search_adult_users(query, 50)] == [
+            u.email for u in rebuilt.search_adult_users(query, 50)], query
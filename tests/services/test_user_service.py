@@ -0,0 +1,193 @@
+import asyncio
+import json
+import threading
+import pytest
+from app.models.user import User
+from app.models.user_record import UserRecord
+from app.services.user_service import UserService, user_service
+
+@pytest.fixture(autouse=True)
+def setup_users():
+    user_service.users = [
+        User(name="Alice", email="alice@example.com", age=30, team="Backend", start_date="2024-01-01"),
+        User(name="Bob", email="bob@example.com", age=17, team="Frontend", start_date="2024-02-01"),
+        User(name="Charlie", email="charlie@example.com", age=35, team="Backend", start_date="2024-03-01"),
+        User(name="Diane", email="diane@example.com", age=19, team="Frontend", start_date="2024-04-01"),
+    ]
+    yield
+    user_service.users = []
+
+def test_adult_and_minor_partition():
+    assert [u.name for u in user_service.get_adult_users()] == ["Alice", "Charlie", "Diane"]
+    assert [u.name for u in user_service.get_minor_users()] == ["Bob"]
+
+def test_adult_users_of_team_uses_index():
+    assert [u.name for u in user_service.get_adult_users_of_team("Backend")] == ["Alice", "Charlie"]
+    assert [u.name for u in user_service.get_adult_users_of_team("Frontend")] == ["Diane"]
+    assert user_service.get_adult_users_of_team("Unknown") == []
+
+def test_indexes_rebuilt_when_users_replaced():
+    user_service.users = [
+        User(name="Eve", email="eve@example.com", age=40, team="Ops", start_date="2024-05-01"),
+    ]
+    assert [u.name for u in user_service.get_adult_users()] == ["Eve"]
+    assert user_service.get_adult_users_of_team("Backend") == []
+
+def test_adult_stats_precomputed():
+    stats = user_service.get_adult_stats()
+    assert stats.count == 3
+    assert stats.average_age == 28.0
+    assert [u.name for u in stats.get_oldest_users(3)] == ["Charlie", "Alice", "Diane"]
+    backend_stats = user_service.get_adult_stats("Backend")
+    assert backend_stats.count == 2
+    assert backend_stats.average_age == 32.5
+    assert user_service.get_adult_stats("Unknown").count == 0
+
+def test_adult_stats_updated_incrementally():
+    frank = User(name="Frank", email="frank@example.com", age=50, team="Backend", start_date="2024-05-01")
+    user_service.add_user(frank)
+    assert [u.name for u in user_service.get_adult_stats().get_oldest_users(3)] == ["Frank", "Charlie", "Alice"]
+    assert user_service.get_adult_stats("Backend").count == 3
+    user_service.remove_user(frank)
+    charlie = user_service.get_adult_users_of_team("Backend")[1]
+    user_service.remove_user(charlie)
+    stats = user_service.get_adult_stats()
+    assert stats.count == 2
+    assert stats.average_age == 24.5
+    assert [u.name for u in stats.get_oldest_users(3)] == ["Alice", "Diane"]
+    assert [u.name for u in user_service.get_adult_stats("Backend").get_oldest_users(3)] == ["Alice"]
+
+def test_concurrent_refresh_requests_are_coalesced(monkeypatch):
+    started = threading.Event()
+    release = threading.Event()
+    def slow_refresh(file_path=None):
+        started.set()
+        release.wait(5)
+    monkeypatch.setattr(user_service, "refresh_users_data", slow_refresh)
+    first_id = user_service.request_refresh()
+    assert started.wait(5)
+    assert user_service.get_refresh_status(first_id) == "running"
+    second_id = user_service.request_refresh()
+    assert user_service.request_refresh() == second_id
+    assert user_service.get_refresh_status(second_id) == "pending"
+    release.set()
+    assert user_service.wait_for_refresh(second_id, timeout=5) == "done"
+    assert user_service.get_refresh_status(first_id) == "done"
+    assert user_service.get_refresh_status(second_id) == "done"
+
+def test_users_pre_encoded_in_json():
+    adult_users = user_service.get_adult_users()
+    assert json.loads(user_service.encode_users(adult_users)) == [
+        user.model_dump() for user in UserService.to_users(adult_users)]
+    eve = User(name="Eve", email="eve@example.com", age=40, team="Ops", start_date="2024-05-01")
+    assert user_service.get_encoded_users([eve]) == [eve.model_dump_json().encode()]
+
+def test_users_stored_as_compact_records():
+    users = user_service.get_users()
+    assert all(isinstance(user, UserRecord) for user in users)
+    assert not hasattr(users[0], "__dict__")
+    assert users[0].team is users[2].team
+    assert UserService.to_users(users[:1]) == [
+        User(name="Alice", email="alice@example.com", age=30, team="Backend", start_date="2024-01-01")]
+
+def test_sorted_adult_users_are_stable_slices():
+    user_service.add_user(
+        User(name="Aaron", email="aaron@example.com", age=30, team="Frontend", start_date="2023-06-01"))
+    assert [u.name for u in user_service.get_sorted_adult_users("age")] == [
+        "Diane", "Alice", "Aaron", "Charlie"]
+    assert [u.name for u in user_service.get_sorted_adult_users("-age")[:3]] == [
+        "Charlie", "Alice", "Aaron"]
+    assert [u.name for u in user_service.get_sorted_adult_users("start_date")[:2]] == ["Aaron", "Alice"]
+    assert [u.name for u in user_service.get_sorted_adult_users("-name", "Frontend")] == [
+        "Diane", "Aaron"]
+    assert len(user_service.get_sorted_adult_users("name", "Unknown")) == 0
+    with pytest.raises(ValueError):
+        user_service.get_sorted_adult_users("email")
+
+def test_oldest_adult_users_beyond_stats():
+    sorted_users = user_service.get_sorted_adult_users("-age")
+    assert user_service.get_oldest_adult_users(2) == sorted_users[:2]
+    assert [u.name for u in user_service.get_oldest_adult_users(10)] == ["Charlie", "Alice", "Diane"]
+    user_service.remove_user(sorted_users[0])
+    assert [u.name for u in user_service.get_oldest_adult_users(10, "Backend")] == ["Alice"]
+
+def test_stats_refilled_without_building_sort_orders():
+    user_service.add_users([
+        User(name=f"User {i}", email=f"user{i}@example.com", age=20 + i % 3, team="Ops", start_date="2024-05-01")
+        for i in range(4)])
+    user_service.delete_user("charlie@example.com")
+    user_service.delete_user("alice@example.com")
+    assert not user_service._dataset._sort_orders
+    assert [u.name for u in user_service.get_adult_stats().get_oldest_users(3)] == ["User 2", "User 1", "User 0"]
+    user_service.delete_user("user2@example.com")
+    assert [u.name for u in user_service.get_adult_stats("Ops").get_oldest_users(3)] == ["User 1", "User 0", "User 3"]
+
+def test_email_index_reports_duplicates(caplog):
+    assert user_service.get_user_by_email("ALICE@example.com").name == "Alice"
+    assert user_service.get_user_by_email("nobody@example.com") is None
+    duplicate = User(name="Alice Bis", email="Alice@Example.com", age=40, team="Ops", start_date="2024-05-01")
+    with caplog.at_level("WARNING"):
+        user_service.add_user(duplicate)
+    assert "Duplicate email Alice@example.com: user Alice Bis not indexed, Alice kept" in caplog.text
+    assert user_service.get_user_by_email("alice@example.com").name == "Alice"
+    user_service.remove_user(user_service.get_user_by_email("alice@example.com"))
+    assert user_service.get_user_by_email("alice@example.com").name == "Alice Bis"
+
+def test_upserts_and_deletes_update_indexes_in_place():
+    assert [u.name for u in user_service.get_sorted_adult_users("-age")] == ["Charlie", "Alice", "Diane"]
+    generation = user_service.generation
+    bob = User(name="Bob", email="BOB@example.com", age=40, team="Backend", start_date="2024-02-01")
+    assert user_service.upsert_user(bob) is False
+    assert user_service.generation == generation + 1
+    assert [u.name for u in user_service.users] == ["Alice", "Bob", "Charlie", "Diane"]
+    assert [u.name for u in user_service.get_adult_users_of_team("Backend")] == ["Alice", "Bob", "Charlie"]
+    assert user_service.get_minor_users() == []
+    assert [u.name for u in user_service.get_sorted_adult_users("-age")] == ["Bob", "Charlie", "Alice", "Diane"]
+    assert [u.name for u in user_service.get_sorted_adult_users("age", "Backend")] == ["Alice", "Charlie", "Bob"]
+    assert [u.name for u in user_service.get_adult_stats().get_oldest_users(3)] == ["Bob", "Charlie", "Alice"]
+    assert user_service.delete_user("bob@example.com") is True
+    assert user_service.delete_user("bob@example.com") is False
+    assert user_service.upsert_user(
+        User(name="Eve", email="eve@example.com", age=35, team="Ops", start_date="2024-05-01")) is True
+    assert [u.name for u in user_service.get_sorted_adult_users("-age")] == ["Charlie", "Eve", "Alice", "Diane"]
+    assert [u.name for u in user_service.get_adult_stats().get_oldest_users(3)] == ["Charlie", "Eve", "Alice"]
+    assert [u.name for u in user_service.search_adult_users("eve", 10)] == ["Eve"]
+    assert user_service.get_adult_stats("Backend").average_age == 32.5
+    assert user_service.create_user(
+        User(name="Eve Bis", email="EVE@example.com", age=50, team="Ops", start_date="2024-05-01")) is False
+
+def test_direct_writes_wait_for_the_write_lock():
+    eve = User(name="Eve", email="eve@example.com", age=40, team="Ops", start_date="2024-05-01")
+    generation = user_service.get_generation()
+    with user_service._write_lock:
+        writer = threading.Thread(target=user_service.add_users, args=([eve],))
+        writer.start()
+        writer.join(0.1)
+        assert writer.is_alive()
+        assert user_service.get_generation() == generation
+    writer.join()
+    assert user_service.get_generation() == generation + 1
+    assert user_service.get_user_by_email("eve@example.com").name == "Eve"
+
+def test_writes_applied_on_the_event_loop(monkeypatch):
+    loop = asyncio.new_event_loop()
+    loop_thread = threading.Thread(target=loop.run_forever, daemon=True)
+    loop_thread.start()
+    dataset = user_service._dataset
+    applied_in = []
+    def upsert_user(user):
+        applied_in.append(threading.current_thread())
+        return type(dataset).upsert_user(dataset, user)
+    monkeypatch.setattr(dataset, "upsert_user", upsert_user)
+    user_service.set_event_loop(loop)
+    try:
+        assert user_service.upsert_user(
+            User(name="Eve", email="eve@example.com", age=40, team="Ops", start_date="2024-05-01"))
+        assert user_service.delete_user("alice@example.com")
+    finally:
+        user_service.set_event_loop(None)
+        loop.call_soon_threadsafe(loop.stop)
+        loop_thread.join()
+        loop.close()
+    assert applied_in == [loop_thread]
+    assert [u.name for u in user_service.get_adult_users()] == ["Charlie", "Diane", "Eve"]